@@ -0,0 +1,196 @@
+"""End-to-end benchmark of the full pipeline graph (gemma3n_trial.pipeline).
+
+Runs the compiled graph (app.ainvoke) that every frontend uses against a
+local fake Spoonacular server and a fake chat model, so nothing leaves the
+machine and latency is fixed:
+
+    PYTHONPATH=src python benchmarks/bench_pipeline.py \\
+        --concurrency 1 8 32 --requests 64 --output bench.json
+
+Reports per-node latency, end-to-end p50/p95/p99 and throughput for each
+concurrency level as JSON. Compare two runs with benchmarks/compare.py.
+"""
+import argparse
+import asyncio
+import json
+import platform
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+from langchain_core.callbacks import BaseCallbackHandler
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from stubs import FakeChat, FakeSpoonacular  # noqa: E402
+
+from gemma3n_trial.agents import LLM_Agent, LocalSearchAgent, RecipeAgent, SearchAgent  # noqa: E402
+from gemma3n_trial.pipeline import NODES, build_pipeline  # noqa: E402
+from gemma3n_trial.utils import LRUCache, RecipeSearchIndex, ResponseCache  # noqa: E402
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def percentile(values: List[float], p: float) -> float:
+    """Linear-interpolated percentile of `values` (p in 0..100)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * p / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(seconds: List[float]) -> Dict[str, float]:
+    ms = [s * 1000 for s in seconds]
+    return {
+        "p50": round(percentile(ms, 50), 3),
+        "p95": round(percentile(ms, 95), 3),
+        "p99": round(percentile(ms, 99), 3),
+        "mean": round(sum(ms) / len(ms), 3) if ms else 0.0,
+        "max": round(max(ms), 3) if ms else 0.0,
+    }
+
+
+class NodeTimer(BaseCallbackHandler):
+    """Times each graph node through LangChain's chain start/end callbacks."""
+
+    def __init__(self):
+        self.started: Dict[UUID, tuple] = {}
+        self.durations: Dict[str, List[float]] = defaultdict(list)
+
+    def on_chain_start(self, serialized: Optional[dict], inputs: Any, *, run_id: UUID, **kwargs) -> None:
+        name = kwargs.get("name") or (serialized or {}).get("name")
+        if name in NODES:
+            self.started[run_id] = (name, time.perf_counter())
+
+    def on_chain_end(self, outputs: Any, *, run_id: UUID, **kwargs) -> None:
+        started = self.started.pop(run_id, None)
+        if started is not None:
+            self.durations[started[0]].append(time.perf_counter() - started[1])
+
+    on_chain_error = on_chain_end
+
+
+def build_app(stub: FakeSpoonacular, llm_latency: float, cached: bool):
+    # Same wiring as default_agents(), pointed at the stubs
+    cache = ResponseCache(":memory:") if cached else None
+    dish_name_cache = LRUCache(max_entries=1024) if cached else None
+    search = SearchAgent("bench", base_url=stub.base_url, cache=cache)
+    # Uncached: the local index never has enough results, so every search goes upstream
+    min_results = 5 if cached else sys.maxsize
+    return build_pipeline(
+        LLM_Agent(FakeChat(latency=llm_latency), cache=dish_name_cache),
+        LocalSearchAgent(RecipeSearchIndex(None), remote=search, min_results=min_results),
+        RecipeAgent("bench", base_url=stub.base_url, cache=cache),
+        mode="async",
+    )
+
+
+async def run_level(app, concurrency: int, requests: int, repeat_queries: bool) -> Dict[str, Any]:
+    timer = NodeTimer()
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+
+    async def one(i: int) -> None:
+        nonlocal errors
+        # Distinct queries defeat every cache unless --repeat-queries is given
+        query = "how do I make butter chicken?" if repeat_queries else f"how do I make dish {concurrency}-{i}?"
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                # Always take the first recipe
+                await app.ainvoke({"user_query": query, "choice": 1}, config={"callbacks": [timer]})
+            except Exception:
+                errors += 1
+                return
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    wall = time.perf_counter() - start
+    return {
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": errors,
+        "wall_s": round(wall, 4),
+        "throughput_rps": round(len(latencies) / wall, 3) if wall else 0.0,
+        "e2e_ms": summarize(latencies),
+        "nodes_ms": {node: summarize(timer.durations[node]) for node in NODES if timer.durations[node]},
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(
+    concurrency: List[int],
+    requests: int,
+    llm_latency: float,
+    http_latency: float,
+    cached: bool = False,
+    repeat_queries: bool = False,
+) -> Dict[str, Any]:
+    with FakeSpoonacular(latency=http_latency) as stub:
+        app = build_app(stub, llm_latency, cached)
+
+        async def main():
+            # One warm-up run so imports and connection setup don't skew level 1
+            await app.ainvoke({"user_query": "warm up", "choice": 1})
+            return [await run_level(app, c, requests, repeat_queries) for c in concurrency]
+
+        results = asyncio.run(main())
+        upstream_requests = stub.requests
+
+    return {
+        "benchmark": "main_pipeline",
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "config": {
+            "concurrency": concurrency,
+            "requests": requests,
+            "llm_latency_s": llm_latency,
+            "http_latency_s": http_latency,
+            "cached": cached,
+            "repeat_queries": repeat_queries,
+        },
+        "upstream_requests": upstream_requests,
+        "results": results,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--requests", type=int, default=64, help="pipeline runs per concurrency level")
+    parser.add_argument("--llm-latency", type=float, default=0.1, help="seconds per fake LLM call")
+    parser.add_argument("--http-latency", type=float, default=0.05, help="seconds per fake Spoonacular call")
+    parser.add_argument("--cached", action="store_true", help="enable the dish-name cache, ResponseCache and the local search index")
+    parser.add_argument("--repeat-queries", action="store_true", help="send the same query every time")
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    report = run(args.concurrency, args.requests, args.llm_latency, args.http_latency, args.cached, args.repeat_queries)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
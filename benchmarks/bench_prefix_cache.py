@@ -0,0 +1,133 @@
+"""Time-to-first-token of follow-up questions with and without prefix KV caching.
+
+Drives CookingGraphAgent.stream over a LocalChatModel, as the Streamlit
+follow-up box does, asking several questions per session about one recipe:
+
+    PYTHONPATH=src python benchmarks/bench_prefix_cache.py \\
+        --sessions 3 --turns 4 --output ttft.json
+
+Uses a randomly initialized model by default (no download; latency still
+scales with prompt length); --model runs a real checkpoint. Needs torch and
+transformers.
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from bench_pipeline import git_commit, summarize  # noqa: E402
+from stubs import fake_recipe, tiny_local_model  # noqa: E402
+
+from gemma3n_trial.agents import AgentState, CookingGraphAgent  # noqa: E402
+from gemma3n_trial.schema import DetailedRecipe  # noqa: E402
+from gemma3n_trial.utils import LocalChatModel, PrefixKVCache, RecipeContextBuilder, load_local_model  # noqa: E402
+
+QUESTIONS = [
+    "How long does it take?",
+    "Can I make it ahead?",
+    "What can I use instead of ingredient 3?",
+    "How many servings does it make?",
+    "Is step 4 really necessary?",
+    "What should I serve with it?",
+]
+
+
+def bench_recipe() -> DetailedRecipe:
+    data = fake_recipe(1)
+    data["ingredients"] = [i["original"] for i in data.pop("extendedIngredients")]
+    return DetailedRecipe(**data)
+
+
+def time_session(agent: CookingGraphAgent, recipe: DetailedRecipe, session_id: str, turns: int) -> List[float]:
+    ttfts = []
+    for question in (QUESTIONS * turns)[:turns]:
+        start = time.perf_counter()
+        stream = agent.stream(AgentState(detailed_recipe=recipe, user_input=question), session_id=session_id)
+        next(stream)
+        ttfts.append(time.perf_counter() - start)
+        for _ in stream:  # finish the answer so memory records the turn
+            pass
+    return ttfts
+
+
+def run(
+    sessions: int,
+    turns: int,
+    max_new_tokens: int = 8,
+    model: Optional[str] = None,
+    hidden_size: int = 256,
+    layers: int = 4,
+) -> Dict[str, Any]:
+    recipe = bench_recipe()
+    if model:
+        local = load_local_model(model)
+    else:
+        vocab = RecipeContextBuilder().build(recipe).split() + " ".join(QUESTIONS).split()
+        local = tiny_local_model(hidden_size, layers, vocab=vocab)
+
+    results = []
+    for cached in (False, True):
+        prefix_cache = PrefixKVCache() if cached else None
+        agent = CookingGraphAgent(
+            llm=LocalChatModel(local_model=local, max_new_tokens=max_new_tokens, prefix_cache=prefix_cache)
+        )
+        time_session(agent, recipe, "warm-up", 1)
+        if prefix_cache is not None:
+            prefix_cache.clear()
+        first, follow_ups = [], []
+        for s in range(sessions):
+            ttfts = time_session(agent, recipe, f"session-{s}", turns)
+            first.append(ttfts[0])
+            follow_ups.extend(ttfts[1:])
+        results.append({
+            "prefix_cache": cached,
+            "first_turn_ttft_ms": summarize(first),
+            "follow_up_ttft_ms": summarize(follow_ups),
+            "cache": prefix_cache.stats() if prefix_cache is not None else None,
+        })
+
+    off, on = (r["follow_up_ttft_ms"]["p50"] for r in results)
+    return {
+        "benchmark": "prefix_cache_ttft",
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "config": {
+            "sessions": sessions,
+            "turns": turns,
+            "max_new_tokens": max_new_tokens,
+            "model": model or f"random-llama-{hidden_size}x{layers}",
+        },
+        "results": results,
+        "follow_up_p50_speedup": round(off / on, 2) if on else None,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=3, help="conversations per configuration")
+    parser.add_argument("--turns", type=int, default=4, help="questions per conversation")
+    parser.add_argument("--max-new-tokens", type=int, default=8)
+    parser.add_argument("--model", help="hub id or path of a real model (default: random tiny Llama)")
+    parser.add_argument("--hidden-size", type=int, default=256)
+    parser.add_argument("--layers", type=int, default=4)
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    report = run(args.sessions, args.turns, args.max_new_tokens, args.model, args.hidden_size, args.layers)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
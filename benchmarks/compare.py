@@ -0,0 +1,76 @@
+"""Compare two bench_pipeline.py reports, e.g. before/after a commit.
+
+    python benchmarks/compare.py base.json head.json [--fail-above 10]
+
+Prints the change in throughput and end-to-end/per-node latency for each
+concurrency level present in both. With --fail-above, exits 1 when any
+p95 latency grows or throughput drops by more than that many percent.
+"""
+import argparse
+import json
+import sys
+from typing import Dict, List, Optional
+
+
+def _change(base: float, head: float) -> float:
+    return (head - base) / base * 100 if base else 0.0
+
+
+def compare(base: dict, head: dict) -> List[Dict]:
+    rows = []
+    head_levels = {r["concurrency"]: r for r in head["results"]}
+    for old in base["results"]:
+        new = head_levels.get(old["concurrency"])
+        if new is None:
+            continue
+        metrics = {"throughput_rps": (old["throughput_rps"], new["throughput_rps"])}
+        for stat in ("p50", "p95", "p99"):
+            metrics[f"e2e_{stat}_ms"] = (old["e2e_ms"][stat], new["e2e_ms"][stat])
+        for node, stats in old.get("nodes_ms", {}).items():
+            if node in new.get("nodes_ms", {}):
+                metrics[f"{node}_p95_ms"] = (stats["p95"], new["nodes_ms"][node]["p95"])
+        for name, (a, b) in metrics.items():
+            rows.append({"concurrency": old["concurrency"], "metric": name, "base": a, "head": b, "change_pct": _change(a, b)})
+    return rows
+
+
+def regressions(rows: List[Dict], threshold: float) -> List[Dict]:
+    bad = []
+    for row in rows:
+        if row["metric"] == "throughput_rps" and row["change_pct"] < -threshold:
+            bad.append(row)
+        elif row["metric"].endswith("p95_ms") and row["change_pct"] > threshold:
+            bad.append(row)
+    return bad
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("base")
+    parser.add_argument("head")
+    parser.add_argument("--fail-above", type=float, help="regression threshold in percent")
+    args = parser.parse_args(argv)
+
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.head) as f:
+        head = json.load(f)
+    if base.get("config") != head.get("config"):
+        print("warning: configs differ, numbers may not be comparable", file=sys.stderr)
+
+    rows = compare(base, head)
+    print(f"base {base['meta'].get('commit')}  head {head['meta'].get('commit')}")
+    print(f"{'conc':>5} {'metric':<36} {'base':>10} {'head':>10} {'change':>8}")
+    for row in rows:
+        print(f"{row['concurrency']:>5} {row['metric']:<36} {row['base']:>10.2f} {row['head']:>10.2f} {row['change_pct']:>+7.1f}%")
+
+    if args.fail_above is not None:
+        bad = regressions(rows, args.fail_above)
+        if bad:
+            print(f"{len(bad)} metric(s) regressed by more than {args.fail_above}%", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
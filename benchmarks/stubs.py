@@ -0,0 +1,167 @@
+"""Local stand-ins for Spoonacular and Groq, with configurable latency."""
+import asyncio
+import json
+import re
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, List, Optional
+from urllib.parse import parse_qs, urlparse
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+RESULTS_PER_SEARCH = 10
+
+
+def fake_recipe(recipe_id: int) -> dict:
+    # Roughly the size and shape of a real /information payload
+    return {
+        "id": recipe_id,
+        "title": f"Stub Recipe {recipe_id}",
+        "summary": "<p>A <b>stub</b> recipe used for benchmarks. " + "It is quite tasty. " * 20 + "</p>",
+        "instructions": "<ol>" + "".join(f"<li>Do step {i} carefully for a few minutes.</li>" for i in range(1, 9)) + "</ol>",
+        "readyInMinutes": 45,
+        "servings": 4,
+        "extendedIngredients": [{"original": f"{i} cups of ingredient {i}"} for i in range(1, 13)],
+    }
+
+
+class FakeSpoonacular:
+    """Threaded HTTP server answering complexSearch, /information and informationBulk.
+
+    Every request sleeps `latency` seconds first. Use as a context manager;
+    `base_url` goes straight into the agents' `base_url`.
+    """
+
+    def __init__(self, latency: float = 0.05, host: str = "127.0.0.1"):
+        self.latency = latency
+        self.requests = 0
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                with stub._lock:
+                    stub.requests += 1
+                time.sleep(stub.latency)
+                status, payload = stub.route(self.path)
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.server = ThreadingHTTPServer((host, 0), Handler)
+        self.server.daemon_threads = True
+        self.base_url = f"http://{host}:{self.server.server_address[1]}"
+        self._thread: Optional[threading.Thread] = None
+
+    def route(self, raw_path: str):
+        url = urlparse(raw_path)
+        params = parse_qs(url.query)
+        if url.path == "/recipes/complexSearch":
+            query = params.get("query", [""])[0]
+            # Stable ids per query so repeated queries can hit caches
+            base = zlib.crc32(query.encode()) % 100_000 * RESULTS_PER_SEARCH
+            results = [{"id": base + i, "title": f"{query} #{i}"} for i in range(RESULTS_PER_SEARCH)]
+            return 200, {"results": results, "totalResults": len(results)}
+        if url.path == "/recipes/informationBulk":
+            ids = [int(i) for i in params.get("ids", [""])[0].split(",") if i]
+            return 200, [fake_recipe(i) for i in ids]
+        match = re.fullmatch(r"/recipes/(\d+)/information", url.path)
+        if match:
+            return 200, fake_recipe(int(match.group(1)))
+        return 404, {"message": "not found"}
+
+    def start(self) -> "FakeSpoonacular":
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self) -> "FakeSpoonacular":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+class FakeChat(BaseChatModel):
+    """Chat model that waits `latency` seconds, then answers.
+
+    Dish-name prompts (LLM_Agent) get the query back as {"name": ...};
+    anything else gets `answer`, streamed word by word after `latency`.
+    """
+
+    latency: float = 0.1
+    answer: str = "Stir gently and simmer for ten more minutes, then season to taste."
+
+    @property
+    def _llm_type(self) -> str:
+        return "benchmark-fake-chat"
+
+    def _text(self, messages: List[BaseMessage]) -> str:
+        prompt = messages[-1].content
+        match = re.search(r"Query: (.*)$", prompt)
+        if match and "Extract the name of the dish" in prompt:
+            return json.dumps({"name": match.group(1).strip()})
+        return self.answer
+
+    def _result(self, messages: List[BaseMessage]) -> ChatResult:
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self._text(messages)))])
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs) -> ChatResult:
+        time.sleep(self.latency)
+        return self._result(messages)
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs) -> ChatResult:
+        await asyncio.sleep(self.latency)
+        return self._result(messages)
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs):
+        time.sleep(self.latency)
+        for word in self._text(messages).split(" "):
+            yield ChatGenerationChunk(message=AIMessageChunk(content=word + " "))
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs):
+        await asyncio.sleep(self.latency)
+        for word in self._text(messages).split(" "):
+            yield ChatGenerationChunk(message=AIMessageChunk(content=word + " "))
+
+
+def tiny_local_model(hidden_size: int = 256, layers: int = 4, vocab: Optional[List[str]] = None, seed: int = 0):
+    """Randomly initialized Llama + word-level tokenizer wrapped as a LocalModel.
+
+    Same compute shape as a real local model (prefill grows with the prompt),
+    without downloading weights. Needs torch and transformers.
+    """
+    import torch
+    from tokenizers import Tokenizer, models, pre_tokenizers
+    from transformers import LlamaConfig, LlamaForCausalLM, PreTrainedTokenizerFast
+    from gemma3n_trial.utils import LocalModel
+
+    words = ["[UNK]", "[PAD]", "[EOS]", *(vocab or [])]
+    words += [f"w{i}" for i in range(max(0, 512 - len(words)))]
+    backend = Tokenizer(models.WordLevel({w: i for i, w in enumerate(dict.fromkeys(words))}, unk_token="[UNK]"))
+    backend.pre_tokenizer = pre_tokenizers.WhitespaceSplit()
+    tokenizer = PreTrainedTokenizerFast(tokenizer_object=backend, unk_token="[UNK]", pad_token="[PAD]", eos_token="[EOS]")
+
+    torch.manual_seed(seed)
+    config = LlamaConfig(
+        vocab_size=len(tokenizer), hidden_size=hidden_size, intermediate_size=hidden_size * 4,
+        num_hidden_layers=layers, num_attention_heads=max(1, hidden_size // 64),
+        max_position_embeddings=8192, pad_token_id=1, eos_token_id=2,
+    )
+    model = LlamaForCausalLM(config).eval()
+    # Random weights: never stop early, so every run generates the same length
+    model.generation_config.eos_token_id = None
+    return LocalModel(model, tokenizer)
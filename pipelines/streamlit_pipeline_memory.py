@@ -1,92 +1,35 @@
+import uuid
 import streamlit as st
-from langchain.memory import ConversationBufferWindowMemory
-from langgraph.graph import StateGraph
-from gemma3n_trial.agents.llm_agent import LLM_Agent
-from gemma3n_trial.agents.search_agent import SearchAgent
-from gemma3n_trial.agents.interface_agent import InterfaceAgent
-from gemma3n_trial.agents.recipe_agent import RecipeAgent
-from gemma3n_trial.agents import CookingGraphAgent, AgentState
-from langchain_groq import ChatGroq
-import os
+from langgraph.types import Command
+from gemma3n_trial.agents import AgentState
+from gemma3n_trial.pipeline import BoundedMemorySaver, InterruptChoice, default_agents, default_cooking_agent
 from dotenv import load_dotenv
 load_dotenv()
 
-from pydantic import BaseModel
-from typing import Optional, List, Dict, Any
-
-from gemma3n_trial.schema import DishName, RecipeSearchResult, DetailedRecipe
-
-class PipelineState(BaseModel):
-    user_query: str
-    dish_name: Optional[str] = None
-    recipes: Optional[List[RecipeSearchResult]] = None
-    selected_recipe: Optional[RecipeSearchResult] = None
-    detailed_recipe: Optional[Dict[str, Any]] = None
-
-# Initialize memory in session_state (for conversation buffer)
-if "cooking_agent_memory" not in st.session_state:
-    st.session_state.cooking_agent_memory = ConversationBufferWindowMemory(
-        memory_key="chat_history",
-        return_messages=True,
-        input_key="input",
-        output_key="output",
-        k=2,  # Last 2 turns
-    )
+from gemma3n_trial.schema import DetailedRecipe
+
+# Streamlit re-executes this script on every widget interaction; the agents
+# and compiled graph are built once per process (default_agents() and
+# build_pipeline are memoized). Per-user state (choices, results, session
+# id) lives in st.session_state.
+agents = default_agents()
+prefetcher = agents.prefetcher
+# One follow-up agent for all users; chat memory is keyed by session id
+cooking_graph_agent = default_cooking_agent(memory_mode="summary")
+
+if "session_id" not in st.session_state:
+    st.session_state.session_id = str(uuid.uuid4())
+
+@st.cache_resource
+def load_graph():
+    # The run pauses at select_recipe; the checkpointer keeps each paused run
+    # (one thread per search) so the second click resumes there instead of
+    # re-extracting and re-searching. Shared by every session, so it only
+    # keeps the most recently used threads, and idle ones expire.
+    checkpointer = BoundedMemorySaver(max_threads=256, ttl=3600)
+    return agents.graph(mode="sync", chooser=InterruptChoice(), checkpointer=checkpointer), checkpointer
 
-# Initialize LLM and API key
-llm = ChatGroq(api_key=os.getenv("GROQ_API_KEY"), model="llama3-8b-8192")
-spoonacular_api_key = os.getenv("SPOONACULAR_API_KEY")
-
-llm_agent = LLM_Agent(llm)
-search_agent = SearchAgent(spoonacular_api_key)
-recipe_agent = RecipeAgent(spoonacular_api_key)
-cooking_graph_agent = CookingGraphAgent(
-    api_key=os.getenv("GROQ_API_KEY"),
-    model_name="llama3-8b-8192"
-)
-# Inject persistent memory object
-cooking_graph_agent.memory = st.session_state.cooking_agent_memory
-
-def extract_dish_name_node(state: PipelineState) -> dict:
-    dish_name_obj = llm_agent.invoke({"user_query": state.user_query})
-    return {"dish_name": dish_name_obj.name}
-
-def search_recipes_node(state: PipelineState) -> dict:
-    results_obj = search_agent.invoke(state.dish_name)
-    return {"recipes": results_obj.results}
-
-def select_recipe_node(state: PipelineState) -> dict:
-    user_choice = st.session_state.get("user_choice", 1)
-    interface_agent = InterfaceAgent(user_choice)
-    cooking_state = {
-        "recipe_options": state.recipes,
-        "selected_recipe": None
-    }
-    selected = interface_agent.invoke(cooking_state)
-    return {"selected_recipe": selected["selected_recipe"]}
-
-def fetch_detailed_recipe_node(state: PipelineState) -> dict:
-    cooking_state = {
-        "recipe_options": state.recipes,
-        "selected_recipe": state.selected_recipe
-    }
-    new_state = recipe_agent.invoke(cooking_state)
-    detailed_recipe = new_state.get("detailed_recipe")
-    return {"detailed_recipe": detailed_recipe}
-
-# Graph Setup
-graph = StateGraph(state_schema=PipelineState)
-graph.add_node("extract_dish_name", extract_dish_name_node)
-graph.add_node("search_recipes", search_recipes_node)
-graph.add_node("select_recipe", select_recipe_node)
-graph.add_node("fetch_detailed_recipe", fetch_detailed_recipe_node)
-
-graph.add_edge("extract_dish_name", "search_recipes")
-graph.add_edge("search_recipes", "select_recipe")
-graph.add_edge("select_recipe", "fetch_detailed_recipe")
-graph.set_entry_point("extract_dish_name")
-
-app = graph.compile()
+app, checkpointer = load_graph()
 
 # Streamlit UI
 st.title("👩‍🍳 Cooking Assistant")
@@ -99,6 +42,10 @@ if "user_choice" not in st.session_state:
     st.session_state.user_choice = 1
 if "detailed" not in st.session_state:
     st.session_state.detailed = None
+if "thread_id" not in st.session_state:
+    st.session_state.thread_id = None
+if "pause_config" not in st.session_state:
+    st.session_state.pause_config = None
 if "selected_recipe" not in st.session_state:
     st.session_state.selected_recipe = None
 
@@ -107,14 +54,15 @@ user_query = st.text_input("📝 What would you like to cook today?", "Butter Ch
 # First run: extract dish and get recipes
 if st.button("Find Recipes"):
     with st.spinner("⏳ Thinking... Finding the best options for you!"):
-        partial_graph = StateGraph(state_schema=PipelineState)
-        partial_graph.add_node("extract_dish_name", extract_dish_name_node)
-        partial_graph.add_node("search_recipes", search_recipes_node)
-        partial_graph.add_edge("extract_dish_name", "search_recipes")
-        partial_graph.set_entry_point("extract_dish_name")
-        partial_app = partial_graph.compile()
-
-        result = partial_app.invoke({"user_query": user_query})
+        # Start a fresh run; it stops at select_recipe with the recipes in state
+        if st.session_state.thread_id:
+            checkpointer.delete_thread(st.session_state.thread_id)
+            prefetcher.cancel(st.session_state.thread_id)
+        st.session_state.thread_id = str(uuid.uuid4())
+        config = {"configurable": {"thread_id": st.session_state.thread_id}}
+        result = app.invoke({"user_query": user_query}, config)
+        # Checkpoint to resume from, whichever recipe gets picked (and re-picked)
+        st.session_state.pause_config = app.get_state(config).config
         st.session_state.pipeline_result = result
         st.session_state.recipes = result.get("recipes", [])
 
@@ -129,10 +77,22 @@ if st.session_state.recipes:
     )
 
     if st.button("Show Selected Recipe"):
-        # Full pipeline continuation with selected recipe
-        result = app.invoke({
-            "user_query": user_query,
-        })
+        if app.get_state(st.session_state.pause_config).next != ("select_recipe",):
+            # The checkpointer expired this run (idle too long, or too many
+            # newer sessions); resuming would start an empty one
+            st.session_state.recipes = []
+            st.session_state.detailed = None
+            st.session_state.thread_id = None
+            st.session_state.pause_config = None
+            st.warning("This search has expired. Please click Find Recipes again.")
+            st.stop()
+        # Resume the paused run with the selected recipe: one detail fetch only.
+        # Fork from the pause checkpoint so picking another recipe later also
+        # resumes there rather than at the end of the previous run.
+        fork_config = app.update_state(st.session_state.pause_config, None)
+        result = app.invoke(Command(resume=st.session_state.user_choice), fork_config)
+        # The finished fork is not needed again; keep the thread at its pause point
+        checkpointer.prune(st.session_state.pause_config)
         st.session_state.detailed = result.get("detailed_recipe")
         st.session_state.selected_recipe = result.get("selected_recipe")
 
@@ -160,10 +120,10 @@ if st.session_state.detailed:
             detailed_recipe=detailed_recipe_obj,
             user_input=followup_input
         )
-        agent_state = cooking_graph_agent.invoke(agent_state)
+        st.markdown("**🤖 Assistant says**:")
+        response = st.write_stream(cooking_graph_agent.stream(agent_state, session_id=st.session_state.session_id))
         st.session_state.followup_history.append(("You", followup_input))
-        st.session_state.followup_history.append(("Assistant", agent_state.response))
-        st.markdown(f"**🤖 Assistant says**: {agent_state.response}")
+        st.session_state.followup_history.append(("Assistant", response))
 
     # Show last 2 turns of conversation
     if st.session_state.followup_history:
@@ -1,3 +1,4 @@
 from . import agents
 from . import schema
-__all__ = ["agents", "schema"]
\ No newline at end of file
+from . import utils
+__all__ = ["agents", "schema", "utils"]
\ No newline at end of file
@@ -1,6 +1,11 @@
 from .llm_agent import LLM_Agent
+from .dish_matcher import DishNameMatcher
 from .search_agent import SearchAgent
+from .local_search_agent import LocalSearchAgent
 from .interface_agent import InterfaceAgent
 from .recipe_agent import RecipeAgent
+from .recipe_prefetcher import RecipePrefetcher
 from .cooking_agent import CookingGraphAgent, AgentState
-__all__ = ["LLM_Agent", "SearchAgent", "InterfaceAgent", "RecipeAgent", "CookingGraphAgent", "AgentState"]
\ No newline at end of file
+from .session_memory import SessionMemoryStore
+from .summary_memory import SummaryBufferMemory
+__all__ = ["LLM_Agent", "DishNameMatcher", "SearchAgent", "LocalSearchAgent", "InterfaceAgent", "RecipeAgent", "RecipePrefetcher", "CookingGraphAgent", "AgentState", "SessionMemoryStore", "SummaryBufferMemory"]
\ No newline at end of file
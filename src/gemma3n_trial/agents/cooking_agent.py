@@ -1,10 +1,20 @@
-from typing import List
+from typing import Any, AsyncIterator, Callable, Iterator, List, Optional
 from pydantic import BaseModel
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langchain_core.language_models import BaseChatModel
 from langchain_groq import ChatGroq
 from langchain.memory import ConversationBufferWindowMemory
 from langchain_core.runnables import RunnableSerializable
 from gemma3n_trial.schema import DetailedRecipe
+from gemma3n_trial.utils import RecipeContextBuilder, RecipeRetriever
+from gemma3n_trial.utils.metrics import llm_config
+from gemma3n_trial.agents.session_memory import DEFAULT_SESSION, Session, SessionMemoryStore
+from gemma3n_trial.agents.summary_memory import SummaryBufferMemory
+
+MEMORY_MODES = ("window", "summary")
+
+
+FALLBACK_RESPONSE = "🤖 Sorry, I couldn't process that right now."
 
 
 class AgentState(BaseModel):
@@ -13,6 +23,7 @@ class AgentState(BaseModel):
     response: str = ""
 
 
+# Full, unfiltered rendering; prompts use RecipeContextBuilder instead
 def format_recipe(recipe: DetailedRecipe) -> str:
     return (
         f"Title: {recipe.title}\n"
@@ -25,14 +36,60 @@ def format_recipe(recipe: DetailedRecipe) -> str:
 
 
 class CookingGraphAgent:
-    def __init__(self, api_key: str, model_name: str = "llama3-8b-8192"):
-        self.llm = ChatGroq(
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        model_name: str = "llama3-8b-8192",
+        llm: Optional[BaseChatModel] = None,
+        context_builder: Optional[RecipeContextBuilder] = None,
+        retriever: Optional[RecipeRetriever] = None,
+        memory_factory: Optional[Callable[[], Any]] = None,
+        memory_mode: str = "window",
+        memory_max_tokens: int = 600,
+        max_sessions: int = 1000,
+        session_ttl: Optional[float] = 1800.0,
+    ):
+        # Pass `llm` to share one chat model (and its connection pool) between agents
+        self.llm = llm or ChatGroq(
             api_key=api_key,
             model=model_name,
             temperature=0.5,
         )
+        # HTML-free, budgeted recipe text, formatted once per recipe id
+        self.context_builder = context_builder or RecipeContextBuilder(max_tokens=1200)
+        # Long recipes: only the steps/ingredients relevant to the question
+        self.retriever = retriever or RecipeRetriever(fallback=self.context_builder)
 
-        self.memory = ConversationBufferWindowMemory(
+        # "window": last 2 turns verbatim; "summary": recent turns up to
+        # `memory_max_tokens`, older ones folded into a running summary
+        if memory_mode not in MEMORY_MODES:
+            raise ValueError(f"memory_mode must be one of {MEMORY_MODES}, got {memory_mode!r}")
+        self.memory_mode = memory_mode
+        self.memory_max_tokens = memory_max_tokens
+        if memory_factory is None:
+            memory_factory = self._window_memory if memory_mode == "window" else self._summary_memory
+
+        # One memory per conversation, so a single agent can serve many users
+        self.sessions = SessionMemoryStore(
+            memory_factory,
+            max_sessions=max_sessions,
+            idle_ttl=session_ttl,
+        )
+
+        # The recipe sits in the system message so every turn on a recipe shares
+        # one prompt prefix (reused via prefix/KV caching where the model has it)
+        self.prompt = ChatPromptTemplate.from_messages([
+            ("system", "You are a helpful cooking assistant. Answer user questions about the given recipe.\n\n"
+                       "Here is the recipe:\n{recipe}"),
+            MessagesPlaceholder(variable_name="chat_history"),
+            ("user", "{input}")
+        ])
+
+        self.chain: RunnableSerializable = self.prompt | self.llm
+
+    @staticmethod
+    def _window_memory() -> ConversationBufferWindowMemory:
+        return ConversationBufferWindowMemory(
             memory_key="chat_history",
             return_messages=True,
             input_key="input",
@@ -40,41 +97,41 @@ class CookingGraphAgent:
             k=2  # Keep last 2 interactions
         )
 
-        self.prompt = ChatPromptTemplate.from_messages([
-            ("system", "You are a helpful cooking assistant. Answer user questions about the given recipe."),
-            MessagesPlaceholder(variable_name="chat_history"),
-            ("user", "Here is the recipe:\n{recipe}\n\n{input}")
-        ])
+    def _summary_memory(self) -> SummaryBufferMemory:
+        return SummaryBufferMemory(self.llm, max_tokens=self.memory_max_tokens)
 
-        self.chain: RunnableSerializable = self.prompt | self.llm
+    # Single-conversation callers keep using `agent.memory`
+    @property
+    def memory(self):
+        return self.sessions.get(DEFAULT_SESSION).memory
+
+    @memory.setter
+    def memory(self, memory) -> None:
+        self.sessions.set_memory(DEFAULT_SESSION, memory)
 
-    def invoke(self, state: AgentState) -> AgentState:
+    def _prepare(self, state: AgentState, session: Session) -> dict:
         user_input = state.user_input.strip()
 
         # Load memory context
-        memory_variables = self.memory.load_memory_variables({"input": user_input})
+        memory_variables = session.memory.load_memory_variables({"input": user_input})
         chat_history = memory_variables.get("chat_history", [])
 
         # Prepare input for the chain
-        prompt_input = {
-            "recipe": format_recipe(state.detailed_recipe),
+        if getattr(self.llm, "prefix_cache", None) is not None:
+            # Per-question retrieval would change the prefix every turn; with a
+            # cached prefix the full (budgeted) recipe costs nothing after turn one
+            recipe_text = self.context_builder.build(state.detailed_recipe)
+        else:
+            recipe_text = self.retriever.build(state.detailed_recipe, user_input)
+        return {
+            "recipe": recipe_text,
             "input": user_input,
             "chat_history": chat_history,
         }
 
-        # Invoke the LLM
-        try:
-            response = self.chain.invoke(prompt_input)
-            response_content = (
-                response.content.strip()
-                if hasattr(response, "content")
-                else str(response)
-            )
-        except Exception:
-            response_content = "🤖 Sorry, I couldn't process that right now."
-
+    def _finish(self, state: AgentState, session: Session, user_input: str, response_content: str) -> AgentState:
         # Save interaction to memory
-        self.memory.save_context(
+        session.memory.save_context(
             {"input": user_input},
             {"output": response_content}
         )
@@ -84,3 +141,93 @@ class CookingGraphAgent:
             user_input=user_input,
             response=response_content
         )
+
+    @staticmethod
+    def _content(response) -> str:
+        return (
+            response.content.strip()
+            if hasattr(response, "content")
+            else str(response)
+        )
+
+    @staticmethod
+    def _chunk_text(chunk) -> str:
+        return chunk.content if hasattr(chunk, "content") else str(chunk)
+
+    def invoke(self, state: AgentState, session_id: str = DEFAULT_SESSION) -> AgentState:
+        session = self.sessions.checkout(session_id)
+        try:
+            with session.lock:
+                prompt_input = self._prepare(state, session)
+
+                # Invoke the LLM
+                try:
+                    response_content = self._content(self.chain.invoke(prompt_input, config=llm_config()))
+                except Exception:
+                    response_content = FALLBACK_RESPONSE
+
+                return self._finish(state, session, prompt_input["input"], response_content)
+        finally:
+            self.sessions.checkin(session)
+
+    async def ainvoke(self, state: AgentState, session_id: str = DEFAULT_SESSION) -> AgentState:
+        session = self.sessions.checkout(session_id)
+        try:
+            async with session.lock:
+                prompt_input = self._prepare(state, session)
+
+                try:
+                    response_content = self._content(await self.chain.ainvoke(prompt_input, config=llm_config()))
+                except Exception:
+                    response_content = FALLBACK_RESPONSE
+
+                return self._finish(state, session, prompt_input["input"], response_content)
+        finally:
+            self.sessions.checkin(session)
+
+    def stream(self, state: AgentState, session_id: str = DEFAULT_SESSION) -> Iterator[str]:
+        """Yield the answer token by token; memory is updated once the stream ends."""
+        session = self.sessions.checkout(session_id)
+        parts: List[str] = []
+        try:
+            with session.lock:
+                prompt_input = self._prepare(state, session)
+                try:
+                    try:
+                        for chunk in self.chain.stream(prompt_input, config=llm_config()):
+                            text = self._chunk_text(chunk)
+                            if text:
+                                parts.append(text)
+                                yield text
+                    except Exception:
+                        # Keep a partial answer; only fall back if nothing came through
+                        if not parts:
+                            parts.append(FALLBACK_RESPONSE)
+                            yield FALLBACK_RESPONSE
+                finally:
+                    # Also runs if the consumer stops early, so memory keeps what was shown
+                    self._finish(state, session, prompt_input["input"], "".join(parts).strip())
+        finally:
+            self.sessions.checkin(session)
+
+    async def astream(self, state: AgentState, session_id: str = DEFAULT_SESSION) -> AsyncIterator[str]:
+        session = self.sessions.checkout(session_id)
+        parts: List[str] = []
+        try:
+            async with session.lock:
+                prompt_input = self._prepare(state, session)
+                try:
+                    try:
+                        async for chunk in self.chain.astream(prompt_input, config=llm_config()):
+                            text = self._chunk_text(chunk)
+                            if text:
+                                parts.append(text)
+                                yield text
+                    except Exception:
+                        if not parts:
+                            parts.append(FALLBACK_RESPONSE)
+                            yield FALLBACK_RESPONSE
+                finally:
+                    self._finish(state, session, prompt_input["input"], "".join(parts).strip())
+        finally:
+            self.sessions.checkin(session)
@@ -0,0 +1,114 @@
+import re
+import threading
+from typing import Iterable, Optional, Set, Tuple, Union
+from gemma3n_trial.schema import DishName, RecipeSearchResult, RecipeSearchResults
+from gemma3n_trial.utils import normalize_query
+
+# Query templates that wrap a dish name; the named group is the candidate.
+TEMPLATES = [
+    r"^(?:how (?:do (?:i|you)|can i|to|should i) )?(?:make|cook|prepare|bake)(?: an?| some| the)? (?P<dish>.+?)(?: at home)?$",
+    r"^(?:give me |show me |find me |i want |i need )?(?:an? |the |some )?(?:easy |simple |quick |good |best )?recipes? (?:for|of) (?:an? |the )?(?P<dish>.+)$",
+    r"^(?:give me |show me |find me |i want |i need )?(?:an? |the |some )?(?:easy |simple |quick |good |best )?(?P<dish>.+?) recipes?$",
+    r"^(?:i want to|i'd like to|let's|lets) (?:make|cook|eat|have) (?:an? |some |the )?(?P<dish>.+)$",
+    r"^what(?:'s| is) (?:a |the )?recipe (?:for|of) (?:an? |the )?(?P<dish>.+)$",
+]
+_TEMPLATES = [re.compile(t) for t in TEMPLATES]
+
+# Words that mean the query is more than a dish name; leave those to the LLM.
+_NON_DISH_WORDS = {
+    "what", "which", "why", "when", "where", "who", "ingredients", "ingredient",
+    "calories", "substitute", "instead", "without", "with", "for", "and", "or",
+    "is", "are", "can", "should", "do", "does", "i", "my", "me", "you", "it",
+    "tonight", "dinner", "lunch", "breakfast", "something", "anything", "vegan", "healthy",
+}
+
+MAX_DISH_WORDS = 5
+
+
+class DishNameMatcher:
+    """Deterministic dish-name extractor that runs in front of the LLM.
+
+    `match` returns a DishName only when it is confident: the candidate is a
+    known dish phrase (learned from search result titles via `learn`) or a
+    short, clean phrase pulled out of a known query template. Everything else
+    returns None and should go to the LLM.
+    """
+
+    def __init__(self, threshold: float = 0.75, vocabulary: Iterable[str] = ()):
+        self.threshold = threshold
+        self._titles: Set[str] = set()
+        self._phrases: Set[str] = set()
+        self._lock = threading.Lock()
+        self.served = 0
+        self.total = 0
+        for title in vocabulary:
+            self._add_title(title)
+
+    @staticmethod
+    def _normalize(text: str) -> str:
+        text = normalize_query(text).replace("’", "'")
+        return re.sub(r"[^a-z0-9' &-]", " ", text).strip()
+
+    def _add_title(self, title: str) -> None:
+        words = self._normalize(title).split()
+        if not words:
+            return
+        self._titles.add(" ".join(words))
+        # Every contiguous run of 2+ words in a title is a plausible dish phrase:
+        # "easy butter chicken curry" teaches "butter chicken".
+        for i in range(len(words)):
+            for j in range(i + 2, min(len(words), i + MAX_DISH_WORDS) + 1):
+                self._phrases.add(" ".join(words[i:j]))
+
+    def learn(self, results: Union[RecipeSearchResults, Iterable[RecipeSearchResult]]) -> None:
+        items = results.results if isinstance(results, RecipeSearchResults) else results
+        with self._lock:
+            for item in items:
+                self._add_title(item.title if isinstance(item, RecipeSearchResult) else item["title"])
+
+    def _score(self, candidate: str, templated: bool) -> float:
+        words = candidate.split()
+        if not words or len(words) > MAX_DISH_WORDS:
+            return 0.0
+        if candidate in self._titles:
+            return 1.0
+        if len(words) >= 2 and candidate in self._phrases:
+            return 0.9
+        if any(w in _NON_DISH_WORDS for w in words):
+            return 0.0
+        # Unknown phrase: trust it more if a template framed it as a dish
+        return 0.8 if templated else 0.6
+
+    def candidate(self, user_query: str) -> Tuple[Optional[str], float]:
+        query = self._normalize(user_query)
+        best, best_score = None, 0.0
+        for pattern in _TEMPLATES:
+            m = pattern.match(query)
+            if m:
+                dish = m.group("dish").strip()
+                score = self._score(dish, templated=True)
+                if score > best_score:
+                    best, best_score = dish, score
+        score = self._score(query, templated=False)
+        if score > best_score:
+            best, best_score = query, score
+        return best, best_score
+
+    def match(self, user_query: str) -> Optional[DishName]:
+        dish, score = self.candidate(user_query)
+        with self._lock:
+            self.total += 1
+            if dish is None or score < self.threshold:
+                return None
+            self.served += 1
+        # str.title() would turn "tso's" into "Tso'S"
+        return DishName(name=" ".join(w[:1].upper() + w[1:] for w in dish.split()))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "queries": self.total,
+                "served_without_llm": self.served,
+                "fraction_served": self.served / self.total if self.total else 0.0,
+                "vocabulary": len(self._titles),
+            }
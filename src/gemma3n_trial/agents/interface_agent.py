@@ -14,3 +14,7 @@ class InterfaceAgent(Runnable):
 
         selected = recipes[self.user_choice - 1]
         return {**state, "selected_recipe": selected}
+
+    async def ainvoke(self, state: CookingState, config=None) -> CookingState:
+        # Pure state transformation; nothing to await
+        return self.invoke(state, config)
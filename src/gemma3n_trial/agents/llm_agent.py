@@ -1,12 +1,40 @@
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import PydanticOutputParser
 from langchain_core.language_models import BaseChatModel
+from typing import List, Optional, Union
 from gemma3n_trial.schema import DishName
+from gemma3n_trial.utils import LRUCache, MicroBatcher, normalize_query
+from gemma3n_trial.utils.metrics import get_metrics, llm_config
+from gemma3n_trial.agents.dish_matcher import DishNameMatcher
 
 
 class LLM_Agent:
-    def __init__(self, llm: BaseChatModel):
+    def __init__(
+        self,
+        llm: BaseChatModel,
+        cache: Optional[LRUCache] = None,
+        matcher: Optional[DishNameMatcher] = None,
+        max_batch_size: int = 1,
+        max_wait_ms: float = 5.0,
+        max_concurrent_batches: int = 4,
+    ):
         self.llm = llm
+        self.cache = cache  # optional memo of normalized query -> DishName
+        self.matcher = matcher  # optional rule-based fast path before the LLM
+        # max_batch_size > 1: concurrent LLM calls are queued and sent as one
+        # chain.batch/abatch once the batch is full or max_wait_ms has passed
+        self.batcher = None
+        if max_batch_size > 1:
+            self.batcher = MicroBatcher(
+                self._run_batch,
+                self._arun_batch,
+                max_batch_size=max_batch_size,
+                max_wait_ms=max_wait_ms,
+                max_concurrent_batches=max_concurrent_batches,
+                name="dish-name-batch",
+            )
+        self.queries = 0
+        self.llm_calls = 0
         self.parser = PydanticOutputParser(pydantic_object=DishName)
 
         # Inject format instructions into prompt template
@@ -26,9 +54,59 @@ class LLM_Agent:
         # Compose full chain
         self.chain = self.prompt | self.llm | self.parser
 
+    def _fast_path(self, input: dict) -> Optional[DishName]:
+        self.queries += 1
+        if self.cache is not None:
+            hit = self.cache.get(normalize_query(input["user_query"]))
+            get_metrics().count("cache_requests_total", {"cache": "dish_name", "result": "miss" if hit is None else "hit"})
+            if hit is not None:
+                return DishName(**hit)
+        if self.matcher is not None:
+            match = self.matcher.match(input["user_query"])
+            get_metrics().count("cache_requests_total", {"cache": "dish_matcher", "result": "miss" if match is None else "hit"})
+            return match
+        return None
+
+    def _remember(self, input: dict, dish_name: DishName) -> DishName:
+        if self.cache is not None:
+            self.cache.set(normalize_query(input["user_query"]), dish_name.model_dump())
+        return dish_name
+
+    @staticmethod
+    def _batch_config(size: int) -> dict:
+        # Every prompt in the batch in flight at once (a local model decodes them together)
+        return {**(llm_config() or {}), "max_concurrency": size}
+
+    def _run_batch(self, inputs: List[dict]) -> List[Union[DishName, Exception]]:
+        return self.chain.batch(inputs, config=self._batch_config(len(inputs)), return_exceptions=True)
+
+    async def _arun_batch(self, inputs: List[dict]) -> List[Union[DishName, Exception]]:
+        return await self.chain.abatch(inputs, config=self._batch_config(len(inputs)), return_exceptions=True)
+
     def invoke(self, input: dict) -> DishName:
         # Example input: {"user_query": "How to make butter chicken?"}
-        return self.chain.invoke(input)
+        cached = self._fast_path(input)
+        if cached is not None:
+            return cached
+        self.llm_calls += 1
+        if self.batcher is not None:
+            return self._remember(input, self.batcher.submit(input))
+        return self._remember(input, self.chain.invoke(input, config=llm_config()))
 
     async def ainvoke(self, input: dict) -> DishName:
-        return await self.chain.ainvoke(input)
+        cached = self._fast_path(input)
+        if cached is not None:
+            return cached
+        self.llm_calls += 1
+        if self.batcher is not None:
+            return self._remember(input, await self.batcher.asubmit(input))
+        return self._remember(input, await self.chain.ainvoke(input, config=llm_config()))
+
+    def stats(self) -> dict:
+        served = self.queries - self.llm_calls
+        return {
+            "queries": self.queries,
+            "llm_calls": self.llm_calls,
+            "fraction_without_llm": served / self.queries if self.queries else 0.0,
+            **({"batching": self.batcher.stats()} if self.batcher is not None else {}),
+        }
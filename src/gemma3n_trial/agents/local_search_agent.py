@@ -0,0 +1,89 @@
+from typing import List, Optional, Tuple
+from gemma3n_trial.schema import DetailedRecipe, RecipeSearchResult, RecipeSearchResults
+from gemma3n_trial.agents.search_agent import SearchAgent
+from gemma3n_trial.utils.search_index import RecipeSearchIndex
+from gemma3n_trial.utils.metrics import get_metrics
+
+
+class LocalSearchAgent:
+    """SearchAgent-compatible search served from a local RecipeSearchIndex.
+
+    Repeated queries, and queries with at least `min_results` local matches
+    on every term, never leave the process. Anything else goes to `remote`
+    (complexSearch) and its results are indexed for next time. If the remote
+    call fails, whatever the index has is returned instead of the error.
+    """
+
+    def __init__(
+        self,
+        index: RecipeSearchIndex,
+        remote: Optional[SearchAgent] = None,
+        min_results: int = 5,
+        number: int = 10,
+    ):
+        self.index = index
+        self.remote = remote
+        self.min_results = min_results
+        self.number = number
+        self.local_hits = 0
+        self.remote_calls = 0
+
+    def _local(self, dish_name: str) -> Tuple[List[RecipeSearchResult], bool]:
+        """Local results, and whether they are good enough to skip complexSearch."""
+        known = self.index.known_query(dish_name)
+        if known:
+            get_metrics().count("cache_requests_total", {"cache": "local_search", "result": "hit"})
+            return known[:self.number], True
+        local = [result for result, _ in self.index.search(dish_name, limit=self.number)]
+        sufficient = known is not None or len(local) >= self.min_results
+        get_metrics().count("cache_requests_total", {"cache": "local_search", "result": "hit" if sufficient else "miss"})
+        return local, sufficient
+
+    def _remember(self, dish_name: str, results: RecipeSearchResults) -> None:
+        self.index.add_results(results, query=dish_name)
+        self.index.schedule_save()
+
+    def invoke(self, dish_name: str) -> RecipeSearchResults:
+        local, sufficient = self._local(dish_name)
+        if self.remote is None or sufficient:
+            self.local_hits += 1
+            return RecipeSearchResults(results=local)
+
+        self.remote_calls += 1
+        try:
+            results = self.remote.invoke(dish_name)
+        except Exception:
+            if local:
+                return RecipeSearchResults(results=local)
+            raise
+        self._remember(dish_name, results)
+        return results
+
+    async def ainvoke(self, dish_name: str) -> RecipeSearchResults:
+        local, sufficient = self._local(dish_name)
+        if self.remote is None or sufficient:
+            self.local_hits += 1
+            return RecipeSearchResults(results=local)
+
+        self.remote_calls += 1
+        try:
+            results = await self.remote.ainvoke(dish_name)
+        except Exception:
+            if local:
+                return RecipeSearchResults(results=local)
+            raise
+        self._remember(dish_name, results)
+        return results
+
+    def add_recipe(self, recipe: DetailedRecipe) -> None:
+        self.index.add_recipe(recipe)
+        self.index.schedule_save()
+
+    def stats(self) -> dict:
+        total = self.local_hits + self.remote_calls
+        return {
+            "documents": len(self.index),
+            "local_hits": self.local_hits,
+            "remote_calls": self.remote_calls,
+            "local_fraction": self.local_hits / total if total else 0.0,
+        }
@@ -1,42 +1,35 @@
+import asyncio
+from typing import Optional, List, Dict, Union
 import httpx
-from gemma3n_trial.schema import DetailedRecipe, CookingState, RecipeSearchResult
+from gemma3n_trial.schema import DetailedRecipe, DetailedRecipes, CookingState, RecipeSearchResult
+from gemma3n_trial.agents.spoonacular_agent import SpoonacularAgent
 
 
-class RecipeAgent:
-    def __init__(self, api_key: str):
-        self.api_key = api_key
-        self.endpoint = "https://api.spoonacular.com/recipes/{id}/information"
+class RecipeAgent(SpoonacularAgent):
+    def __init__(self, api_key: str, bulk_chunk_size: int = 50, **kwargs):
+        super().__init__(api_key, **kwargs)
+        self.endpoint = self.base_url + "/recipes/{id}/information"
+        self.bulk_endpoint = self.base_url + "/recipes/informationBulk"
+        self.bulk_chunk_size = bulk_chunk_size
 
-    def invoke(self, state: CookingState) -> CookingState:
-        # Handle both Pydantic model and dict for selected_recipe
-        selected_raw = state.get("selected_recipe")
-        if isinstance(selected_raw, RecipeSearchResult):
-            selected = selected_raw
-        else:
-            selected = RecipeSearchResult(**selected_raw)
-
-        url = self.endpoint.format(id=selected.id)
-        params = {"apiKey": self.api_key}
-
-        #print(f"Fetching recipe info for ID: {selected.id}")
-        #print(f"URL: {url}")
-
-        response = httpx.get(url, params=params)
-        #print(f"Response Status Code: {response.status_code}")
-
-        response.raise_for_status()
-        data = response.json()
+    @staticmethod
+    def _as_search_result(raw: Union[RecipeSearchResult, dict]) -> RecipeSearchResult:
+        # Handle both Pydantic model and dict
+        if isinstance(raw, RecipeSearchResult):
+            return raw
+        return RecipeSearchResult(**raw)
 
-        #print("Response JSON keys:", list(data.keys()))
-        #print("Sample title:", data.get("title"))
+    def _selected(self, state: CookingState) -> RecipeSearchResult:
+        return self._as_search_result(state.get("selected_recipe"))
 
+    @staticmethod
+    def _to_detailed_recipe(data: dict) -> Optional[DetailedRecipe]:
         if "title" not in data or "id" not in data:
-            print("⚠️ Incomplete data received. Skipping...")
-            return state
+            return None
 
         ingredients = [item["original"] for item in data.get("extendedIngredients", [])]
 
-        detailed_recipe = DetailedRecipe(
+        return DetailedRecipe(
             id=data["id"],
             title=data["title"],
             summary=data.get("summary"),
@@ -46,6 +39,15 @@ class RecipeAgent:
             ingredients=ingredients
         )
 
+    def _build_state(self, state: CookingState, data: dict) -> CookingState:
+        #print("Response JSON keys:", list(data.keys()))
+        #print("Sample title:", data.get("title"))
+
+        detailed_recipe = self._to_detailed_recipe(data)
+        if detailed_recipe is None:
+            print("⚠️ Incomplete data received. Skipping...")
+            return state
+
         # Convert the detailed_recipe to a dict for LangGraph compatibility
         new_state: CookingState = {
             **state,
@@ -54,3 +56,103 @@ class RecipeAgent:
 
         #print("Returning state with keys:", list(new_state.keys()))
         return new_state
+
+    def invoke(self, state: CookingState) -> CookingState:
+        selected = self._selected(state)
+        url = self.endpoint.format(id=selected.id)
+
+        #print(f"Fetching recipe info for ID: {selected.id}")
+        #print(f"URL: {url}")
+
+        data = self._get_json("information", url, cache_params={"id": selected.id})
+        return self._build_state(state, data)
+
+    async def ainvoke(self, state: CookingState) -> CookingState:
+        selected = self._selected(state)
+        url = self.endpoint.format(id=selected.id)
+        data = await self._aget_json("information", url, cache_params={"id": selected.id})
+        return self._build_state(state, data)
+
+    # ---- Bulk mode: one informationBulk round-trip per chunk of ids ----
+
+    @classmethod
+    def _unique_ids(cls, recipes: List[Union[RecipeSearchResult, dict]]) -> List[int]:
+        ids: List[int] = []
+        for recipe in recipes:
+            recipe_id = cls._as_search_result(recipe).id
+            if recipe_id not in ids:
+                ids.append(recipe_id)
+        return ids
+
+    def _from_cache(self, ids: List[int], found: Dict[int, DetailedRecipe]) -> List[int]:
+        # Serve what we can from the per-id "information" entries; return the misses
+        missing = []
+        for recipe_id in ids:
+            data = self._lookup("information", {"id": recipe_id})
+            detailed_recipe = self._to_detailed_recipe(data) if data is not None else None
+            if detailed_recipe is None:
+                missing.append(recipe_id)
+            else:
+                found[recipe_id] = detailed_recipe
+        return missing
+
+    def _chunks(self, ids: List[int]) -> List[List[int]]:
+        size = max(1, self.bulk_chunk_size)
+        return [ids[i:i + size] for i in range(0, len(ids), size)]
+
+    @staticmethod
+    def _bulk_params(chunk: List[int]) -> dict:
+        return {"ids": ",".join(str(recipe_id) for recipe_id in chunk)}
+
+    def _parse_chunk(self, chunk: List[int], payload: list, found: Dict[int, DetailedRecipe], failed: Dict[int, str]):
+        returned = {item.get("id"): item for item in payload if isinstance(item, dict)}
+        for recipe_id in chunk:
+            data = returned.get(recipe_id)
+            if data is None:
+                failed[recipe_id] = "not returned by informationBulk"
+                continue
+            detailed_recipe = self._to_detailed_recipe(data)
+            if detailed_recipe is None:
+                failed[recipe_id] = "incomplete data"
+            else:
+                found[recipe_id] = detailed_recipe
+                # Cache under the same key a single-recipe fetch would use
+                self._store("information", {"id": recipe_id}, data)
+
+    @staticmethod
+    def _collect(ids: List[int], found: Dict[int, DetailedRecipe], failed: Dict[int, str]) -> DetailedRecipes:
+        # Keep the caller's (search ranking) order
+        ordered = [found[recipe_id] for recipe_id in ids if recipe_id in found]
+        return DetailedRecipes(recipes=ordered, failed=failed)
+
+    def invoke_bulk(self, recipes: List[Union[RecipeSearchResult, dict]]) -> DetailedRecipes:
+        ids = self._unique_ids(recipes)
+        found: Dict[int, DetailedRecipe] = {}
+        failed: Dict[int, str] = {}
+
+        for chunk in self._chunks(self._from_cache(ids, found)):
+            # A failed chunk only fails its own ids; the others still come back
+            try:
+                payload = self._get_json("informationBulk", self.bulk_endpoint, self._bulk_params(chunk))
+            except (httpx.HTTPError, ValueError) as e:
+                failed.update({recipe_id: str(e) for recipe_id in chunk})
+                continue
+            self._parse_chunk(chunk, payload, found, failed)
+
+        return self._collect(ids, found, failed)
+
+    async def ainvoke_bulk(self, recipes: List[Union[RecipeSearchResult, dict]]) -> DetailedRecipes:
+        ids = self._unique_ids(recipes)
+        found: Dict[int, DetailedRecipe] = {}
+        failed: Dict[int, str] = {}
+
+        async def fetch(chunk: List[int]):
+            try:
+                payload = await self._aget_json("informationBulk", self.bulk_endpoint, self._bulk_params(chunk))
+            except (httpx.HTTPError, ValueError) as e:
+                failed.update({recipe_id: str(e) for recipe_id in chunk})
+                return
+            self._parse_chunk(chunk, payload, found, failed)
+
+        await asyncio.gather(*(fetch(chunk) for chunk in self._chunks(self._from_cache(ids, found))))
+        return self._collect(ids, found, failed)
@@ -0,0 +1,212 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Union
+from gemma3n_trial.schema import DetailedRecipe, RecipeSearchResult
+from gemma3n_trial.agents.recipe_agent import RecipeAgent
+from gemma3n_trial.agents.session_memory import SessionMemoryStore
+from gemma3n_trial.utils.metrics import get_metrics
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _default_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="recipe-prefetch")
+        return _executor
+
+
+def bulk_cost(n: int) -> float:
+    """Spoonacular points for informationBulk: 1 for the first recipe, 0.5 per additional one."""
+    return 1 + 0.5 * (n - 1) if n > 0 else 0.0
+
+
+class _Prefetch:
+    def __init__(self):
+        self.ids: List[int] = []
+        self.recipes: Dict[int, DetailedRecipe] = {}
+        self.future: Optional[Future] = None
+        self.started = threading.Event()
+        self.cost = 0.0
+        self.cancelled = False
+
+
+class RecipePrefetcher:
+    """Fetch details for the top search results while the user is still choosing.
+
+    `start(session_id, recipes)` queues one informationBulk call for the
+    first `top_n` results on a background thread. `get` / `aget` return the
+    prefetched DetailedRecipe for the chosen id, waiting for the call if it
+    is in flight, or None so the caller fetches it as before. A prefetch
+    still queued behind other sessions' after `start_grace` seconds is
+    cancelled rather than waited for: a direct fetch of one recipe is faster.
+
+    Prefetching spends API points on recipes nobody may open, so it is
+    capped: at most `budget_points` per `budget_window` seconds, and none at
+    all once Spoonacular reports fewer than `min_quota_left` points left.
+    A new search in the same session cancels the previous prefetch. With
+    `top_n=0` every call is a no-op.
+    """
+
+    def __init__(
+        self,
+        recipe_agent: RecipeAgent,
+        top_n: int = 3,
+        budget_points: float = 50.0,
+        budget_window: float = 24 * 3600.0,
+        min_quota_left: float = 50.0,
+        max_sessions: int = 1000,
+        session_ttl: Optional[float] = 1800.0,
+        executor: Optional[ThreadPoolExecutor] = None,
+        clock: Callable[[], float] = time.monotonic,
+        start_grace: float = 0.05,
+    ):
+        self.recipe_agent = recipe_agent
+        self.top_n = top_n
+        self.budget_points = budget_points
+        self.budget_window = budget_window
+        self.min_quota_left = min_quota_left
+        self.executor = executor or _default_executor()
+        self.clock = clock
+        self.start_grace = start_grace
+        self.sessions = SessionMemoryStore(_Prefetch, max_sessions=max_sessions, idle_ttl=session_ttl)
+
+        self.points_spent = 0.0
+        self._window_start = clock()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.skipped = 0  # Prefetches trimmed or dropped by the budget
+
+    def _affordable(self, wanted: int) -> int:
+        """How many of `wanted` recipes the budget allows; reserves their points."""
+        quota_left = self.recipe_agent.resilience.limiter.quota_left
+        if quota_left is not None and quota_left < self.min_quota_left:
+            return 0
+        with self._lock:
+            now = self.clock()
+            if now - self._window_start >= self.budget_window:
+                self._window_start, self.points_spent = now, 0.0
+            n = wanted
+            while n and self.points_spent + bulk_cost(n) > self.budget_points:
+                n -= 1
+            self.points_spent += bulk_cost(n)
+        return n
+
+    def _refund(self, prefetch: _Prefetch) -> None:
+        with self._lock:
+            self.points_spent = max(0.0, self.points_spent - prefetch.cost)
+        prefetch.cost = 0.0
+
+    def start(self, session_id: str, recipes: List[Union[RecipeSearchResult, dict]]) -> bool:
+        """Begin prefetching this session's top results; False if nothing was queued."""
+        self.cancel(session_id)
+        ids = RecipeAgent._unique_ids(recipes)[:max(self.top_n, 0)]
+        if not ids:
+            return False
+        affordable = self._affordable(len(ids))
+        if affordable < len(ids):
+            self.skipped += 1
+        if not affordable:
+            return False
+
+        prefetch = _Prefetch()
+        prefetch.ids = ids[:affordable]
+        prefetch.cost = bulk_cost(affordable)
+        self.sessions.set_memory(session_id, prefetch)
+        prefetch.future = self.executor.submit(self._run, prefetch)
+        return True
+
+    def _run(self, prefetch: _Prefetch) -> None:
+        prefetch.started.set()
+        if prefetch.cancelled:
+            return
+        fetched = self.recipe_agent.invoke_bulk([{"id": i, "title": ""} for i in prefetch.ids])
+        if not prefetch.cancelled:
+            prefetch.recipes = {recipe.id: recipe for recipe in fetched.recipes}
+
+    def cancel(self, session_id: str) -> None:
+        """Stop this session's prefetch: queued work is dropped, an in-flight result discarded."""
+        if session_id not in self.sessions:
+            return
+        prefetch = self.sessions.get(session_id).memory
+        prefetch.cancelled = True
+        if prefetch.future is not None and prefetch.future.cancel():
+            self._refund(prefetch)  # Never ran: no points spent
+        self.sessions.drop(session_id)
+
+    def _unqueue(self, prefetch: _Prefetch) -> bool:
+        """Cancel a prefetch that has not started; True if it will never run."""
+        if prefetch.started.is_set() or not prefetch.future.cancel():
+            return False
+        prefetch.cancelled = True
+        self._refund(prefetch)
+        return True
+
+    def _pending(self, session_id: str, recipe_id: int) -> Optional[_Prefetch]:
+        if session_id not in self.sessions:
+            return None
+        prefetch = self.sessions.get(session_id).memory
+        if prefetch.cancelled or recipe_id not in prefetch.ids:
+            return None
+        return prefetch
+
+    def _result(self, prefetch: Optional[_Prefetch], recipe_id: int) -> Optional[DetailedRecipe]:
+        recipe = prefetch.recipes.get(recipe_id) if prefetch is not None else None
+        if recipe is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        get_metrics().count("cache_requests_total", {"cache": "prefetch", "result": "miss" if recipe is None else "hit"})
+        return recipe
+
+    def get(self, session_id: str, recipe_id: int, timeout: Optional[float] = None) -> Optional[DetailedRecipe]:
+        if self.top_n <= 0:
+            return None
+        prefetch = self._pending(session_id, recipe_id)
+        if prefetch is not None and prefetch.future is not None:
+            prefetch.started.wait(self.start_grace)
+            if self._unqueue(prefetch):
+                prefetch = None
+        if prefetch is not None and prefetch.future is not None:
+            try:
+                # Already on its way: waiting beats starting a second request
+                prefetch.future.result(timeout)
+            except Exception:
+                prefetch = None
+        return self._result(prefetch, recipe_id)
+
+    async def aget(self, session_id: str, recipe_id: int, timeout: Optional[float] = None) -> Optional[DetailedRecipe]:
+        if self.top_n <= 0:
+            return None
+        prefetch = self._pending(session_id, recipe_id)
+        if prefetch is not None and prefetch.future is not None:
+            deadline = time.monotonic() + self.start_grace
+            while not prefetch.started.is_set() and time.monotonic() < deadline:
+                await asyncio.sleep(0.005)
+            if self._unqueue(prefetch):
+                prefetch = None
+        if prefetch is not None and prefetch.future is not None:
+            try:
+                await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(prefetch.future)), timeout)
+            except asyncio.CancelledError:
+                if not prefetch.future.cancelled():
+                    raise  # Our caller was cancelled, not the prefetch
+                prefetch = None
+            except Exception:
+                prefetch = None
+        return self._result(prefetch, recipe_id)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "points_spent": self.points_spent,
+            "skipped": self.skipped,
+        }
@@ -1,21 +1,24 @@
-import httpx
 from gemma3n_trial.schema import RecipeSearchResults
+from gemma3n_trial.agents.spoonacular_agent import SpoonacularAgent
 
 
-class SearchAgent:
-    def __init__(self, api_key: str):
-        self.api_key = api_key
-        self.endpoint = "https://api.spoonacular.com/recipes/complexSearch"
+class SearchAgent(SpoonacularAgent):
+    def __init__(self, api_key: str, **kwargs):
+        super().__init__(api_key, **kwargs)
+        self.endpoint = f"{self.base_url}/recipes/complexSearch"
 
-    def invoke(self, dish_name: str) -> RecipeSearchResults:
-        params = {
+    def _params(self, dish_name: str) -> dict:
+        return {
             "query": dish_name,
             "number": 10,
-            "apiKey": self.api_key,
         }
 
-        response = httpx.get(self.endpoint, params=params)
-        response.raise_for_status()
-        data = response.json()
+    def invoke(self, dish_name: str) -> RecipeSearchResults:
+        params = self._params(dish_name)
+        data = self._get_json("complexSearch", self.endpoint, params, cache_params=params)
+        return RecipeSearchResults(results=data.get("results", []))
 
+    async def ainvoke(self, dish_name: str) -> RecipeSearchResults:
+        params = self._params(dish_name)
+        data = await self._aget_json("complexSearch", self.endpoint, params, cache_params=params)
         return RecipeSearchResults(results=data.get("results", []))
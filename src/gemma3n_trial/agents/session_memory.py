@@ -0,0 +1,121 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+
+DEFAULT_SESSION = "default"
+
+
+class TurnLock:
+    """One lock for sync and async turns: `with lock` in threads, `async with lock` on event loops.
+
+    An asyncio.Lock is bound to one loop and does not exclude threads, so a
+    session used from both (Streamlit threads, the async service) would run
+    two turns at once. Async waiters poll instead of blocking the loop.
+    """
+
+    POLL_INTERVAL = 0.005
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "TurnLock":
+        self._lock.acquire()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._lock.release()
+
+    async def __aenter__(self) -> "TurnLock":
+        while not self._lock.acquire(blocking=False):
+            await asyncio.sleep(self.POLL_INTERVAL)
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        self._lock.release()
+
+    def locked(self) -> bool:
+        return self._lock.locked()
+
+
+class Session:
+    def __init__(self, session_id: str, memory: Any):
+        self.id = session_id
+        self.memory = memory
+        self.lock = TurnLock()
+        self.last_used = time.monotonic()
+        self.active = 0  # in-flight turns; such sessions are never evicted
+
+
+class SessionMemoryStore:
+    """Bounded, thread-safe map of session id -> conversation memory.
+
+    Sessions idle for longer than `idle_ttl` seconds are evicted, and beyond
+    `max_sessions` the least recently used idle session goes first. Each
+    session carries its own lock so concurrent turns of one conversation
+    serialize while different conversations run in parallel.
+    """
+
+    def __init__(
+        self,
+        memory_factory: Callable[[], Any],
+        max_sessions: int = 1000,
+        idle_ttl: Optional[float] = 1800.0,
+    ):
+        self.memory_factory = memory_factory
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _evict(self, now: float) -> None:
+        # The dict is in LRU order (the session being fetched is last), so
+        # only its head can be over the TTL or the size limit
+        for _ in range(len(self._sessions) - 1):
+            session = next(iter(self._sessions.values()))
+            expired = self.idle_ttl is not None and now - session.last_used > self.idle_ttl
+            if not expired and len(self._sessions) <= self.max_sessions:
+                break
+            if session.active:
+                # Mid-turn sessions are in use: treat them as just used
+                self._sessions.move_to_end(session.id)
+            else:
+                del self._sessions[session.id]
+
+    def get(self, session_id: str = DEFAULT_SESSION, checkout: bool = False) -> Session:
+        now = time.monotonic()
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = self._sessions[session_id] = Session(session_id, self.memory_factory())
+            session.last_used = now
+            if checkout:
+                session.active += 1
+            self._sessions.move_to_end(session_id)
+            self._evict(now)
+        return session
+
+    def checkout(self, session_id: str = DEFAULT_SESSION) -> Session:
+        """Get a session and pin it against eviction until `checkin`."""
+        return self.get(session_id, checkout=True)
+
+    def checkin(self, session: Session) -> None:
+        with self._lock:
+            session.active -= 1
+            session.last_used = time.monotonic()
+            if self._sessions.get(session.id) is session:
+                self._sessions.move_to_end(session.id)
+
+    def set_memory(self, session_id: str, memory: Any) -> None:
+        self.get(session_id).memory = memory
+
+    def drop(self, session_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._sessions
+
+    def __len__(self) -> int:
+        return len(self._sessions)
@@ -0,0 +1,102 @@
+from typing import Any, Optional
+import httpx
+from gemma3n_trial.utils import SPOONACULAR_BASE_URL, get_http_client, get_async_http_client
+from gemma3n_trial.utils.response_cache import ResponseCache
+from gemma3n_trial.utils.metrics import get_metrics
+from gemma3n_trial.utils.resilience import Resilience, get_resilience
+from gemma3n_trial.utils.singleflight import SingleFlight
+
+
+class SpoonacularAgent:
+    """Shared HTTP plumbing for the agents that talk to Spoonacular."""
+
+    def __init__(
+        self,
+        api_key: str,
+        client: Optional[httpx.Client] = None,
+        base_url: str = SPOONACULAR_BASE_URL,
+        async_client: Optional[httpx.AsyncClient] = None,
+        cache: Optional[ResponseCache] = None,
+        resilience: Optional[Resilience] = None,
+        coalesce: bool = True,
+    ):
+        self.api_key = api_key
+        # None -> shared process-wide pooled clients
+        self.client = client
+        self.async_client = async_client
+        self.base_url = base_url
+        self.cache = cache
+        # None -> the process-wide retry/breaker/rate limiter, shared like the quota
+        self._resilience = resilience
+        # Identical requests in flight at the same time share one upstream call
+        self.inflight = SingleFlight() if coalesce else None
+
+    @property
+    def resilience(self) -> Resilience:
+        return self._resilience or get_resilience()
+
+    def _lookup(self, endpoint: str, cache_params: Optional[dict]) -> Optional[Any]:
+        if self.cache is None or cache_params is None:
+            return None
+        cached = self.cache.get(endpoint, cache_params)
+        get_metrics().count("cache_requests_total", {"cache": "spoonacular", "endpoint": endpoint, "result": "miss" if cached is None else "hit"})
+        return cached
+
+    def _store(self, endpoint: str, cache_params: Optional[dict], data: Any) -> None:
+        if self.cache is not None and cache_params is not None:
+            self.cache.set(endpoint, cache_params, data)
+
+    @staticmethod
+    def _flight_key(url: str, params: Optional[dict]) -> tuple:
+        return url, tuple(sorted((params or {}).items()))
+
+    def _get_json(self, endpoint: str, url: str, params: Optional[dict] = None, cache_params: Optional[dict] = None) -> Any:
+        # `endpoint` names the call for caching; pass cache_params to make it cacheable
+        cached = self._lookup(endpoint, cache_params)
+        if cached is not None:
+            return cached
+
+        def fetch() -> Any:
+            client = self.client or get_http_client()
+
+            def send() -> httpx.Response:
+                with get_metrics().timed("spoonacular_request_seconds", f"GET {endpoint}", endpoint=endpoint) as timer:
+                    response = client.get(url, params={**(params or {}), "apiKey": self.api_key})
+                    timer.status = str(response.status_code)
+                return response
+
+            response = self.resilience.call(send)
+            response.raise_for_status()
+            data = response.json()
+
+            self._store(endpoint, cache_params, data)
+            return data
+
+        if self.inflight is None:
+            return fetch()
+        return self.inflight.do(self._flight_key(url, params), fetch)
+
+    async def _aget_json(self, endpoint: str, url: str, params: Optional[dict] = None, cache_params: Optional[dict] = None) -> Any:
+        cached = self._lookup(endpoint, cache_params)
+        if cached is not None:
+            return cached
+
+        async def fetch() -> Any:
+            client = self.async_client or get_async_http_client()
+
+            async def send() -> httpx.Response:
+                with get_metrics().timed("spoonacular_request_seconds", f"GET {endpoint}", endpoint=endpoint) as timer:
+                    response = await client.get(url, params={**(params or {}), "apiKey": self.api_key})
+                    timer.status = str(response.status_code)
+                return response
+
+            response = await self.resilience.acall(send)
+            response.raise_for_status()
+            data = response.json()
+
+            self._store(endpoint, cache_params, data)
+            return data
+
+        if self.inflight is None:
+            return await fetch()
+        return await self.inflight.do_async(self._flight_key(url, params), fetch)
@@ -0,0 +1,124 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+from langchain_core.prompts import ChatPromptTemplate
+from gemma3n_trial.utils import count_tokens, truncate_to_tokens
+from gemma3n_trial.utils.metrics import llm_config
+from gemma3n_trial.utils.tokens import TokenCounter
+
+SUMMARY_PROMPT = ChatPromptTemplate.from_messages([
+    ("system",
+     "Progressively summarize a conversation between a user and a cooking assistant. "
+     "Extend the current summary with the new lines, keeping facts the user may refer back to "
+     "(substitutions, quantities, preferences). Reply with the new summary only, in a few sentences."),
+    ("user", "Current summary:\n{summary}\n\nNew lines:\n{new_lines}"),
+])
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _default_executor() -> ThreadPoolExecutor:
+    # Shared by all memories; summaries are short, infrequent LLM calls
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="memory-summary")
+        return _executor
+
+
+class SummaryBufferMemory:
+    """Recent turns verbatim up to `max_tokens`, older turns folded into a summary.
+
+    Turns pushed out of the buffer are summarized in the background, so
+    `save_context` never waits on the LLM. Until a refresh lands, those turns
+    are still returned verbatim and nothing is lost. Drop-in for the
+    `load_memory_variables` / `save_context` interface of LangChain memories.
+    """
+
+    def __init__(
+        self,
+        llm: BaseChatModel,
+        max_tokens: int = 600,
+        summary_max_tokens: int = 200,
+        token_counter: TokenCounter = count_tokens,
+        memory_key: str = "chat_history",
+        executor: Optional[ThreadPoolExecutor] = None,
+    ):
+        self.chain = SUMMARY_PROMPT | llm
+        self.max_tokens = max_tokens
+        self.summary_max_tokens = summary_max_tokens
+        self.token_counter = token_counter
+        self.memory_key = memory_key
+        self.executor = executor or _default_executor()
+
+        self.summary = ""
+        self._recent: List[BaseMessage] = []
+        self._pending: List[BaseMessage] = []  # Pruned, not yet in the summary
+        self._lock = threading.Lock()
+        self._future: Optional[Future] = None
+        self.refreshes = 0
+
+    def _tokens(self, messages: List[BaseMessage]) -> int:
+        return sum(self.token_counter(m.content) for m in messages)
+
+    @property
+    def messages(self) -> List[BaseMessage]:
+        with self._lock:
+            history = list(self._pending) + list(self._recent)
+            if self.summary:
+                history.insert(0, SystemMessage(content=f"Summary of the earlier conversation: {self.summary}"))
+        return history
+
+    def load_memory_variables(self, inputs: Dict[str, Any]) -> Dict[str, List[BaseMessage]]:
+        return {self.memory_key: self.messages}
+
+    def save_context(self, inputs: Dict[str, Any], outputs: Dict[str, Any]) -> None:
+        with self._lock:
+            self._recent.append(HumanMessage(content=str(inputs.get("input", ""))))
+            self._recent.append(AIMessage(content=str(outputs.get("output", ""))))
+            # Evict whole turns (user + assistant) from the front, always keeping the latest one
+            while len(self._recent) > 2 and self._tokens(self._recent) > self.max_tokens:
+                self._pending.extend(self._recent[:2])
+                del self._recent[:2]
+            if self._pending and self._future is None:
+                self._future = self.executor.submit(self._refresh)
+
+    def _refresh(self) -> None:
+        while True:
+            with self._lock:
+                batch = list(self._pending)
+                summary = self.summary
+                if not batch:
+                    self._future = None
+                    return
+            new_lines = "\n".join(
+                f"{'User' if isinstance(m, HumanMessage) else 'Assistant'}: {m.content}" for m in batch
+            )
+            try:
+                response = self.chain.invoke({"summary": summary or "(none)", "new_lines": new_lines}, config=llm_config())
+                summary = truncate_to_tokens(
+                    str(getattr(response, "content", response)).strip(), self.summary_max_tokens, self.token_counter
+                )
+            except Exception:
+                # Summarizer unavailable: drop the old turns, like the window memory would
+                pass
+            with self._lock:
+                self.summary = summary
+                del self._pending[:len(batch)]
+                self.refreshes += 1
+
+    def wait(self, timeout: Optional[float] = None) -> None:
+        """Block until pending turns are folded into the summary."""
+        future = self._future
+        if future is not None:
+            future.result(timeout)
+
+    def clear(self) -> None:
+        self.wait()
+        with self._lock:
+            self.summary = ""
+            self._recent.clear()
+            self._pending.clear()
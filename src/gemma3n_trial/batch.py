@@ -0,0 +1,183 @@
+"""Batch mode: run extract -> search -> fetch for every query in a JSONL file.
+
+    python -m gemma3n_trial.batch queries.jsonl recipes.jsonl --concurrency 8
+
+Each input line is a JSON object with a query (see --query-field) and an
+optional id, or a bare JSON string. Results are appended to the output file
+as they finish; rerunning with the same output skips ids already done, so an
+interrupted batch resumes where it stopped. Failed queries are retried on
+resume, and the last line for an id wins.
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, TextIO, Tuple
+from gemma3n_trial.pipeline import PipelineAgents, PolicyChoice, default_agents
+from gemma3n_trial.schema import RecipeSearchResult
+
+ChoicePolicy = Callable[[str, List[RecipeSearchResult]], int]
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def choose_first(dish_name: str, recipes: List[RecipeSearchResult]) -> int:
+    return 1
+
+
+def choose_best_match(dish_name: str, recipes: List[RecipeSearchResult]) -> int:
+    """Title sharing the most words with the dish name; earliest wins ties."""
+    wanted = set(_WORD_RE.findall(dish_name.lower()))
+
+    def overlap(recipe: RecipeSearchResult) -> float:
+        words = set(_WORD_RE.findall(recipe.title.lower()))
+        return len(wanted & words) / len(wanted | words) if words else 0.0
+
+    scores = [overlap(r) for r in recipes]
+    return scores.index(max(scores)) + 1
+
+
+CHOICE_POLICIES: Dict[str, ChoicePolicy] = {
+    "first": choose_first,
+    "best_match": choose_best_match,
+}
+
+
+def read_queries(path: str, query_field: str = "query", id_field: str = "id") -> Iterator[Tuple[str, str]]:
+    """Yield (id, query) pairs; the line number is the id when none is given."""
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            item = json.loads(line)
+            if isinstance(item, str):
+                yield str(line_number), item
+                continue
+            query = item.get(query_field)
+            if not isinstance(query, str) or not query.strip():
+                raise ValueError(f"{path}:{line_number}: missing {query_field!r}")
+            yield str(item.get(id_field, line_number)), query
+
+
+def completed_ids(path: str) -> Set[str]:
+    """Ids with an "ok" or "no_results" line in a previous run's output."""
+    done: Set[str] = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # Torn last line from a crash
+            if record.get("status") == "error":
+                done.discard(record.get("id"))
+            else:
+                done.add(record.get("id"))
+    return done
+
+
+def _torn(path: str) -> bool:
+    with open(path, "rb") as f:
+        if f.seek(0, os.SEEK_END) == 0:
+            return False
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) != b"\n"
+
+
+def batch_graph(agents: PipelineAgents, policy: ChoicePolicy):
+    """The full pipeline, picking with `policy`; no prefetching, the pick is immediate."""
+    return agents.graph(mode="async", chooser=PolicyChoice(policy), prefetcher=None)
+
+
+async def process_query(app, query_id: str, query: str) -> Dict[str, Any]:
+    record: Dict[str, Any] = {"id": query_id, "query": query}
+    state: Dict[str, Any] = {}
+    try:
+        # Keep every intermediate state so a failed fetch still records the search
+        async for state in app.astream({"user_query": query}, stream_mode="values"):
+            pass
+    except Exception as e:
+        record["status"] = "error"
+        record["error"] = f"{type(e).__name__}: {e}"
+    recipes = state.get("recipes")
+    if recipes is not None:
+        record["dish_name"] = state["dish_name"]
+        record["recipes"] = [r.model_dump() for r in recipes]
+    if "status" in record:
+        return record
+    if not recipes:
+        record["status"] = "no_results"
+        return record
+
+    recipe_ids = [r.id for r in recipes]
+    record["choice"] = recipe_ids.index(state["selected_recipe"].id) + 1
+    record["recipe"] = state.get("detailed_recipe")
+    record["status"] = "ok" if record["recipe"] else "error"
+    if not record["recipe"]:
+        record["error"] = "incomplete recipe"
+    return record
+
+
+async def run_batch(
+    agents: PipelineAgents,
+    input_path: str,
+    output_path: str,
+    concurrency: int = 8,
+    policy: ChoicePolicy = choose_best_match,
+    query_field: str = "query",
+    id_field: str = "id",
+) -> Dict[str, int]:
+    done = completed_ids(output_path)
+    pending = ((i, q) for i, q in read_queries(input_path, query_field, id_field) if i not in done)
+    stats = {"skipped": len(done), "ok": 0, "no_results": 0, "error": 0}
+    app = batch_graph(agents, policy)
+
+    def write(out: TextIO, record: Dict[str, Any]) -> None:
+        # One complete line per record, flushed, so a crash loses at most the line in flight
+        out.write(json.dumps(record) + "\n")
+        out.flush()
+        stats[record["status"]] += 1
+
+    # A fixed pool of workers pulling from the lazy input keeps memory flat for huge files
+    async def worker(out: TextIO) -> None:
+        for query_id, query in pending:
+            write(out, await process_query(app, query_id, query))
+
+    with open(output_path, "a", encoding="utf-8") as out:
+        if _torn(output_path):
+            # Don't glue the first new record onto a line cut short by a crash
+            out.write("\n")
+        await asyncio.gather(*(worker(out) for _ in range(max(1, concurrency))))
+    return stats
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Pre-compute recipes for a JSONL file of queries.")
+    parser.add_argument("input", help="JSONL file of queries")
+    parser.add_argument("output", help="JSONL file to append results to (also the resume checkpoint)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--choice", choices=sorted(CHOICE_POLICIES), default="best_match")
+    parser.add_argument("--query-field", default="query")
+    parser.add_argument("--id-field", default="id")
+    args = parser.parse_args(argv)
+
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    stats = asyncio.run(run_batch(
+        default_agents(),
+        args.input,
+        args.output,
+        concurrency=args.concurrency,
+        policy=CHOICE_POLICIES[args.choice],
+        query_field=args.query_field,
+        id_field=args.id_field,
+    ))
+    print(json.dumps(stats))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,23 @@
+from .choosers import Chooser, StateChoice, PolicyChoice, StdinChoice, InterruptChoice
+from .graph import PipelineState, build_pipeline, clear_pipeline_cache, NODES, FULL, SEARCH_ONLY, FETCH_ONLY
+from .checkpoints import BoundedMemorySaver
+from .agents import PipelineAgents, default_agents, default_cooking_agent, default_chat_model
+__all__ = [
+    "Chooser",
+    "StateChoice",
+    "PolicyChoice",
+    "StdinChoice",
+    "InterruptChoice",
+    "PipelineState",
+    "build_pipeline",
+    "clear_pipeline_cache",
+    "NODES",
+    "FULL",
+    "SEARCH_ONLY",
+    "FETCH_ONLY",
+    "BoundedMemorySaver",
+    "PipelineAgents",
+    "default_agents",
+    "default_cooking_agent",
+    "default_chat_model",
+]
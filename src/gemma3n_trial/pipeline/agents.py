@@ -0,0 +1,123 @@
+import functools
+import os
+from typing import Optional, Union
+from gemma3n_trial.agents import (
+    LLM_Agent, DishNameMatcher, SearchAgent, LocalSearchAgent, RecipeAgent, RecipePrefetcher, CookingGraphAgent,
+)
+from gemma3n_trial.utils import (
+    ResponseCache, LRUCache, DEFAULT_CACHE_PATH, RecipeSearchIndex, DEFAULT_INDEX_PATH, LocalChatModel, DEFAULT_LOCAL_MODEL,
+    PrefixKVCache,
+)
+from gemma3n_trial.pipeline.graph import build_pipeline
+
+MODEL_NAME = "llama3-8b-8192"
+LLM_BACKENDS = ("groq", "local")
+
+
+class PipelineAgents:
+    """The agents one pipeline runs on; `graph(...)` builds (or reuses) its compiled graph."""
+
+    def __init__(
+        self,
+        llm_agent: LLM_Agent,
+        search_agent: Union[LocalSearchAgent, SearchAgent],
+        recipe_agent: RecipeAgent,
+        dish_matcher: Optional[DishNameMatcher] = None,
+        prefetcher: Optional[RecipePrefetcher] = None,
+    ):
+        self.llm_agent = llm_agent
+        self.search_agent = search_agent
+        self.recipe_agent = recipe_agent
+        self.dish_matcher = dish_matcher
+        self.prefetcher = prefetcher
+
+    def graph(self, **kwargs):
+        """build_pipeline over these agents; kwargs as for build_pipeline."""
+        kwargs.setdefault("dish_matcher", self.dish_matcher)
+        kwargs.setdefault("prefetcher", self.prefetcher)
+        return build_pipeline(self.llm_agent, self.search_agent, self.recipe_agent, **kwargs)
+
+
+def _env_flag(name: str) -> bool:
+    return os.getenv(name, "").lower() in ("1", "true", "yes")
+
+
+def _batching() -> dict:
+    return {
+        "max_batch_size": int(os.getenv("LLM_BATCH_SIZE", "1")),
+        "max_wait_ms": float(os.getenv("LLM_BATCH_WAIT_MS", "5")),
+    }
+
+
+@functools.lru_cache(maxsize=None)
+def _local_prefix_cache():
+    megabytes = int(os.getenv("LOCAL_PREFIX_CACHE_MB", "512"))
+    return PrefixKVCache(max_bytes=megabytes * 2**20) if megabytes > 0 else None
+
+
+@functools.lru_cache(maxsize=None)
+def default_chat_model(temperature: Optional[float] = None):
+    """The chat model selected by LLM_BACKEND: "groq" (default) or "local".
+
+    Local runs LOCAL_MODEL_ID (a Gemma 3n checkpoint by default) on the CPU;
+    LOCAL_MODEL_INT8=1 quantizes it and LOCAL_MODEL_THREADS sets torch's
+    thread count. The weights are loaded once and shared by every caller, as
+    is the prompt-prefix KV cache (LOCAL_PREFIX_CACHE_MB, 0 disables it).
+    LLM_BATCH_SIZE > 1 decodes concurrent prompts together (see default_agents).
+    """
+    backend = os.getenv("LLM_BACKEND", "groq")
+    if backend not in LLM_BACKENDS:
+        raise ValueError(f"LLM_BACKEND must be one of {LLM_BACKENDS}, got {backend!r}")
+    if backend == "local":
+        threads = os.getenv("LOCAL_MODEL_THREADS")
+        return LocalChatModel(
+            model_id=os.getenv("LOCAL_MODEL_ID", DEFAULT_LOCAL_MODEL),
+            quantize=_env_flag("LOCAL_MODEL_INT8"),
+            num_threads=int(threads) if threads else None,
+            temperature=temperature or 0.0,
+            prefix_cache=_local_prefix_cache(),
+            **_batching(),
+        )
+    from langchain_groq import ChatGroq
+
+    options = {} if temperature is None else {"temperature": temperature}
+    return ChatGroq(api_key=os.getenv("GROQ_API_KEY"), model=MODEL_NAME, **options)
+
+
+@functools.lru_cache(maxsize=None)
+def default_agents() -> PipelineAgents:
+    """Production agents wired from the environment, built once per process.
+
+    LLM_BACKEND (see default_chat_model), GROQ_API_KEY / SPOONACULAR_API_KEY,
+    SPOONACULAR_CACHE_PATH (":memory:" for no disk cache), RECIPE_INDEX_PATH
+    (empty: in-memory index), RECIPE_PREFETCH_TOP_N (0: no prefetch) and
+    LLM_BATCH_SIZE / LLM_BATCH_WAIT_MS (micro-batching of dish-name extraction;
+    1: off).
+    """
+    llm = default_chat_model()
+    spoonacular_api_key = os.getenv("SPOONACULAR_API_KEY")
+
+    # Shared on-disk cache of Spoonacular responses (see ResponseCache for TTLs)
+    response_cache = ResponseCache(os.getenv("SPOONACULAR_CACHE_PATH", DEFAULT_CACHE_PATH))
+    dish_name_cache = LRUCache(max_entries=1024, ttl=24 * 3600, store=response_cache, namespace="dish_name")
+    # Skips the LLM for bare dish names / "how to make X"; learns titles from searches
+    dish_matcher = DishNameMatcher()
+    # Repeated searches are answered from a local index of everything fetched so far
+    recipe_index = RecipeSearchIndex(os.getenv("RECIPE_INDEX_PATH", DEFAULT_INDEX_PATH) or None)
+    recipe_agent = RecipeAgent(spoonacular_api_key, cache=response_cache)
+    return PipelineAgents(
+        llm_agent=LLM_Agent(llm, cache=dish_name_cache, matcher=dish_matcher, **_batching()),
+        search_agent=LocalSearchAgent(recipe_index, remote=SearchAgent(spoonacular_api_key, cache=response_cache)),
+        recipe_agent=recipe_agent,
+        dish_matcher=dish_matcher,
+        prefetcher=RecipePrefetcher(recipe_agent, top_n=int(os.getenv("RECIPE_PREFETCH_TOP_N", "0"))),
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def default_cooking_agent(memory_mode: Optional[str] = None) -> CookingGraphAgent:
+    """Follow-up Q&A agent for all sessions; memory_mode defaults to COOKING_MEMORY_MODE or "window"."""
+    return CookingGraphAgent(
+        llm=default_chat_model(temperature=0.5),
+        memory_mode=memory_mode or os.getenv("COOKING_MEMORY_MODE", "window"),
+    )
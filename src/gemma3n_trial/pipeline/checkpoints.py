@@ -0,0 +1,85 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.memory import MemorySaver
+
+
+class BoundedMemorySaver(MemorySaver):
+    """MemorySaver that forgets whole threads: least recently used beyond
+    `max_threads`, and any not touched for `ttl` seconds.
+
+    A process-wide saver (st.cache_resource) otherwise keeps every paused run
+    of every user forever. `prune(config)` drops what a thread saved after a
+    given checkpoint, e.g. a finished resume forked from the pause point.
+    """
+
+    def __init__(
+        self,
+        max_threads: int = 256,
+        ttl: Optional[float] = 3600.0,
+        clock: Callable[[], float] = time.monotonic,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        self.max_threads = max_threads
+        self.ttl = ttl
+        self.clock = clock
+        self._lock = threading.RLock()
+        self._used: "OrderedDict[str, float]" = OrderedDict()  # thread id -> last use, oldest first
+
+    def _touch(self, config: RunnableConfig) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        with self._lock:
+            now = self.clock()
+            self._used[thread_id] = now
+            self._used.move_to_end(thread_id)
+            while self._used:
+                oldest, used = next(iter(self._used.items()))
+                if oldest == thread_id:
+                    break
+                if len(self._used) <= self.max_threads and (self.ttl is None or now - used <= self.ttl):
+                    break
+                self._used.popitem(last=False)
+                super().delete_thread(oldest)
+
+    def get_tuple(self, config: RunnableConfig):
+        with self._lock:
+            # Looking up an expired thread must not revive it (or evict a live one)
+            if config["configurable"]["thread_id"] not in self._used:
+                return None
+            self._touch(config)
+            return super().get_tuple(config)
+
+    def put(self, config: RunnableConfig, checkpoint, metadata, new_versions) -> RunnableConfig:
+        with self._lock:
+            self._touch(config)
+            return super().put(config, checkpoint, metadata, new_versions)
+
+    def put_writes(self, config: RunnableConfig, writes, task_id: str, task_path: str = "") -> None:
+        with self._lock:
+            self._touch(config)
+            super().put_writes(config, writes, task_id, task_path)
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            self._used.pop(thread_id, None)
+            super().delete_thread(thread_id)
+
+    def prune(self, config: RunnableConfig) -> None:
+        """Drop the thread's checkpoints newer than `config`'s, with their writes and blobs."""
+        thread_id = config["configurable"]["thread_id"]
+        keep_id = config["configurable"]["checkpoint_id"]
+        with self._lock:
+            referenced = set()
+            for ns, checkpoints in self.storage.get(thread_id, {}).items():
+                # Checkpoint ids are time-ordered (uuid6)
+                for checkpoint_id in [c for c in checkpoints if c > keep_id]:
+                    del checkpoints[checkpoint_id]
+                    self.writes.pop((thread_id, ns, checkpoint_id), None)
+                for saved, _, _ in checkpoints.values():
+                    versions = self.serde.loads_typed(saved)["channel_versions"]
+                    referenced.update((ns, channel, version) for channel, version in versions.items())
+            for key in [k for k in self.blobs if k[0] == thread_id and k[1:] not in referenced]:
+                del self.blobs[key]
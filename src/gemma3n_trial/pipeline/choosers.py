@@ -0,0 +1,84 @@
+import asyncio
+from abc import ABC, abstractmethod
+from typing import Callable, List, Tuple
+from langgraph.types import interrupt
+from gemma3n_trial.schema import RecipeSearchResult
+
+
+class Chooser(ABC):
+    """How the select_recipe node picks a recipe: `choose(state)` returns a 1-based choice.
+
+    Choosers compare equal by type and settings, so building a pipeline twice
+    with `StdinChoice()` reuses the same compiled graph.
+    """
+
+    # True if choosing suspends the run (interrupt); such nodes are not timed
+    pauses = False
+
+    @abstractmethod
+    def choose(self, state) -> int:
+        ...
+
+    async def achoose(self, state) -> int:
+        return self.choose(state)
+
+    def _key(self) -> Tuple:
+        return (type(self),)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Chooser) and self._key() == other._key()
+
+    def __hash__(self) -> int:
+        return hash(self._key())
+
+
+class StateChoice(Chooser):
+    """The caller already knows: take `state.choice` (service, batch)."""
+
+    def choose(self, state) -> int:
+        if state.choice is None:
+            raise ValueError("choice is required to select a recipe")
+        return state.choice
+
+
+class PolicyChoice(Chooser):
+    """Pick with a policy(dish_name, recipes) -> int (batch: --choice)."""
+
+    def __init__(self, policy: Callable[[str, List[RecipeSearchResult]], int]):
+        self.policy = policy
+
+    def choose(self, state) -> int:
+        return self.policy(state.dish_name or "", state.recipes)
+
+    def _key(self) -> Tuple:
+        return (type(self), self.policy)
+
+
+class StdinChoice(Chooser):
+    """List the recipes on stdout and ask on stdin until the answer is valid."""
+
+    def choose(self, state) -> int:
+        print("\nRecipes found:")
+        for idx, recipe in enumerate(state.recipes, 1):
+            print(f"{idx}: {recipe.title}")
+        while True:
+            try:
+                user_choice = int(input(f"\nSelect a recipe (1-{len(state.recipes)}): "))
+                if 1 <= user_choice <= len(state.recipes):
+                    return user_choice
+                print("Invalid choice. Try again.")
+            except Exception:
+                print("Invalid input. Enter a number.")
+
+    async def achoose(self, state) -> int:
+        # input() blocks, so keep it off the event loop
+        return await asyncio.to_thread(self.choose, state)
+
+
+class InterruptChoice(Chooser):
+    """Pause the run with the titles; resume it with Command(resume=<choice>). Needs a checkpointer."""
+
+    pauses = True
+
+    def choose(self, state) -> int:
+        return interrupt({"recipes": [r.title for r in state.recipes]})
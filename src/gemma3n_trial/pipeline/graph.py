@@ -0,0 +1,203 @@
+import functools
+from typing import Any, Dict, List, Optional, Sequence, Union
+from pydantic import BaseModel
+from langchain_core.runnables import RunnableConfig, RunnableLambda
+from langgraph.graph import StateGraph
+from gemma3n_trial.agents import (
+    LLM_Agent, DishNameMatcher, SearchAgent, LocalSearchAgent, InterfaceAgent, RecipeAgent, RecipePrefetcher,
+)
+from gemma3n_trial.agents.session_memory import DEFAULT_SESSION
+from gemma3n_trial.schema import RecipeSearchResult, DetailedRecipe
+from gemma3n_trial.utils import instrument_node
+from gemma3n_trial.pipeline.choosers import Chooser, StateChoice
+
+NODES = ("extract_dish_name", "search_recipes", "select_recipe", "fetch_detailed_recipe")
+FULL = NODES
+SEARCH_ONLY = NODES[:2]
+FETCH_ONLY = NODES[2:]
+MODES = ("sync", "async", "both")
+# Compiled graphs keep their agents alive; callers building agents per
+# request or per test would otherwise pile them up for the process lifetime
+MAX_COMPILED_GRAPHS = 32
+
+
+class PipelineState(BaseModel):
+    session_id: Optional[str] = None
+    user_query: Optional[str] = None
+    dish_name: Optional[str] = None
+    recipes: Optional[List[RecipeSearchResult]] = None
+    choice: Optional[int] = None
+    selected_recipe: Optional[RecipeSearchResult] = None
+    detailed_recipe: Optional[Dict[str, Any]] = None
+
+
+def _session_key(state: PipelineState, config: Optional[RunnableConfig]) -> str:
+    # Explicit session, else the checkpointer thread (one per Streamlit run), else the single CLI user
+    thread_id = ((config or {}).get("configurable") or {}).get("thread_id")
+    return state.session_id or thread_id or DEFAULT_SESSION
+
+
+class _Nodes:
+    """Sync and async implementations of every node, bound to one set of agents."""
+
+    def __init__(
+        self,
+        llm_agent: Optional[LLM_Agent],
+        search_agent: Union[LocalSearchAgent, SearchAgent, None],
+        recipe_agent: Optional[RecipeAgent],
+        chooser: Chooser,
+        dish_matcher: Optional[DishNameMatcher],
+        prefetcher: Optional[RecipePrefetcher],
+    ):
+        self.llm_agent = llm_agent
+        self.search_agent = search_agent
+        self.recipe_agent = recipe_agent
+        self.chooser = chooser
+        self.dish_matcher = dish_matcher
+        self.prefetcher = prefetcher
+
+    def extract_dish_name(self, state: PipelineState) -> dict:
+        dish_name_obj = self.llm_agent.invoke({"user_query": state.user_query})
+        return {"dish_name": dish_name_obj.name}
+
+    async def aextract_dish_name(self, state: PipelineState) -> dict:
+        dish_name_obj = await self.llm_agent.ainvoke({"user_query": state.user_query})
+        return {"dish_name": dish_name_obj.name}
+
+    def _searched(self, state: PipelineState, config: RunnableConfig, results_obj) -> dict:
+        if self.dish_matcher is not None:
+            self.dish_matcher.learn(results_obj)
+        if self.prefetcher is not None:
+            self.prefetcher.start(_session_key(state, config), results_obj.results)
+        return {"recipes": results_obj.results}
+
+    def search_recipes(self, state: PipelineState, config: RunnableConfig) -> dict:
+        return self._searched(state, config, self.search_agent.invoke(state.dish_name))
+
+    async def asearch_recipes(self, state: PipelineState, config: RunnableConfig) -> dict:
+        return self._searched(state, config, await self.search_agent.ainvoke(state.dish_name))
+
+    @staticmethod
+    def _selected(state: PipelineState, user_choice: int) -> dict:
+        cooking_state = {"recipe_options": state.recipes, "selected_recipe": None}
+        selected = InterfaceAgent(user_choice).invoke(cooking_state)
+        return {"selected_recipe": selected["selected_recipe"]}
+
+    # A search that found nothing leaves nothing to select or fetch
+
+    def select_recipe(self, state: PipelineState) -> dict:
+        if not state.recipes:
+            return {"selected_recipe": None}
+        return self._selected(state, self.chooser.choose(state))
+
+    async def aselect_recipe(self, state: PipelineState) -> dict:
+        if not state.recipes:
+            return {"selected_recipe": None}
+        return self._selected(state, await self.chooser.achoose(state))
+
+    def _cooking_state(self, state: PipelineState) -> dict:
+        return {"recipe_options": state.recipes, "selected_recipe": state.selected_recipe}
+
+    def fetch_detailed_recipe(self, state: PipelineState, config: RunnableConfig) -> dict:
+        if state.selected_recipe is None:
+            return {"detailed_recipe": None}
+        prefetched = None
+        if self.prefetcher is not None:
+            prefetched = self.prefetcher.get(_session_key(state, config), state.selected_recipe.id)
+        if prefetched is not None:
+            detailed_recipe = prefetched.model_dump()
+        else:
+            detailed_recipe = self.recipe_agent.invoke(self._cooking_state(state)).get("detailed_recipe")
+        add_recipe = getattr(self.search_agent, "add_recipe", None)
+        if detailed_recipe and add_recipe is not None:
+            add_recipe(DetailedRecipe(**detailed_recipe))
+        return {"detailed_recipe": detailed_recipe}
+
+    async def afetch_detailed_recipe(self, state: PipelineState, config: RunnableConfig) -> dict:
+        if state.selected_recipe is None:
+            return {"detailed_recipe": None}
+        prefetched = None
+        if self.prefetcher is not None:
+            prefetched = await self.prefetcher.aget(_session_key(state, config), state.selected_recipe.id)
+        if prefetched is not None:
+            detailed_recipe = prefetched.model_dump()
+        else:
+            detailed_recipe = (await self.recipe_agent.ainvoke(self._cooking_state(state))).get("detailed_recipe")
+        add_recipe = getattr(self.search_agent, "add_recipe", None)
+        if detailed_recipe and add_recipe is not None:
+            add_recipe(DetailedRecipe(**detailed_recipe))
+        return {"detailed_recipe": detailed_recipe}
+
+    def runnable(self, name: str, mode: str) -> RunnableLambda:
+        sync, async_ = getattr(self, name), getattr(self, "a" + name)
+        if not (name == "select_recipe" and self.chooser.pauses):
+            # A paused select would be timed across the user's think time and reruns
+            sync, async_ = instrument_node(name)(sync), instrument_node(name)(async_)
+        if mode == "sync":
+            return RunnableLambda(sync, name=name)
+        if mode == "async":
+            return RunnableLambda(async_, name=name)
+        return RunnableLambda(sync, afunc=async_, name=name)
+
+
+# Agents each node needs
+_REQUIRES = {
+    "extract_dish_name": ("llm_agent",),
+    "search_recipes": ("search_agent",),
+    "select_recipe": (),
+    "fetch_detailed_recipe": ("recipe_agent",),
+}
+
+
+def build_pipeline(
+    llm_agent: Optional[LLM_Agent] = None,
+    search_agent: Union[LocalSearchAgent, SearchAgent, None] = None,
+    recipe_agent: Optional[RecipeAgent] = None,
+    *,
+    nodes: Sequence[str] = FULL,
+    mode: str = "both",
+    chooser: Optional[Chooser] = None,
+    dish_matcher: Optional[DishNameMatcher] = None,
+    prefetcher: Optional[RecipePrefetcher] = None,
+    checkpointer: Any = None,
+):
+    """Compiled extract -> search -> select -> fetch graph over the given agents.
+
+    `nodes` is a contiguous run of NODES (e.g. SEARCH_ONLY, FETCH_ONLY), wired
+    in order. `mode` picks sync nodes (invoke), async nodes (ainvoke) or both.
+    `chooser` decides select_recipe (default: `state.choice`). Graphs are
+    compiled once per configuration, so frontends can call this on every
+    request or rerun; the agents are compared by identity. The
+    MAX_COMPILED_GRAPHS most recently used configurations are kept.
+    """
+    nodes = tuple(nodes)
+    start = NODES.index(nodes[0]) if nodes and nodes[0] in NODES else -1
+    if start < 0 or nodes != NODES[start:start + len(nodes)]:
+        raise ValueError(f"nodes must be a contiguous run of {NODES}, got {nodes}")
+    if mode not in MODES:
+        raise ValueError(f"mode must be one of {MODES}, got {mode!r}")
+    agents = {"llm_agent": llm_agent, "search_agent": search_agent, "recipe_agent": recipe_agent}
+    for node in nodes:
+        missing = [name for name in _REQUIRES[node] if agents[name] is None]
+        if missing:
+            raise ValueError(f"{node} needs {', '.join(missing)}")
+    return _compile(
+        llm_agent, search_agent, recipe_agent, nodes, mode, chooser or StateChoice(), dish_matcher, prefetcher, checkpointer
+    )
+
+
+@functools.lru_cache(maxsize=MAX_COMPILED_GRAPHS)
+def _compile(llm_agent, search_agent, recipe_agent, nodes, mode, chooser, dish_matcher, prefetcher, checkpointer):
+    impl = _Nodes(llm_agent, search_agent, recipe_agent, chooser, dish_matcher, prefetcher)
+    graph = StateGraph(state_schema=PipelineState)
+    for node in nodes:
+        graph.add_node(node, impl.runnable(node, mode))
+    for a, b in zip(nodes, nodes[1:]):
+        graph.add_edge(a, b)
+    graph.set_entry_point(nodes[0])
+    return graph.compile(checkpointer=checkpointer)
+
+
+def clear_pipeline_cache() -> None:
+    """Forget every compiled graph (and the agents they hold on to)."""
+    _compile.cache_clear()
@@ -1,5 +1,5 @@
 from .llm_agent_output import DishName
 from .search_agent_output import RecipeSearchResult, RecipeSearchResults
 from .interface_agent_schema import CookingState
-from .recipe_agent_schema import DetailedRecipe
-__all__ = ["DishName", "RecipeSearchResult" , "RecipeSearchResults", "CookingState", "DetailedRecipe"]
\ No newline at end of file
+from .recipe_agent_schema import DetailedRecipe, DetailedRecipes
+__all__ = ["DishName", "RecipeSearchResult" , "RecipeSearchResults", "CookingState", "DetailedRecipe", "DetailedRecipes"]
\ No newline at end of file
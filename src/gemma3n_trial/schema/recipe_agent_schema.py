@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Optional, List, Dict
 
 
 class DetailedRecipe(BaseModel):
@@ -10,3 +10,8 @@ class DetailedRecipe(BaseModel):
     readyInMinutes: Optional[int]
     servings: Optional[int]
     ingredients: Optional[List[str]] = []  # Will extract from extendedIngredients
+
+
+class DetailedRecipes(BaseModel):
+    recipes: List[DetailedRecipe]
+    failed: Dict[int, str] = {}  # recipe id -> reason it could not be fetched
@@ -0,0 +1,2 @@
+from .app import CookingService, create_app, build_service, get_service
+__all__ = ["CookingService", "create_app", "build_service", "get_service"]
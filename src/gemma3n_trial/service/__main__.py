@@ -0,0 +1,32 @@
+import argparse
+import os
+from dotenv import load_dotenv
+
+
+def main() -> None:
+    # Before the parser: its defaults read SERVICE_* from the environment.
+    # Workers are spawned processes; they inherit the environment loaded here
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Serve the cooking pipeline over HTTP (ASGI).")
+    parser.add_argument("--host", default=os.getenv("SERVICE_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("SERVICE_PORT", "8000")))
+    # Each worker is a process with its own agents, pools and session state
+    parser.add_argument("--workers", type=int, default=int(os.getenv("SERVICE_WORKERS", "1")))
+    args = parser.parse_args()
+
+    try:
+        import uvicorn
+    except ImportError:
+        raise SystemExit("The service needs an ASGI server: pip install uvicorn")
+
+    uvicorn.run(
+        "gemma3n_trial.service.app:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        lifespan="on",
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,305 @@
+import json
+import logging
+import threading
+import uuid
+from typing import Any, Awaitable, Callable, Optional, Tuple, Union
+import httpx
+from gemma3n_trial.agents import (
+    LLM_Agent, DishNameMatcher, SearchAgent, LocalSearchAgent, RecipeAgent,
+    CookingGraphAgent, AgentState, SessionMemoryStore, RecipePrefetcher,
+)
+from gemma3n_trial.pipeline import build_pipeline, default_agents, default_cooking_agent, SEARCH_ONLY, FETCH_ONLY
+from gemma3n_trial.schema import DetailedRecipe
+from gemma3n_trial.utils import aclose_http_client, flush_search_indexes, get_metrics, CircuitOpenError, QuotaExceededError
+
+logger = logging.getLogger(__name__)
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class CookingService:
+    """The cooking pipeline behind request handlers instead of input().
+
+    Search and select/fetch run as two compiled graphs, built once and shared
+    by every request. What a user has seen and picked lives in a per-session
+    state dict keyed by `session_id`. That state is per process, so with
+    several workers behind a load balancer, route each session to one worker.
+    """
+
+    def __init__(
+        self,
+        llm_agent: LLM_Agent,
+        search_agent: Union[LocalSearchAgent, SearchAgent],
+        recipe_agent: RecipeAgent,
+        cooking_agent: CookingGraphAgent,
+        dish_matcher: Optional[DishNameMatcher] = None,
+        prefetcher: Optional[RecipePrefetcher] = None,
+        max_sessions: int = 10_000,
+        session_ttl: float = 1800.0,
+    ):
+        self.llm_agent = llm_agent
+        self.search_agent = search_agent
+        self.recipe_agent = recipe_agent
+        self.cooking_agent = cooking_agent
+        self.dish_matcher = dish_matcher
+        self.prefetcher = prefetcher
+        self.sessions = SessionMemoryStore(dict, max_sessions=max_sessions, idle_ttl=session_ttl)
+        # The search graph never prefetches itself: search() starts it for the session
+        self.search_graph = build_pipeline(
+            llm_agent, search_agent, nodes=SEARCH_ONLY, mode="async", dish_matcher=dish_matcher
+        )
+        self.fetch_graph = build_pipeline(
+            search_agent=search_agent, recipe_agent=recipe_agent, nodes=FETCH_ONLY, mode="async", prefetcher=prefetcher
+        )
+
+    # -------------------------
+    # Endpoints
+    # -------------------------
+    def _session(self, body: dict, create: bool = False) -> Tuple[str, Any]:
+        session_id = body.get("session_id")
+        if session_id is None and create:
+            session_id = uuid.uuid4().hex
+        if not isinstance(session_id, str) or not session_id:
+            raise HTTPError(400, "session_id is required")
+        if not create and session_id not in self.sessions:
+            raise HTTPError(404, f"Unknown or expired session {session_id!r}; search again")
+        return session_id, self.sessions.get(session_id)
+
+    async def search(self, body: dict) -> dict:
+        query = body.get("query")
+        if not isinstance(query, str) or not query.strip():
+            raise HTTPError(400, "query is required")
+        session_id, session = self._session(body, create=True)
+
+        result = await self.search_graph.ainvoke({"user_query": query})
+        async with session.lock:
+            # A new search starts over: drop the previous choice, recipe and chat
+            session.memory.clear()
+            session.memory.update(dish_name=result["dish_name"], recipes=result["recipes"])
+            self.cooking_agent.sessions.drop(session_id)
+        if self.prefetcher is not None:
+            # Runs in the background while the user reads the list
+            self.prefetcher.start(session_id, result["recipes"])
+        return {
+            "session_id": session_id,
+            "dish_name": result["dish_name"],
+            "recipes": [r.model_dump() for r in result["recipes"]],
+        }
+
+    async def select(self, body: dict) -> dict:
+        session_id, session = self._session(body)
+        choice = body.get("choice")
+        if not isinstance(choice, int):
+            raise HTTPError(400, "choice must be an integer (1-based)")
+        recipes = session.memory.get("recipes")
+        if not recipes:
+            raise HTTPError(409, "Search before selecting a recipe")
+        if not 1 <= choice <= len(recipes):
+            raise HTTPError(400, f"choice must be 1-{len(recipes)}")
+
+        result = await self.fetch_graph.ainvoke({"session_id": session_id, "recipes": recipes, "choice": choice})
+        detailed = result.get("detailed_recipe")
+        if not detailed:
+            raise HTTPError(502, "Spoonacular returned an incomplete recipe")
+        recipe = DetailedRecipe(**detailed)
+        async with session.lock:
+            session.memory["detailed_recipe"] = recipe
+        return {"session_id": session_id, "recipe": detailed}
+
+    def _agent_state(self, body: dict) -> Tuple[str, AgentState]:
+        session_id, session = self._session(body)
+        question = body.get("question")
+        if not isinstance(question, str) or not question.strip():
+            raise HTTPError(400, "question is required")
+        recipe = session.memory.get("detailed_recipe")
+        if recipe is None:
+            raise HTTPError(409, "Select a recipe before asking about it")
+        return session_id, AgentState(detailed_recipe=recipe, user_input=question)
+
+    async def ask(self, body: dict) -> dict:
+        session_id, state = self._agent_state(body)
+        result = await self.cooking_agent.ainvoke(state, session_id=session_id)
+        return {"session_id": session_id, "answer": result.response}
+
+    def ask_stream(self, body: dict):
+        session_id, state = self._agent_state(body)
+        return self.cooking_agent.astream(state, session_id=session_id)
+
+
+def build_service() -> CookingService:
+    """Wire the production agents from the environment, like the pipeline scripts."""
+    agents = default_agents()
+    return CookingService(
+        llm_agent=agents.llm_agent,
+        search_agent=agents.search_agent,
+        recipe_agent=agents.recipe_agent,
+        cooking_agent=default_cooking_agent(),
+        dish_matcher=agents.dish_matcher,
+        prefetcher=agents.prefetcher,
+    )
+
+
+# -------------------------
+# ASGI plumbing (no web framework dependency)
+# -------------------------
+Send = Callable[[dict], Awaitable[None]]
+Receive = Callable[[], Awaitable[dict]]
+
+MAX_BODY_BYTES = 64 * 1024
+PROMETHEUS_CONTENT_TYPE = b"text/plain; version=0.0.4; charset=utf-8"
+
+
+async def _send_text(send: Send, status: int, text: str, content_type: bytes) -> None:
+    body = text.encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", content_type), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _send_json(send: Send, status: int, payload: Any) -> None:
+    await _send_text(send, status, json.dumps(payload), b"application/json")
+
+
+async def _send_stream(send: Send, chunks) -> None:
+    await send({
+        "type": "http.response.start",
+        "status": 200,
+        "headers": [(b"content-type", b"text/plain; charset=utf-8")],
+    })
+    try:
+        async for chunk in chunks:
+            await send({"type": "http.response.body", "body": chunk.encode("utf-8"), "more_body": True})
+    except Exception:
+        # The 200 is already out; a second http.response.start would break ASGI
+        logger.exception("Error while streaming an answer")
+    await send({"type": "http.response.body", "body": b""})
+
+
+async def _read_json(receive: Receive) -> dict:
+    chunks, size = [], 0
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            raise HTTPError(400, "client disconnected")
+        chunk = message.get("body", b"")
+        size += len(chunk)
+        if size > MAX_BODY_BYTES:
+            raise HTTPError(413, "request body too large")
+        chunks.append(chunk)
+        if not message.get("more_body"):
+            break
+    raw = b"".join(chunks)
+    if not raw:
+        return {}
+    try:
+        body = json.loads(raw)
+    except ValueError:
+        raise HTTPError(400, "body must be JSON")
+    if not isinstance(body, dict):
+        raise HTTPError(400, "body must be a JSON object")
+    return body
+
+
+_service: Optional[CookingService] = None
+_service_lock = threading.Lock()
+
+
+def get_service() -> CookingService:
+    # One service (agents, graphs, pools) per worker process
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = build_service()
+        return _service
+
+
+def create_app(service: Optional[CookingService] = None, service_factory: Callable[[], CookingService] = get_service):
+    """ASGI app exposing POST /search, /select, /ask and GET /healthz, /metrics, /spans.
+
+    Pass `service` to serve pre-built agents (tests, stubs); otherwise the
+    process-wide service is built on first use.
+    """
+    routes = {
+        "/search": CookingService.search,
+        "/select": CookingService.select,
+        "/ask": CookingService.ask,
+    }
+
+    def current() -> CookingService:
+        nonlocal service
+        if service is None:
+            service = service_factory()
+        return service
+
+    async def lifespan(receive: Receive, send: Send) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                try:
+                    current()
+                except Exception as e:
+                    await send({"type": "lifespan.startup.failed", "message": str(e)})
+                    return
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await aclose_http_client()
+                flush_search_indexes()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def app(scope: dict, receive: Receive, send: Send) -> None:
+        if scope["type"] == "lifespan":
+            await lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+
+        path, method = scope["path"].rstrip("/") or "/", scope["method"]
+        try:
+            if path == "/healthz":
+                await _send_json(send, 200, {"status": "ok"})
+                return
+            if path == "/metrics":
+                await _send_text(send, 200, get_metrics().render_prometheus(), PROMETHEUS_CONTENT_TYPE)
+                return
+            if path == "/spans":
+                await _send_json(send, 200, {"spans": get_metrics().spans()})
+                return
+            handler = routes.get(path)
+            if handler is None:
+                raise HTTPError(404, f"No route for {path}")
+            if method != "POST":
+                raise HTTPError(405, "Use POST")
+            body = await _read_json(receive)
+            if path == "/ask" and body.get("stream"):
+                # Validate before the 200 goes out; errors after that end the stream
+                chunks = current().ask_stream(body)
+                await _send_stream(send, chunks)
+                return
+            await _send_json(send, 200, await handler(current(), body))
+        except HTTPError as e:
+            await _send_json(send, e.status, {"error": e.message})
+        except (CircuitOpenError, QuotaExceededError) as e:
+            # Failing fast on our side: tell the client when trying again makes sense
+            await _send_json(send, 503, {"error": str(e), "retry_after": round(e.retry_in)})
+        except httpx.HTTPStatusError as e:
+            await _send_json(send, 502, {"error": f"Upstream returned {e.response.status_code}"})
+        except httpx.HTTPError as e:
+            await _send_json(send, 502, {"error": str(e) or type(e).__name__})
+        except Exception:
+            logger.exception("Unhandled error on %s %s", method, path)
+            await _send_json(send, 500, {"error": "Internal server error"})
+
+    return app
+
+
+# For `uvicorn gemma3n_trial.service.app:app --workers N`
+app = create_app()
@@ -0,0 +1,81 @@
+from .http_client import (
+    SPOONACULAR_BASE_URL,
+    build_client,
+    build_async_client,
+    get_http_client,
+    set_http_client,
+    configure_http_client,
+    close_http_client,
+    get_async_http_client,
+    set_async_http_client,
+    aclose_http_client,
+)
+from .response_cache import ResponseCache, DEFAULT_CACHE_PATH, normalize_query
+from .lru_cache import LRUCache
+from .tokens import count_tokens, truncate_to_tokens
+from .recipe_context import RecipeContextBuilder, strip_html
+from .recipe_retriever import BM25Index, RecipeRetriever, chunk_recipe
+from .search_index import RecipeSearchIndex, DEFAULT_INDEX_PATH, flush_search_indexes
+from .metrics import Metrics, get_metrics, configure_metrics, instrument_node
+from .resilience import (
+    Resilience,
+    RetryPolicy,
+    CircuitBreaker,
+    QuotaRateLimiter,
+    CircuitOpenError,
+    QuotaExceededError,
+    get_resilience,
+    set_resilience,
+)
+from .singleflight import SingleFlight
+from .micro_batcher import MicroBatcher
+from .prefix_cache import PrefixKVCache, kv_nbytes
+from .local_llm import LocalChatModel, LocalModel, load_local_model, quantize_int8, configure_threads, DEFAULT_LOCAL_MODEL
+__all__ = [
+    "SPOONACULAR_BASE_URL",
+    "build_client",
+    "build_async_client",
+    "get_http_client",
+    "set_http_client",
+    "configure_http_client",
+    "close_http_client",
+    "get_async_http_client",
+    "set_async_http_client",
+    "aclose_http_client",
+    "ResponseCache",
+    "DEFAULT_CACHE_PATH",
+    "normalize_query",
+    "LRUCache",
+    "count_tokens",
+    "truncate_to_tokens",
+    "RecipeContextBuilder",
+    "strip_html",
+    "BM25Index",
+    "RecipeRetriever",
+    "chunk_recipe",
+    "RecipeSearchIndex",
+    "flush_search_indexes",
+    "DEFAULT_INDEX_PATH",
+    "Metrics",
+    "get_metrics",
+    "configure_metrics",
+    "instrument_node",
+    "Resilience",
+    "RetryPolicy",
+    "CircuitBreaker",
+    "QuotaRateLimiter",
+    "CircuitOpenError",
+    "QuotaExceededError",
+    "get_resilience",
+    "set_resilience",
+    "SingleFlight",
+    "MicroBatcher",
+    "PrefixKVCache",
+    "kv_nbytes",
+    "LocalChatModel",
+    "LocalModel",
+    "load_local_model",
+    "quantize_int8",
+    "configure_threads",
+    "DEFAULT_LOCAL_MODEL",
+]
@@ -0,0 +1,113 @@
+import asyncio
+import threading
+import weakref
+from typing import Optional
+import httpx
+
+SPOONACULAR_BASE_URL = "https://api.spoonacular.com"
+
+# Spoonacular usually answers well under a second; a slow connect is almost
+# always a network problem, so fail that fast and give reads more room.
+DEFAULT_CONNECT_TIMEOUT = 5.0
+DEFAULT_READ_TIMEOUT = 15.0
+DEFAULT_MAX_CONNECTIONS = 100
+DEFAULT_MAX_KEEPALIVE = 20
+DEFAULT_KEEPALIVE_EXPIRY = 30.0
+
+_client: Optional[httpx.Client] = None
+_lock = threading.Lock()
+
+# httpx.AsyncClient pools are bound to the loop they were first used on, so
+# keep one per running event loop unless a client is injected explicitly.
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+    weakref.WeakKeyDictionary()
+)
+_async_override: Optional[httpx.AsyncClient] = None
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _client_kwargs(
+    connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+    read_timeout: float = DEFAULT_READ_TIMEOUT,
+    max_connections: int = DEFAULT_MAX_CONNECTIONS,
+    max_keepalive_connections: int = DEFAULT_MAX_KEEPALIVE,
+    keepalive_expiry: float = DEFAULT_KEEPALIVE_EXPIRY,
+    http2: bool = False,
+) -> dict:
+    timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+    limits = httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max_keepalive_connections,
+        keepalive_expiry=keepalive_expiry,
+    )
+    # HTTP/2 needs the optional `h2` package; fall back to HTTP/1.1 keep-alive
+    return {"timeout": timeout, "limits": limits, "http2": http2 and _http2_available()}
+
+
+def build_client(transport: Optional[httpx.BaseTransport] = None, **kwargs) -> httpx.Client:
+    return httpx.Client(transport=transport, **_client_kwargs(**kwargs))
+
+
+def build_async_client(
+    transport: Optional[httpx.AsyncBaseTransport] = None, **kwargs
+) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=transport, **_client_kwargs(**kwargs))
+
+
+def get_http_client() -> httpx.Client:
+    """Return the process-wide client, creating it with defaults on first use."""
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                _client = build_client()
+    return _client
+
+
+def set_http_client(client: Optional[httpx.Client]) -> None:
+    """Replace the process-wide client (e.g. with a tuned or mocked one)."""
+    global _client
+    with _lock:
+        old, _client = _client, client
+    if old is not None and old is not client:
+        old.close()
+
+
+def configure_http_client(**kwargs) -> httpx.Client:
+    client = build_client(**kwargs)
+    set_http_client(client)
+    return client
+
+
+def close_http_client() -> None:
+    set_http_client(None)
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """Return the pooled async client for the running event loop."""
+    if _async_override is not None:
+        return _async_override
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = _async_clients[loop] = build_async_client()
+    return client
+
+
+def set_async_http_client(client: Optional[httpx.AsyncClient]) -> None:
+    """Use `client` for every async caller; pass None to go back to per-loop clients."""
+    global _async_override
+    _async_override = client
+
+
+async def aclose_http_client() -> None:
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
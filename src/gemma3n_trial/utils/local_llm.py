@@ -0,0 +1,326 @@
+import copy
+import functools
+import hashlib
+import threading
+from typing import Any, Dict, Iterator, List, Optional
+from pydantic import Field, PrivateAttr
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from gemma3n_trial.utils.metrics import get_metrics
+from gemma3n_trial.utils.micro_batcher import MicroBatcher
+from gemma3n_trial.utils.prefix_cache import PrefixKVCache, kv_nbytes
+
+DEFAULT_LOCAL_MODEL = "google/gemma-3n-E2B-it"
+
+_ROLES = {"human": "user", "ai": "assistant", "system": "system"}
+
+# Shorter shared prefixes are not worth a cache entry
+MIN_PREFIX_TOKENS = 32
+
+
+class LocalModel:
+    """A loaded model + tokenizer. Generation is serialized: one request
+    already uses every intra-op thread, so concurrent generate() calls only
+    oversubscribe the CPU."""
+
+    def __init__(self, model: Any, tokenizer: Any):
+        self.model = model
+        self.tokenizer = tokenizer
+        self.lock = threading.Lock()
+
+
+def configure_threads(num_threads: Optional[int] = None, num_interop_threads: Optional[int] = None) -> None:
+    """Set torch's CPU thread pools (defaults: torch's own, i.e. one per core)."""
+    import torch
+
+    if num_threads:
+        torch.set_num_threads(num_threads)
+    if num_interop_threads:
+        try:
+            torch.set_num_interop_threads(num_interop_threads)
+        except RuntimeError:
+            # Only settable before the first parallel op; keep whatever is in use
+            pass
+
+
+def quantize_int8(model: Any) -> Any:
+    """Dynamic int8 quantization of the Linear layers (weights int8, activations quantized per batch)."""
+    import torch
+
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def load_local_model(
+    model_id: str = DEFAULT_LOCAL_MODEL,
+    quantize: bool = False,
+    num_threads: Optional[int] = None,
+) -> LocalModel:
+    """Load `model_id` (hub id or local path) for CPU inference, once per process and settings."""
+    # Positional, so keyword and positional calls share a cache entry
+    return _load(model_id, bool(quantize), num_threads)
+
+
+@functools.lru_cache(maxsize=None)
+def _load(model_id: str, quantize: bool, num_threads: Optional[int]) -> LocalModel:
+    import torch
+    from transformers import AutoModelForCausalLM, AutoTokenizer
+
+    configure_threads(num_threads)
+    tokenizer = AutoTokenizer.from_pretrained(model_id)
+    model = AutoModelForCausalLM.from_pretrained(model_id, torch_dtype=torch.float32)
+    model.eval()
+    if quantize:
+        model = quantize_int8(model)
+    return LocalModel(model, tokenizer)
+
+
+def _stop_criteria(event: threading.Event):
+    from transformers import StoppingCriteria, StoppingCriteriaList
+
+    class _Cancelled(StoppingCriteria):
+        def __call__(self, input_ids, scores, **kwargs) -> bool:
+            return event.is_set()
+
+    return StoppingCriteriaList([_Cancelled()])
+
+
+def _cut_at_stop(text: str, stop: Optional[List[str]]) -> Optional[int]:
+    cuts = [text.find(s) for s in stop or () if s and s in text]
+    return min(cuts) if cuts else None
+
+
+class LocalChatModel(BaseChatModel):
+    """Chat model running a Hugging Face causal LM on this machine (Gemma 3n by default).
+
+    Drop-in for ChatGroq in LLM_Agent and CookingGraphAgent: invoke, stream and
+    their async variants (run in a worker thread) all work. Weights are loaded
+    on first use and shared by every instance with the same settings; pass
+    `local_model` to use an already loaded one.
+
+    With a `prefix_cache`, the KV cache of a leading system message is kept
+    and reused, so a follow-up turn on the same recipe only prefills the
+    history and the new question.
+
+    With `max_batch_size` > 1, concurrent calls (threads, chain.batch,
+    ainvoke) are queued for up to `max_wait_ms` and decoded together in one
+    left-padded generate() call instead of one after another.
+    """
+
+    model_id: str = DEFAULT_LOCAL_MODEL
+    quantize: bool = False  # int8 dynamic quantization of Linear layers
+    num_threads: Optional[int] = None  # torch intra-op threads; None keeps torch's default
+    max_new_tokens: int = 256
+    temperature: float = 0.0  # 0: greedy decoding
+    local_model: Optional[LocalModel] = Field(default=None, exclude=True)
+    prefix_cache: Optional[PrefixKVCache] = Field(default=None, exclude=True)
+    max_batch_size: int = 1
+    max_wait_ms: float = 5.0
+
+    model_config = {"arbitrary_types_allowed": True}
+
+    _batcher: Optional[MicroBatcher] = PrivateAttr(default=None)
+    _batcher_lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    @property
+    def _llm_type(self) -> str:
+        return "local-transformers"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {
+            "model_id": self.model_id,
+            "quantize": self.quantize,
+            "max_new_tokens": self.max_new_tokens,
+            "temperature": self.temperature,
+        }
+
+    def loaded(self) -> LocalModel:
+        if self.local_model is None:
+            self.local_model = load_local_model(self.model_id, self.quantize, self.num_threads)
+        return self.local_model
+
+    @staticmethod
+    def _chat(messages: List[BaseMessage]) -> List[Dict[str, str]]:
+        return [{"role": _ROLES.get(m.type, "user"), "content": m.text()} for m in messages]
+
+    @staticmethod
+    def _encode(local: LocalModel, chat: List[Dict[str, str]]):
+        tokenizer = local.tokenizer
+        if getattr(tokenizer, "chat_template", None):
+            encoded = tokenizer.apply_chat_template(
+                chat, add_generation_prompt=True, return_tensors="pt", return_dict=True
+            )
+        else:
+            # Base models without a template: plain "role: content" turns
+            prompt = "".join(f"{m['role']}: {m['content']}\n" for m in chat) + "assistant: "
+            encoded = tokenizer(prompt, return_tensors="pt")
+        # Some tokenizers add token_type_ids, which causal LMs reject in generate()
+        return {k: encoded[k] for k in ("input_ids", "attention_mask") if k in encoded}
+
+    def _prefix_length(self, local: LocalModel, chat: List[Dict[str, str]], input_ids) -> int:
+        if len(chat) < 2 or chat[0]["role"] != "system":
+            return 0
+        # Render the system message with a stand-in turn: the tokens both
+        # renderings share are the system prompt plus template framing,
+        # whatever the chat template (Gemma folds system into the first user turn)
+        probe = self._encode(local, [chat[0], {"role": "user", "content": "?"}])["input_ids"][0]
+        full = input_ids[0]
+        n = min(len(probe), len(full) - 1)  # generate() needs at least one new token
+        differ = (probe[:n] != full[:n]).nonzero()
+        return int(differ[0]) if len(differ) else n
+
+    def _cached_prefix(self, local: LocalModel, chat: List[Dict[str, str]], inputs) -> Dict[str, Any]:
+        """past_key_values covering the prompt's system prefix; call holding local.lock."""
+        if self.prefix_cache is None:
+            return {}
+        n = self._prefix_length(local, chat, inputs["input_ids"])
+        if n < MIN_PREFIX_TOKENS:
+            return {}
+        prefix_ids = inputs["input_ids"][:, :n]
+        key = (local, n, hashlib.sha1(prefix_ids.numpy().tobytes()).hexdigest())
+        kv = self.prefix_cache.get(key)
+        get_metrics().count("cache_requests_total", {"cache": "prefix_kv", "result": "miss" if kv is None else "hit"})
+        if kv is None:
+            kv = local.model(input_ids=prefix_ids, use_cache=True).past_key_values
+            self.prefix_cache.put(key, kv, kv_nbytes(kv))
+        # generate() appends to the cache it is given
+        return {"past_key_values": copy.deepcopy(kv)}
+
+    def _generate_kwargs(self, inputs, **kwargs) -> Dict[str, Any]:
+        options = {"max_new_tokens": self.max_new_tokens, **kwargs}
+        if self.temperature > 0:
+            options.update(do_sample=True, temperature=self.temperature)
+        else:
+            options.update(do_sample=False)
+        return {**inputs, **options}
+
+    def _result(self, local: LocalModel, new_tokens, prompt_tokens: int, stop: Optional[List[str]]) -> ChatResult:
+        text = local.tokenizer.decode(new_tokens, skip_special_tokens=True)
+        cut = _cut_at_stop(text, stop)
+        if cut is not None:
+            text = text[:cut]
+        usage = {
+            "input_tokens": prompt_tokens,
+            "output_tokens": len(new_tokens),
+            "total_tokens": prompt_tokens + len(new_tokens),
+        }
+        message = AIMessage(content=text.strip(), usage_metadata=usage)
+        return ChatResult(generations=[ChatGeneration(message=message)], llm_output={"model_name": self.model_id})
+
+    def _batchable(self, local: LocalModel, chat: List[Dict[str, str]], inputs, kwargs: Dict[str, Any]) -> bool:
+        if self.max_batch_size <= 1 or kwargs:
+            return False
+        # Prompts with a cached prefix each need their own past_key_values
+        return self.prefix_cache is None or self._prefix_length(local, chat, inputs["input_ids"]) < MIN_PREFIX_TOKENS
+
+    def batcher(self) -> MicroBatcher:
+        with self._batcher_lock:
+            if self._batcher is None:
+                self._batcher = MicroBatcher(
+                    self._generate_many, max_batch_size=self.max_batch_size, max_wait_ms=self.max_wait_ms, name="local-llm-batch"
+                )
+            return self._batcher
+
+    def _generate_many(self, requests: List[tuple]) -> List[ChatResult]:
+        """One generate() over several prompts, left-padded to the same length."""
+        local = self.loaded()
+        tokenizer = local.tokenizer
+        pad_id = tokenizer.pad_token_id if tokenizer.pad_token_id is not None else (tokenizer.eos_token_id or 0)
+        width = max(len(ids) for ids, _ in requests)
+        rows = [[int(t) for t in ids] for ids, _ in requests]
+        # Already padded by hand, so pad() only builds the tensors (and needs no pad token)
+        inputs = tokenizer.pad(
+            {
+                "input_ids": [[pad_id] * (width - len(ids)) + ids for ids in rows],
+                "attention_mask": [[0] * (width - len(ids)) + [1] * len(ids) for ids in rows],
+            },
+            padding=False,
+            return_tensors="pt",
+        )
+        # generate() already runs without autograd
+        with local.lock:
+            output = local.model.generate(**self._generate_kwargs(dict(inputs), pad_token_id=pad_id))
+        eos = local.model.generation_config.eos_token_id
+        eos_ids = set(eos if isinstance(eos, (list, tuple)) else [] if eos is None else [eos])
+        results = []
+        for row, (ids, stop) in enumerate(requests):
+            # Rows that finished early are padded to the longest one: keep up
+            # to their first EOS (pad_id may be a token the model really emits)
+            new_tokens = output[row][width:]
+            end = next((i + 1 for i, t in enumerate(new_tokens) if int(t) in eos_ids), len(new_tokens))
+            results.append(self._result(local, new_tokens[:end], len(ids), stop))
+        return results
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        local = self.loaded()
+        chat = self._chat(messages)
+        inputs = self._encode(local, chat)
+        prompt_tokens = len(inputs["input_ids"][0])
+        if self._batchable(local, chat, inputs, kwargs):
+            return self.batcher().submit((inputs["input_ids"][0], stop))
+
+        import torch
+
+        with local.lock, torch.inference_mode():
+            prefix = self._cached_prefix(local, chat, inputs)
+            output = local.model.generate(**self._generate_kwargs(inputs, **prefix, **kwargs))
+        return self._result(local, output[0][prompt_tokens:], prompt_tokens, stop)
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        import torch
+        from transformers import TextIteratorStreamer
+
+        local = self.loaded()
+        chat = self._chat(messages)
+        inputs = self._encode(local, chat)
+        streamer = TextIteratorStreamer(local.tokenizer, skip_prompt=True, skip_special_tokens=True)
+        cancelled = threading.Event()
+        options = self._generate_kwargs(inputs, streamer=streamer, stopping_criteria=_stop_criteria(cancelled), **kwargs)
+
+        errors: List[BaseException] = []
+
+        def generate() -> None:
+            try:
+                with local.lock, torch.inference_mode():
+                    local.model.generate(**options, **self._cached_prefix(local, chat, inputs))
+            except BaseException as e:
+                errors.append(e)
+                streamer.end()  # unblock the consumer
+
+        worker = threading.Thread(target=generate, name="local-llm-stream", daemon=True)
+        worker.start()
+        text = ""
+        try:
+            for piece in streamer:
+                if not piece:
+                    continue
+                cut = _cut_at_stop(text + piece, stop)
+                if cut is not None:
+                    piece = (text + piece)[len(text):cut]
+                text += piece
+                if piece:
+                    if run_manager:
+                        run_manager.on_llm_new_token(piece)
+                    yield ChatGenerationChunk(message=AIMessageChunk(content=piece))
+                if cut is not None:
+                    break
+        finally:
+            # Consumer stopped early (or a stop sequence hit): end generation at the next token
+            cancelled.set()
+            worker.join()
+        if errors:
+            raise errors[0]
@@ -0,0 +1,88 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+from gemma3n_trial.utils.response_cache import ResponseCache
+
+
+class LRUCache:
+    """Thread-safe in-memory LRU with optional TTL and hit/miss counters.
+
+    When `store` is given, misses fall through to that persistent cache under
+    `namespace` and writes go to both, so entries survive restarts.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl: Optional[float] = None,
+        store: Optional[ResponseCache] = None,
+        namespace: str = "lru",
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.store = store
+        self.namespace = namespace
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.store_hits = 0
+
+    def _get_local(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def _set_local(self, key: Hashable, value: Any) -> None:
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        value = self._get_local(key)
+        if value is None and self.store is not None:
+            value = self.store.get(self.namespace, {"key": key})
+            if value is not None:
+                self._set_local(key, value)
+                self.store_hits += 1
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self._set_local(key, value)
+        if self.store is not None:
+            self.store.set(self.namespace, {"key": key}, value)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.store_hits = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "hits": self.hits,
+                "misses": self.misses,
+                "store_hits": self.store_hits,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def __len__(self) -> int:
+        return len(self._data)
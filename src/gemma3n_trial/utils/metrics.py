@@ -0,0 +1,300 @@
+import contextvars
+import functools
+import inspect
+import os
+import secrets
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+from uuid import UUID
+from langchain_core.callbacks import BaseCallbackHandler
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# What we instrument; HELP text for the Prometheus export
+HISTOGRAMS = {
+    "pipeline_node_seconds": "Duration of LangGraph pipeline nodes.",
+    "spoonacular_request_seconds": "Duration of Spoonacular HTTP calls (cache hits excluded).",
+    "llm_request_seconds": "Duration of chat model calls.",
+}
+COUNTERS = {
+    "cache_requests_total": "Cache lookups by cache and result (hit/miss).",
+    "spoonacular_retries_total": "Spoonacular attempts retried, by status code or transport error.",
+    "circuit_breaker_transitions_total": "Spoonacular circuit breaker state changes.",
+}
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start_ns", "end_ns", "attributes", "status", "error", "_token")
+
+    def __init__(self, name: str, parent: Optional["Span"], attributes: Dict[str, Any]):
+        self.name = name
+        self.trace_id = parent.trace_id if parent else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent.span_id if parent else None
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = attributes
+        self.status = "ok"
+        self.error: Optional[str] = None
+        self._token = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": (self.end_ns - self.start_ns) / 1e6 if self.end_ns else None,
+            "attributes": self.attributes,
+            "status": self.status,
+            "error": self.error,
+        }
+
+
+class _NoopTimer:
+    status: Optional[str] = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __setattr__(self, name, value):
+        # Shared singleton: ignore `timer.status = ...` from callers
+        pass
+
+
+_NOOP = _NoopTimer()
+
+
+class _Timer:
+    def __init__(self, metrics: "Metrics", histogram: str, labels: Dict[str, str], span_name: str):
+        self.metrics = metrics
+        self.histogram = histogram
+        self.labels = labels
+        self.span_name = span_name
+        self.status: Optional[str] = None  # e.g. the HTTP status code; default ok/error
+
+    def __enter__(self):
+        self.span = self.metrics.start_span(self.span_name, self.labels)
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.started
+        status = self.status or ("error" if exc_type else "ok")
+        self.metrics.observe(self.histogram, elapsed, {**self.labels, "status": status})
+        self.metrics.end_span(self.span, exc, status)
+        return False
+
+
+class Metrics:
+    """Histograms, counters and trace spans for one process.
+
+    Disabled (the default unless METRICS_ENABLED is set), `timed()` and
+    `count()` return immediately, so instrumented code pays one attribute
+    check. Export with `render_prometheus()` and `spans()`, or register a
+    span exporter to ship finished spans elsewhere.
+    """
+
+    def __init__(self, enabled: bool = False, buckets: Tuple[float, ...] = DEFAULT_BUCKETS, max_spans: int = 10_000):
+        self.enabled = enabled
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, Dict[LabelKey, list]] = {}
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._spans: Deque[Span] = deque(maxlen=max_spans)
+        self.span_exporters: List[Callable[[Span], None]] = []
+
+    # -------------------------
+    # Recording
+    # -------------------------
+    @staticmethod
+    def _key(labels: Dict[str, str]) -> LabelKey:
+        return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def observe(self, histogram: str, value: float, labels: Dict[str, str]) -> None:
+        if not self.enabled:
+            return
+        key = self._key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(histogram, {}).get(key)
+            if series is None:
+                # [bucket counts..., sum, count]
+                series = self._histograms[histogram][key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def count(self, counter: str, labels: Dict[str, str], amount: float = 1) -> None:
+        if not self.enabled:
+            return
+        key = self._key(labels)
+        with self._lock:
+            series = self._counters.setdefault(counter, {})
+            series[key] = series.get(key, 0) + amount
+
+    def timed(self, histogram: str, span_name: str, **labels: str):
+        """Context manager: time the block into `histogram` and record a span."""
+        if not self.enabled:
+            return _NOOP
+        return _Timer(self, histogram, labels, span_name)
+
+    def start_span(self, name: str, attributes: Dict[str, Any], activate: bool = True) -> Span:
+        span = Span(name, _current_span.get(), dict(attributes))
+        if activate:
+            span._token = _current_span.set(span)
+        return span
+
+    def end_span(self, span: Span, error: Optional[BaseException] = None, status: Optional[str] = None) -> None:
+        span.end_ns = time.time_ns()
+        if error is not None:
+            span.status = "error"
+            span.error = f"{type(error).__name__}: {error}"
+        elif status not in (None, "ok"):
+            span.attributes["status"] = status
+        if span._token is not None:
+            try:
+                _current_span.reset(span._token)
+            except ValueError:
+                # Ended in another context (e.g. a generator closed elsewhere)
+                pass
+        self._spans.append(span)
+        for exporter in self.span_exporters:
+            try:
+                exporter(span)
+            except Exception:
+                pass
+
+    # -------------------------
+    # Export
+    # -------------------------
+    def spans(self) -> List[Dict[str, Any]]:
+        return [span.to_dict() for span in list(self._spans)]
+
+    @staticmethod
+    def _labels(key: LabelKey, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+        pairs = key + extra
+        if not pairs:
+            return ""
+        escaped = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+        return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+    def render_prometheus(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            for name, series in sorted(self._histograms.items()):
+                lines.append(f"# HELP {name} {HISTOGRAMS.get(name, name)}")
+                lines.append(f"# TYPE {name} histogram")
+                for key, values in sorted(series.items()):
+                    for bound, bucket in zip(self.buckets, values):
+                        lines.append(f"{name}_bucket{self._labels(key, (('le', repr(bound)),))} {bucket}")
+                    lines.append(f"{name}_bucket{self._labels(key, (('le', '+Inf'),))} {values[-1]}")
+                    lines.append(f"{name}_sum{self._labels(key)} {values[-2]}")
+                    lines.append(f"{name}_count{self._labels(key)} {values[-1]}")
+            for name, series in sorted(self._counters.items()):
+                lines.append(f"# HELP {name} {COUNTERS.get(name, name)}")
+                lines.append(f"# TYPE {name} counter")
+                for key, value in sorted(series.items()):
+                    lines.append(f"{name}{self._labels(key)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+        self._spans.clear()
+
+
+_metrics = Metrics(enabled=os.getenv("METRICS_ENABLED", "").lower() in ("1", "true", "yes"))
+
+
+def get_metrics() -> Metrics:
+    return _metrics
+
+
+def configure_metrics(enabled: bool = True) -> Metrics:
+    _metrics.enabled = enabled
+    return _metrics
+
+
+def instrument_node(name: str):
+    """Decorator timing a pipeline node (sync or async) as pipeline_node_seconds{node=name}."""
+    span_name = f"node {name}"
+
+    def decorate(fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_node(*args, **kwargs):
+                if not _metrics.enabled:
+                    return await fn(*args, **kwargs)
+                with _metrics.timed("pipeline_node_seconds", span_name, node=name):
+                    return await fn(*args, **kwargs)
+            return async_node
+
+        @functools.wraps(fn)
+        def node(*args, **kwargs):
+            if not _metrics.enabled:
+                return fn(*args, **kwargs)
+            with _metrics.timed("pipeline_node_seconds", span_name, node=name):
+                return fn(*args, **kwargs)
+        return node
+    return decorate
+
+
+class LLMMetricsHandler(BaseCallbackHandler):
+    """LangChain callback recording llm_request_seconds and an "llm" span per model call."""
+
+    run_inline = True  # Keep the caller's context, so spans nest under the node
+
+    def __init__(self, metrics: Metrics):
+        self.metrics = metrics
+        self._runs: Dict[UUID, Tuple[Span, float, str]] = {}
+
+    def _start(self, serialized: Optional[dict], run_id: UUID, kwargs: dict) -> None:
+        params = kwargs.get("invocation_params") or {}
+        model = params.get("model") or params.get("model_name") or params.get("_type") or (serialized or {}).get("name") or "unknown"
+        span = self.metrics.start_span("llm", {"model": model}, activate=False)
+        self._runs[run_id] = (span, time.perf_counter(), model)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, **kwargs) -> None:
+        self._start(serialized, run_id, kwargs)
+
+    def on_llm_start(self, serialized, prompts, *, run_id: UUID, **kwargs) -> None:
+        self._start(serialized, run_id, kwargs)
+
+    def _finish(self, run_id: UUID, error: Optional[BaseException]) -> None:
+        run = self._runs.pop(run_id, None)
+        if run is None:
+            return
+        span, started, model = run
+        status = "error" if error is not None else "ok"
+        self.metrics.observe("llm_request_seconds", time.perf_counter() - started, {"model": model, "status": status})
+        self.metrics.end_span(span, error)
+
+    def on_llm_end(self, response, *, run_id: UUID, **kwargs) -> None:
+        self._finish(run_id, None)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs) -> None:
+        self._finish(run_id, error)
+
+
+_llm_handler = LLMMetricsHandler(_metrics)
+
+
+def llm_config() -> Optional[dict]:
+    """RunnableConfig for chain calls: the LLM metrics callback, or None when disabled."""
+    if not _metrics.enabled:
+        return None
+    return {"callbacks": [_llm_handler]}
@@ -0,0 +1,177 @@
+import asyncio
+import threading
+import time
+import weakref
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, List, Optional, Sequence
+
+BatchFn = Callable[[List[Any]], Sequence[Any]]
+AsyncBatchFn = Callable[[List[Any]], Awaitable[Sequence[Any]]]
+
+
+class _LoopQueue:
+    __slots__ = ("pending", "timer", "slots", "tasks")
+
+    def __init__(self, max_concurrent_batches: int):
+        self.pending: List[tuple] = []
+        self.timer: Optional[asyncio.TimerHandle] = None
+        self.slots = asyncio.Semaphore(max_concurrent_batches)
+        self.tasks: set = set()  # The loop only keeps weak references to tasks
+
+
+class MicroBatcher:
+    """Queue concurrent single-item calls and run them as batches.
+
+    A batch is flushed once `max_batch_size` items are waiting or the oldest
+    has waited `max_wait_ms`. `run_batch(items)` / `arun_batch(items)` return
+    one result per item, in order; a result that is an exception is raised
+    to that caller only, while an exception from the batch call itself goes
+    to every caller in it. At most `max_concurrent_batches` batches run at a
+    time; items arriving meanwhile keep queueing, so batches grow under load.
+    """
+
+    def __init__(
+        self,
+        run_batch: Optional[BatchFn] = None,
+        arun_batch: Optional[AsyncBatchFn] = None,
+        max_batch_size: int = 16,
+        max_wait_ms: float = 5.0,
+        max_concurrent_batches: int = 1,
+        name: str = "micro-batch",
+    ):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        self.run_batch = run_batch
+        self.arun_batch = arun_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.max_concurrent_batches = max_concurrent_batches
+        self.name = name
+        self._cond = threading.Condition()
+        self._pending: List[tuple] = []
+        self._slots = threading.Semaphore(max_concurrent_batches)
+        self._flusher: Optional[threading.Thread] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # Futures belong to one event loop, so async queues are kept per loop
+        self._queues: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopQueue]" = weakref.WeakKeyDictionary()
+        self.batches = 0
+        self.items = 0
+
+    @staticmethod
+    def _settle(futures: List[Any], results: Sequence[Any], error: Optional[BaseException]) -> None:
+        if error is None and len(results) != len(futures):
+            error = RuntimeError(f"batch returned {len(results)} results for {len(futures)} items")
+        for i, future in enumerate(futures):
+            if future.done():  # Caller was cancelled
+                continue
+            outcome = error if error is not None else results[i]
+            if isinstance(outcome, BaseException):
+                future.set_exception(outcome)
+            else:
+                future.set_result(outcome)
+
+    def _count(self, size: int) -> None:
+        with self._cond:
+            self.batches += 1
+            self.items += size
+
+    # Threads
+
+    def submit(self, item: Any) -> Any:
+        """Queue `item` and block until its batch has run; returns (or raises) its result."""
+        if self.run_batch is None:
+            raise RuntimeError("no run_batch given for synchronous calls")
+        future: Future = Future()
+        with self._cond:
+            self._pending.append((item, future, time.monotonic()))
+            if self._flusher is None:
+                self._executor = ThreadPoolExecutor(self.max_concurrent_batches, thread_name_prefix=self.name)
+                self._flusher = threading.Thread(target=self._flush_forever, name=f"{self.name}-flusher", daemon=True)
+                self._flusher.start()
+            self._cond.notify()
+        return future.result()
+
+    def _flush_forever(self) -> None:
+        while True:
+            # Wait for a free slot first: items keep arriving meanwhile
+            self._slots.acquire()
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                deadline = self._pending[0][2] + self.max_wait
+                while len(self._pending) < self.max_batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = self._pending[:self.max_batch_size]
+                del self._pending[:self.max_batch_size]
+            self._executor.submit(self._run, batch)
+
+    def _run(self, batch: List[tuple]) -> None:
+        futures = [future for _, future, _ in batch]
+        try:
+            self._count(len(batch))
+            try:
+                results = self.run_batch([item for item, _, _ in batch])
+            except BaseException as e:
+                self._settle(futures, (), e)
+            else:
+                self._settle(futures, results, None)
+        finally:
+            self._slots.release()
+
+    # asyncio
+
+    async def asubmit(self, item: Any) -> Any:
+        """Async counterpart of `submit()`; batches callers on the same event loop."""
+        if self.arun_batch is None:
+            raise RuntimeError("no arun_batch given for async calls")
+        loop = asyncio.get_running_loop()
+        queue = self._queues.get(loop)
+        if queue is None:
+            queue = self._queues[loop] = _LoopQueue(self.max_concurrent_batches)
+        future = loop.create_future()
+        queue.pending.append((item, future))
+        if len(queue.pending) >= self.max_batch_size:
+            self._aflush(loop, queue)
+        elif queue.timer is None:
+            queue.timer = loop.call_later(self.max_wait, self._aflush, loop, queue)
+        return await future
+
+    def _aflush(self, loop: asyncio.AbstractEventLoop, queue: _LoopQueue) -> None:
+        if queue.timer is not None:
+            queue.timer.cancel()
+            queue.timer = None
+        batch = queue.pending[:self.max_batch_size]
+        del queue.pending[:self.max_batch_size]
+        if queue.pending:
+            queue.timer = loop.call_later(self.max_wait, self._aflush, loop, queue)
+        if batch:
+            task = loop.create_task(self._arun(queue, batch))
+            queue.tasks.add(task)
+            task.add_done_callback(queue.tasks.discard)
+
+    async def _arun(self, queue: _LoopQueue, batch: List[tuple]) -> None:
+        futures = [future for _, future in batch]
+        async with queue.slots:
+            self._count(len(batch))
+            try:
+                results = await self.arun_batch([item for item, _ in batch])
+            except asyncio.CancelledError:
+                for future in futures:
+                    future.cancel()
+                raise
+            except Exception as e:
+                self._settle(futures, (), e)
+            else:
+                self._settle(futures, results, None)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "batches": self.batches,
+                "items": self.items,
+                "mean_batch_size": self.items / self.batches if self.batches else 0.0,
+                "waiting": len(self._pending) + sum(len(q.pending) for q in self._queues.values()),
+            }
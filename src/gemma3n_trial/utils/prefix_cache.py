@@ -0,0 +1,80 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+def kv_nbytes(kv: Any) -> int:
+    """Bytes held by a transformers KV cache (DynamicCache, old or new layout)."""
+    layers = getattr(kv, "layers", None)
+    if layers is not None:
+        tensors = [t for layer in layers for t in (getattr(layer, "keys", None), getattr(layer, "values", None))]
+    else:
+        tensors = [*getattr(kv, "key_cache", ()), *getattr(kv, "value_cache", ())]
+    return sum(t.nbytes for t in tensors if t is not None)
+
+
+class PrefixKVCache:
+    """Thread-safe LRU of prompt-prefix KV caches, bounded by total bytes.
+
+    Entries are the attention keys/values of a prompt prefix (system prompt +
+    recipe), so follow-up turns only prefill what comes after it. Callers
+    must copy an entry before generating from it: generation appends to it.
+    """
+
+    def __init__(self, max_bytes: int = 512 * 2**20, max_entries: int = 64):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, kv: Any, nbytes: Optional[int] = None) -> bool:
+        """Store `kv`, evicting least recently used entries; False if it can never fit."""
+        nbytes = kv_nbytes(kv) if nbytes is None else nbytes
+        if nbytes > self.max_bytes:
+            return False
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            self._data[key] = (kv, nbytes)
+            self.bytes += nbytes
+            while self.bytes > self.max_bytes or len(self._data) > self.max_entries:
+                _, (_, evicted) = self._data.popitem(last=False)
+                self.bytes -= evicted
+                self.evictions += 1
+        return True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.bytes = self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -0,0 +1,96 @@
+import html
+import re
+from typing import Optional, Sequence
+from gemma3n_trial.schema import DetailedRecipe
+from gemma3n_trial.utils.lru_cache import LRUCache
+from gemma3n_trial.utils.tokens import TokenCounter, count_tokens, truncate_to_tokens
+
+# Output order; also the order of importance for answering follow-ups.
+DEFAULT_FIELDS = ("title", "servings", "readyInMinutes", "ingredients", "instructions", "summary")
+# Under budget pressure: drop these whole first, then shorten the others.
+DROPPABLE_FIELDS = ("summary",)
+TRUNCATABLE_FIELDS = ("instructions", "ingredients")
+
+_BLOCK_TAGS = re.compile(r"<\s*(br|/li|/p|/ol|/ul|/div|/h\d)\s*/?>", re.IGNORECASE)
+_TAGS = re.compile(r"<[^>]+>")
+
+
+def strip_html(text: Optional[str]) -> str:
+    if not text:
+        return ""
+    text = _BLOCK_TAGS.sub("\n", text)
+    text = html.unescape(_TAGS.sub("", text))
+    lines = (re.sub(r"[ \t]+", " ", line).strip() for line in text.splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+class RecipeContextBuilder:
+    """Formats a DetailedRecipe into compact prompt context.
+
+    HTML is stripped, only `fields` are kept, and when `max_tokens` is set the
+    summary is dropped and then instructions/ingredients shortened until the
+    context fits. Results are cached per recipe id, so follow-up turns on the
+    same recipe do no formatting work.
+    """
+
+    def __init__(
+        self,
+        fields: Sequence[str] = DEFAULT_FIELDS,
+        max_tokens: Optional[int] = None,
+        token_counter: TokenCounter = count_tokens,
+        max_cached: int = 256,
+    ):
+        self.fields = tuple(f for f in DEFAULT_FIELDS if f in fields)
+        self.max_tokens = max_tokens
+        self.token_counter = token_counter
+        self.cache = LRUCache(max_entries=max_cached)
+
+    @staticmethod
+    def _section(recipe: DetailedRecipe, field: str) -> Optional[str]:
+        if field == "title":
+            return f"Title: {recipe.title}"
+        if field == "servings" and recipe.servings:
+            return f"Servings: {recipe.servings}"
+        if field == "readyInMinutes" and recipe.readyInMinutes:
+            return f"Ready in: {recipe.readyInMinutes} minutes"
+        if field == "ingredients" and recipe.ingredients:
+            return "Ingredients: " + "; ".join(recipe.ingredients)
+        if field == "instructions" and recipe.instructions:
+            return "Instructions:\n" + strip_html(recipe.instructions)
+        if field == "summary" and recipe.summary:
+            return "Summary: " + strip_html(recipe.summary)
+        return None
+
+    def _fit(self, sections: dict) -> dict:
+        def total() -> int:
+            return self.token_counter("\n".join(sections.values()))
+
+        for field in DROPPABLE_FIELDS:
+            if total() <= self.max_tokens:
+                return sections
+            sections.pop(field, None)
+        for field in TRUNCATABLE_FIELDS:
+            over = total() - self.max_tokens
+            if over <= 0:
+                break
+            if field in sections:
+                allowed = max(0, self.token_counter(sections[field]) - over)
+                sections[field] = truncate_to_tokens(sections[field], allowed, self.token_counter)
+        return {k: v for k, v in sections.items() if v}
+
+    def build(self, recipe: DetailedRecipe) -> str:
+        cached = self.cache.get(recipe.id)
+        if cached is not None:
+            return cached
+
+        sections = {}
+        for field in self.fields:
+            section = self._section(recipe, field)
+            if section:
+                sections[field] = section
+        if self.max_tokens is not None:
+            sections = self._fit(sections)
+
+        context = "\n".join(sections.values())
+        self.cache.set(recipe.id, context)
+        return context
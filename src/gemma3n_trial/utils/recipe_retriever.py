@@ -0,0 +1,130 @@
+import re
+from typing import Dict, List, Optional
+import numpy as np
+from gemma3n_trial.schema import DetailedRecipe
+from gemma3n_trial.utils.lru_cache import LRUCache
+from gemma3n_trial.utils.recipe_context import RecipeContextBuilder, strip_html
+from gemma3n_trial.utils.tokens import TokenCounter, count_tokens
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be but by can do does for from how i if in into is it its me my "
+    "of on or should so than that the then there this to use was what when where which "
+    "while who why will with you your".split()
+)
+# "1. Cook pasta. 2. Mix eggs." -> numbered steps; otherwise split on sentence ends
+_NUMBERED_STEP = re.compile(r"(?:^|\s)\d+[.)]\s+")
+_SENTENCE_END = re.compile(r"(?<=[^\d\s][.!?])\s+")
+
+
+def tokenize(text: str) -> List[str]:
+    words = (w for w in _WORD_RE.findall(text.lower()) if w not in _STOPWORDS)
+    # Crude plural folding so "eggs" matches "egg"
+    return [w[:-1] if len(w) > 3 and w.endswith("s") and not w.endswith("ss") else w for w in words]
+
+
+def _split_steps(instructions: Optional[str]) -> List[str]:
+    steps = []
+    for line in strip_html(instructions).splitlines():
+        if len(_NUMBERED_STEP.findall(line)) >= 2:
+            parts = _NUMBERED_STEP.split(line)
+        else:
+            parts = _SENTENCE_END.split(line)
+        steps.extend(p.strip() for p in parts if p.strip())
+    return steps
+
+
+def chunk_recipe(recipe: DetailedRecipe, ingredients_per_chunk: int = 4) -> List[str]:
+    """Split a recipe into retrievable chunks: ingredient groups, then one chunk per step."""
+    chunks = []
+    ingredients = recipe.ingredients or []
+    for start in range(0, len(ingredients), ingredients_per_chunk):
+        chunks.append("Ingredients: " + "; ".join(ingredients[start:start + ingredients_per_chunk]))
+    for number, step in enumerate(_split_steps(recipe.instructions), 1):
+        chunks.append(f"Step {number}: {step}")
+    return chunks
+
+
+class BM25Index:
+    """Okapi BM25 over a small in-memory corpus, scored with NumPy."""
+
+    def __init__(self, docs: List[str], k1: float = 1.5, b: float = 0.75):
+        self.docs = docs
+        tokenized = [tokenize(d) for d in docs]
+        self.vocab: Dict[str, int] = {}
+        for tokens in tokenized:
+            for token in tokens:
+                self.vocab.setdefault(token, len(self.vocab))
+
+        tf = np.zeros((len(docs), len(self.vocab)), dtype=np.float32)
+        for row, tokens in enumerate(tokenized):
+            for token in tokens:
+                tf[row, self.vocab[token]] += 1
+        lengths = tf.sum(axis=1)
+        avg_length = lengths.mean() if len(docs) else 0.0
+
+        df = (tf > 0).sum(axis=0)
+        self.idf = np.log(1 + (len(docs) - df + 0.5) / (df + 0.5))
+        # Precompute the saturated term weights; a query is then a column sum
+        norm = k1 * (1 - b + b * lengths / (avg_length or 1.0))
+        self.weights = tf * (k1 + 1) / (tf + norm[:, None]) * self.idf
+
+    def scores(self, query: str) -> np.ndarray:
+        columns = [self.vocab[t] for t in set(tokenize(query)) if t in self.vocab]
+        if not columns:
+            return np.zeros(len(self.docs), dtype=np.float32)
+        return self.weights[:, columns].sum(axis=1)
+
+    def top_k(self, query: str, k: int) -> List[int]:
+        """Indices of the best `k` matching docs (score > 0), in document order."""
+        scores = self.scores(query)
+        best = np.argsort(-scores, kind="stable")[:k]
+        return sorted(int(i) for i in best if scores[i] > 0)
+
+
+class RecipeRetriever:
+    """Builds follow-up context from only the recipe chunks relevant to the question.
+
+    The title and servings always go in; the rest is the `top_k` BM25 matches
+    among ingredient groups and steps. Recipes whose full context is already
+    under `min_tokens`, and questions that match no chunk ("summarize this"),
+    get the full `fallback` context instead. Indexes are cached per recipe id.
+    """
+
+    def __init__(
+        self,
+        top_k: int = 4,
+        min_tokens: int = 250,
+        fallback: Optional[RecipeContextBuilder] = None,
+        token_counter: TokenCounter = count_tokens,
+        max_cached: int = 256,
+    ):
+        self.top_k = top_k
+        self.min_tokens = min_tokens
+        self.fallback = fallback or RecipeContextBuilder()
+        self.token_counter = token_counter
+        self.indexes = LRUCache(max_entries=max_cached)
+
+    def _index(self, recipe: DetailedRecipe) -> BM25Index:
+        index = self.indexes.get(recipe.id)
+        if index is None:
+            index = BM25Index(chunk_recipe(recipe))
+            self.indexes.set(recipe.id, index)
+        return index
+
+    def build(self, recipe: DetailedRecipe, question: str) -> str:
+        full = self.fallback.build(recipe)
+        if self.token_counter(full) <= self.min_tokens:
+            return full
+
+        index = self._index(recipe)
+        hits = index.top_k(question, self.top_k)
+        if not hits:
+            return full
+
+        lines = [f"Title: {recipe.title}"]
+        if recipe.servings:
+            lines.append(f"Servings: {recipe.servings}")
+        lines.append("Relevant parts of the recipe:")
+        lines.extend(index.docs[i] for i in hits)
+        return "\n".join(lines)
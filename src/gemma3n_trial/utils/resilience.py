@@ -0,0 +1,315 @@
+import asyncio
+import os
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, FrozenSet, Mapping, Optional
+import httpx
+from gemma3n_trial.utils.metrics import get_metrics
+
+# 402 is Spoonacular's "daily quota used up"; retrying it only burns time
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+QUOTA_EXCEEDED_STATUS = 402
+
+
+class CircuitOpenError(httpx.HTTPError):
+    """Upstream has been failing; calls fail fast until the breaker's cool-down ends."""
+
+    def __init__(self, retry_in: float):
+        super().__init__(f"Spoonacular circuit open, retry in {retry_in:.0f}s")
+        self.retry_in = retry_in
+
+
+class QuotaExceededError(httpx.HTTPError):
+    """The daily Spoonacular quota is spent; calls fail fast until it resets."""
+
+    def __init__(self, retry_in: float):
+        super().__init__(f"Spoonacular quota exhausted, resets in {retry_in:.0f}s")
+        self.retry_in = retry_in
+
+
+def _retry_after(headers: Mapping[str, str]) -> Optional[float]:
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+def _seconds_until_utc_midnight(now: Optional[float] = None) -> float:
+    # Spoonacular quotas reset at midnight UTC
+    current = datetime.fromtimestamp(time.time() if now is None else now, timezone.utc)
+    midnight = (current + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    return (midnight - current).total_seconds()
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter: attempt n sleeps U(0, min(max_delay, base * 2**(n-1)))."""
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay: float = 0.25,
+        max_delay: float = 4.0,
+        statuses: FrozenSet[int] = RETRY_STATUSES,
+    ):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.statuses = statuses
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> Optional[float]:
+        """Seconds to wait before retrying after `attempt` failed, or None to give up."""
+        if attempt >= self.max_attempts:
+            return None
+        if retry_after is not None:
+            # Honour the server, but don't park a user request for minutes
+            return retry_after if retry_after <= self.max_delay else None
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+
+class CircuitBreaker:
+    """Opens after `failure_threshold` consecutive failures and fails fast for `reset_timeout`.
+
+    After the cool-down one probe call goes through (half-open): success
+    closes the breaker, failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0, clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = "closed"
+        self.failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def _transition(self, state: str) -> None:
+        if state != self.state:
+            self.state = state
+            get_metrics().count("circuit_breaker_transitions_total", {"state": state})
+
+    def before_call(self) -> None:
+        with self._lock:
+            if self.state == "closed":
+                return
+            retry_in = self._opened_at + self.reset_timeout - self.clock()
+            if self.state == "open" and retry_in <= 0:
+                self._transition("half_open")
+            if self.state == "half_open" and not self._probing:
+                self._probing = True
+                return
+            raise CircuitOpenError(max(retry_in, 0.0))
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self._probing = False
+            self._transition("closed")
+
+    def release(self) -> None:
+        """The call ended without a verdict (e.g. cancelled); let another probe through."""
+        with self._lock:
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                self._opened_at = self.clock()
+                self._transition("open")
+
+
+class QuotaRateLimiter:
+    """Client-side pacing from a fixed rate and Spoonacular's quota headers.
+
+    `reserve()` hands out start times at least `1 / max_per_second` apart.
+    Once X-API-Quota-Left drops below `pace_below` points, the remaining
+    points are spread evenly over the time left until the daily reset (at
+    most `max_interval` apart), so a burst slows down instead of spending the
+    quota and getting 402s for the rest of the day. At `reserve_points` or
+    below, calls fail fast with QuotaExceededError until the reset.
+    """
+
+    def __init__(
+        self,
+        max_per_second: Optional[float] = None,
+        pace_below: float = 50.0,
+        reserve_points: float = 0.0,
+        max_interval: float = 2.0,
+        clock: Callable[[], float] = time.monotonic,
+        until_reset: Callable[[], float] = _seconds_until_utc_midnight,
+    ):
+        self.max_per_second = max_per_second
+        self.pace_below = pace_below
+        self.reserve_points = reserve_points
+        self.max_interval = max_interval
+        self.clock = clock
+        self.until_reset = until_reset
+        self.quota_used: Optional[float] = None
+        self.quota_left: Optional[float] = None
+        self.request_cost = 1.0
+        self._exhausted_until = 0.0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def _interval(self) -> float:
+        interval = 1.0 / self.max_per_second if self.max_per_second else 0.0
+        if self.quota_left is not None and self.quota_left < self.pace_below:
+            requests_left = max((self.quota_left - self.reserve_points) / self.request_cost, 1.0)
+            interval = max(interval, min(self.until_reset() / requests_left, self.max_interval))
+        return interval
+
+    def reserve(self) -> float:
+        """Claim the next slot; returns how long the caller must sleep first."""
+        with self._lock:
+            now = self.clock()
+            if now < self._exhausted_until:
+                raise QuotaExceededError(self._exhausted_until - now)
+            start = max(now, self._next_slot)
+            self._next_slot = start + self._interval()
+            return start - now
+
+    def update(self, headers: Mapping[str, str], status_code: int) -> None:
+        headers = {k.lower(): v for k, v in headers.items()}
+        with self._lock:
+            try:
+                if "x-api-quota-request" in headers:
+                    self.request_cost = max(float(headers["x-api-quota-request"]), 1.0)
+                if "x-api-quota-used" in headers:
+                    self.quota_used = float(headers["x-api-quota-used"])
+                if "x-api-quota-left" in headers:
+                    self.quota_left = float(headers["x-api-quota-left"])
+            except ValueError:
+                pass
+            spent = self.quota_left is not None and self.quota_left <= self.reserve_points
+            if status_code == QUOTA_EXCEEDED_STATUS or spent:
+                self._exhausted_until = self.clock() + self.until_reset()
+
+
+class Resilience:
+    """Retry, circuit breaking and rate limiting around one Spoonacular request.
+
+    `call(send)` / `acall(send)` run `send()` (which performs a single HTTP
+    request and returns the response) and retry transport errors and
+    RETRY_STATUSES with jittered backoff. The last response is returned
+    as-is, so callers keep using `raise_for_status()`. Share one instance
+    between agents that use the same API key: the breaker and the quota
+    are per upstream account, not per agent.
+    """
+
+    def __init__(
+        self,
+        retry: Optional[RetryPolicy] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        limiter: Optional[QuotaRateLimiter] = None,
+    ):
+        self.retry = retry or RetryPolicy()
+        self.breaker = breaker or CircuitBreaker()
+        self.limiter = limiter or QuotaRateLimiter()
+
+    def _after(self, attempt: int, response: Optional[httpx.Response], error: Optional[Exception]) -> Optional[float]:
+        """Book-keep one attempt; returns the backoff before the next one, or None if done."""
+        if response is not None:
+            self.limiter.update(response.headers, response.status_code)
+            if response.status_code not in self.retry.statuses:
+                self.breaker.record_success()
+                return None
+            # 429 means "slow down", not "down"; only server errors count against the breaker
+            if response.status_code >= 500:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+            reason = str(response.status_code)
+            delay = self.retry.delay(attempt, _retry_after(response.headers))
+        else:
+            self.breaker.record_failure()
+            reason = type(error).__name__
+            delay = self.retry.delay(attempt)
+        if self.breaker.state == "open":
+            # This failure tripped the breaker: surface it rather than retrying into CircuitOpenError
+            return None
+        if delay is not None:
+            get_metrics().count("spoonacular_retries_total", {"reason": reason})
+        return delay
+
+    def call(self, send: Callable[[], httpx.Response]) -> httpx.Response:
+        attempt = 0
+        while True:
+            attempt += 1
+            self.breaker.before_call()
+            # From here on this call may hold the half-open probe: anything that
+            # ends it without a verdict (quota, cancellation) must release it
+            try:
+                wait = self.limiter.reserve()
+                if wait:
+                    time.sleep(wait)
+                response, error = send(), None
+            except httpx.TransportError as e:
+                response, error = None, e
+            except BaseException:
+                self.breaker.release()
+                raise
+            delay = self._after(attempt, response, error)
+            if delay is None:
+                if error is not None:
+                    raise error
+                return response
+            time.sleep(delay)
+
+    async def acall(self, send: Callable[[], Awaitable[httpx.Response]]) -> httpx.Response:
+        attempt = 0
+        while True:
+            attempt += 1
+            self.breaker.before_call()
+            try:
+                wait = self.limiter.reserve()
+                if wait:
+                    await asyncio.sleep(wait)
+                response, error = await send(), None
+            except httpx.TransportError as e:
+                response, error = None, e
+            except BaseException:
+                self.breaker.release()
+                raise
+            delay = self._after(attempt, response, error)
+            if delay is None:
+                if error is not None:
+                    raise error
+                return response
+            await asyncio.sleep(delay)
+
+
+_resilience: Optional[Resilience] = None
+_lock = threading.Lock()
+
+
+def get_resilience() -> Resilience:
+    """Process-wide instance shared by all Spoonacular agents, created on first use.
+
+    SPOONACULAR_MAX_RPS caps the request rate (unset: only quota pacing).
+    """
+    global _resilience
+    if _resilience is None:
+        with _lock:
+            if _resilience is None:
+                max_rps = os.getenv("SPOONACULAR_MAX_RPS")
+                _resilience = Resilience(limiter=QuotaRateLimiter(max_per_second=float(max_rps) if max_rps else None))
+    return _resilience
+
+
+def set_resilience(resilience: Optional[Resilience]) -> None:
+    """Replace the process-wide instance; None rebuilds it with defaults on next use."""
+    global _resilience
+    with _lock:
+        _resilience = resilience
@@ -0,0 +1,212 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+DEFAULT_CACHE_PATH = os.path.join(
+    os.path.expanduser("~"), ".cache", "gemma3n_trial", "spoonacular.sqlite3"
+)
+
+# Search rankings drift as Spoonacular adds recipes; recipe details barely change.
+DEFAULT_TTLS: Dict[str, float] = {
+    "complexSearch": 6 * 3600,
+    "information": 7 * 24 * 3600,
+}
+DEFAULT_TTL = 24 * 3600
+
+# Never part of a cache key
+_IGNORED_PARAMS = {"apiKey"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    endpoint TEXT NOT NULL,
+    value TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access);
+"""
+
+
+def normalize_query(query: str) -> str:
+    # "  Butter   Chicken! " and "butter chicken" should share an entry
+    query = re.sub(r"\s+", " ", query.strip().lower())
+    return query.strip(" .,!?;:")
+
+
+class ResponseCache:
+    """SQLite-backed cache of Spoonacular JSON payloads.
+
+    Entries are keyed on endpoint name plus normalized request params, expire
+    after a per-endpoint TTL and are evicted least-recently-used once the table
+    grows past `max_entries`. The database runs in WAL mode with one connection
+    per thread and process, so several workers can share the same file.
+    Cache errors are swallowed: a broken cache degrades to a miss.
+
+    Hits don't write: access times are buffered and written in one batch
+    (with the next `set`, or every `access_batch` hits / `access_flush_interval`
+    seconds). The table size is checked every `evict_every` inserts, so it
+    can briefly run over `max_entries` by that many rows per process.
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_CACHE_PATH,
+        max_entries: int = 10_000,
+        ttls: Optional[Dict[str, float]] = None,
+        default_ttl: float = DEFAULT_TTL,
+        busy_timeout: float = 5.0,
+        access_batch: int = 64,
+        access_flush_interval: float = 30.0,
+        evict_every: Optional[int] = None,
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.default_ttl = default_ttl
+        self.busy_timeout = busy_timeout
+        self.access_batch = access_batch
+        self.access_flush_interval = access_flush_interval
+        # Default: overshoot max_entries by at most ~1%
+        self.evict_every = evict_every or min(100, max(1, max_entries // 100))
+        self._local = threading.local()
+        self._pending_lock = threading.Lock()
+        self._accessed: Dict[str, float] = {}  # key -> last hit not yet written
+        self._accessed_since = time.monotonic()
+        self._inserts = 0
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    # ---- connection handling ----
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        # sqlite connections must not cross a fork, so reconnect in child processes
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    # ---- keys ----
+
+    @staticmethod
+    def make_key(endpoint: str, params: Dict[str, Any]) -> str:
+        cleaned = {k: v for k, v in params.items() if k not in _IGNORED_PARAMS}
+        if isinstance(cleaned.get("query"), str):
+            cleaned["query"] = normalize_query(cleaned["query"])
+        raw = endpoint + ":" + json.dumps(cleaned, sort_keys=True, default=str)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def ttl_for(self, endpoint: str) -> float:
+        return self.ttls.get(endpoint, self.default_ttl)
+
+    # ---- public API ----
+
+    def get(self, endpoint: str, params: Dict[str, Any]) -> Optional[Any]:
+        key = self.make_key(endpoint, params)
+        now = time.time()
+        try:
+            conn = self._conn()
+            row = conn.execute(
+                "SELECT value, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] <= now:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+        except sqlite3.Error:
+            return None
+        self._touch(key, now)
+        return json.loads(row[0])
+
+    def _touch(self, key: str, now: float) -> None:
+        with self._pending_lock:
+            self._accessed[key] = now
+            due = (
+                len(self._accessed) >= self.access_batch
+                or time.monotonic() - self._accessed_since >= self.access_flush_interval
+            )
+        if due:
+            try:
+                conn = self._conn()
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    self._write_accesses(conn)
+                    conn.execute("COMMIT")
+                except BaseException:
+                    conn.execute("ROLLBACK")
+                    raise
+            except sqlite3.Error:
+                pass  # Only LRU order suffers; the hit already happened
+
+    def _write_accesses(self, conn: sqlite3.Connection) -> None:
+        with self._pending_lock:
+            accessed, self._accessed = self._accessed, {}
+            self._accessed_since = time.monotonic()
+        if accessed:
+            conn.executemany(
+                "UPDATE responses SET last_access = MAX(last_access, ?) WHERE key = ?",
+                [(at, key) for key, at in accessed.items()],
+            )
+
+    def set(self, endpoint: str, params: Dict[str, Any], value: Any) -> None:
+        key = self.make_key(endpoint, params)
+        now = time.time()
+        try:
+            conn = self._conn()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, endpoint, value, expires_at, last_access) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, endpoint, json.dumps(value), now + self.ttl_for(endpoint), now),
+                )
+                self._write_accesses(conn)
+                with self._pending_lock:
+                    self._inserts += 1
+                    check = self._inserts % self.evict_every == 0
+                if check:
+                    self._evict(conn, now)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        except sqlite3.Error:
+            pass
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        (count,) = conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+        if count <= self.max_entries:
+            return
+        conn.execute("DELETE FROM responses WHERE expires_at <= ?", (now,))
+        (count,) = conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+        overflow = count - self.max_entries
+        if overflow > 0:
+            conn.execute(
+                "DELETE FROM responses WHERE key IN "
+                "(SELECT key FROM responses ORDER BY last_access ASC LIMIT ?)",
+                (overflow,),
+            )
+
+    def clear(self) -> None:
+        try:
+            self._conn().execute("DELETE FROM responses")
+        except sqlite3.Error:
+            pass
+
+    def __len__(self) -> int:
+        try:
+            (count,) = self._conn().execute("SELECT COUNT(*) FROM responses").fetchone()
+            return count
+        except sqlite3.Error:
+            return 0
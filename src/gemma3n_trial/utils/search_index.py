@@ -0,0 +1,264 @@
+import atexit
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+import weakref
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Tuple
+from gemma3n_trial.schema import DetailedRecipe, RecipeSearchResult, RecipeSearchResults
+from gemma3n_trial.utils.recipe_context import strip_html
+from gemma3n_trial.utils.recipe_retriever import tokenize
+from gemma3n_trial.utils.response_cache import DEFAULT_TTLS, normalize_query
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, merging still narrows the window
+    fcntl = None
+
+DEFAULT_INDEX_PATH = os.path.join(
+    os.path.expanduser("~"), ".cache", "gemma3n_trial", "recipe_index.json"
+)
+
+# Title terms count this many times; a title hit beats an ingredient hit
+TITLE_BOOST = 3
+# 2: remembered queries carry the time they were fetched
+INDEX_VERSION = 2
+
+# Indexes with a save pending, flushed at interpreter exit
+_live_indexes: "weakref.WeakSet[RecipeSearchIndex]" = weakref.WeakSet()
+
+
+def flush_search_indexes() -> None:
+    """Write every index with unsaved changes now (shutdown hooks)."""
+    for index in list(_live_indexes):
+        index.flush()
+
+
+atexit.register(flush_search_indexes)
+
+
+class RecipeSearchIndex:
+    """Inverted index with BM25 ranking over recipes we have already fetched.
+
+    Search results contribute their titles, detailed recipes add ingredients
+    and summary text. The result list complexSearch returned for each query
+    is remembered too, for `query_ttl` seconds (complexSearch's cache TTL),
+    so repeated queries are answered exactly. Inserts are incremental.
+
+    `save()` merges what other processes wrote since, then writes the index
+    to `path` atomically (path=None keeps it in memory only). Callers on the
+    request path use `schedule_save()`, which batches all changes made within
+    `save_interval` seconds into one write.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = DEFAULT_INDEX_PATH,
+        k1: float = 1.2,
+        b: float = 0.75,
+        query_ttl: float = DEFAULT_TTLS["complexSearch"],
+        save_interval: float = 5.0,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self.query_ttl = query_ttl
+        self.save_interval = save_interval
+        self.clock = clock  # Wall clock: query timestamps are persisted
+        self._save_timer: Optional[threading.Timer] = None
+        self._lock = threading.RLock()
+        self._titles: Dict[int, str] = {}
+        self._terms: Dict[int, Dict[str, int]] = {}  # doc id -> term frequencies
+        self._postings: Dict[str, Dict[int, int]] = {}  # term -> {doc id: tf}
+        self._lengths: Dict[int, int] = {}
+        self._total_length = 0
+        self._queries: Dict[str, dict] = {}  # normalized query -> {"ids": [...], "at": fetch time}
+        self.dirty = False
+        if path and os.path.exists(path):
+            self.load()
+
+    # -------------------------
+    # Inserts
+    # -------------------------
+    def _remove(self, doc_id: int) -> None:
+        for term in self._terms.pop(doc_id, {}):
+            del self._postings[term][doc_id]
+            if not self._postings[term]:
+                del self._postings[term]
+        self._total_length -= self._lengths.pop(doc_id, 0)
+
+    def _insert(self, doc_id: int, title: str, terms: Dict[str, int]) -> None:
+        self._remove(doc_id)
+        self._titles[doc_id] = title
+        self._terms[doc_id] = terms
+        for term, tf in terms.items():
+            self._postings.setdefault(term, {})[doc_id] = tf
+        self._lengths[doc_id] = sum(terms.values())
+        self._total_length += self._lengths[doc_id]
+        self.dirty = True
+
+    def add(self, doc_id: int, title: str, text: str = "") -> None:
+        terms = Counter(tokenize(text))
+        for term in tokenize(title):
+            terms[term] += TITLE_BOOST
+        with self._lock:
+            # Don't let a title-only search hit overwrite a richer recipe entry
+            known = self._terms.get(doc_id)
+            if not text and known is not None and self._titles.get(doc_id) == title:
+                return
+            self._insert(doc_id, title, dict(terms))
+
+    def add_results(self, results: RecipeSearchResults, query: Optional[str] = None) -> None:
+        with self._lock:
+            for result in results.results:
+                self.add(result.id, result.title)
+            if query is not None:
+                self._queries[normalize_query(query)] = {"ids": [r.id for r in results.results], "at": self.clock()}
+                self.dirty = True
+
+    def add_recipe(self, recipe: DetailedRecipe) -> None:
+        text = " ".join([" ".join(recipe.ingredients or []), strip_html(recipe.summary)])
+        self.add(recipe.id, recipe.title, text)
+
+    # -------------------------
+    # Lookups
+    # -------------------------
+    def known_query(self, query: str) -> Optional[List[RecipeSearchResult]]:
+        key = normalize_query(query)
+        with self._lock:
+            entry = self._queries.get(key)
+            if entry is None:
+                return None
+            if self.clock() - entry["at"] > self.query_ttl:
+                # Stale like the complexSearch cache entry it came from: ask upstream again
+                del self._queries[key]
+                self.dirty = True
+                return None
+            return [RecipeSearchResult(id=i, title=self._titles[i]) for i in entry["ids"] if i in self._titles]
+
+    def search(self, query: str, limit: int = 10, match_all: bool = True) -> List[Tuple[RecipeSearchResult, float]]:
+        """BM25-ranked matches; with `match_all`, only docs containing every query term."""
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+        with self._lock:
+            n_docs = len(self._terms)
+            if not n_docs:
+                return []
+            avg_length = self._total_length / n_docs
+            scores: Dict[int, float] = {}
+            matched: Counter = Counter()
+            for term in terms:
+                postings = self._postings.get(term, {})
+                idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, tf in postings.items():
+                    norm = self.k1 * (1 - self.b + self.b * self._lengths[doc_id] / avg_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+                    matched[doc_id] += 1
+            if match_all:
+                scores = {d: s for d, s in scores.items() if matched[d] == len(terms)}
+            ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
+            return [(RecipeSearchResult(id=d, title=self._titles[d]), s) for d, s in ranked]
+
+    def __len__(self) -> int:
+        return len(self._terms)
+
+    def __contains__(self, doc_id: int) -> bool:
+        return doc_id in self._terms
+
+    # -------------------------
+    # Persistence
+    # -------------------------
+    def schedule_save(self) -> None:
+        """Save within `save_interval` seconds; changes made meanwhile share that write."""
+        if not self.path:
+            return
+        if self.save_interval <= 0:
+            self.save()
+            return
+        with self._lock:
+            if self._save_timer is not None:
+                return
+            self._save_timer = threading.Timer(self.save_interval, self._timed_save)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+            _live_indexes.add(self)
+
+    def _timed_save(self) -> None:
+        with self._lock:
+            self._save_timer = None
+        self.save()
+
+    def flush(self) -> None:
+        """Save pending changes now."""
+        with self._lock:
+            timer, self._save_timer = self._save_timer, None
+        if timer is not None:
+            timer.cancel()
+        self.save()
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        with self._lock:
+            if not self.dirty:
+                return
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        # Other worker processes write the same file: hold the lock across
+        # read-merge-write so neither side's inserts are lost
+        with open(self.path + ".lock", "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            self.load()
+            with self._lock:
+                now = self.clock()
+                self._queries = {q: e for q, e in self._queries.items() if now - e["at"] <= self.query_ttl}
+                payload = json.dumps({
+                    "version": INDEX_VERSION,
+                    "docs": {str(d): {"title": self._titles[d], "terms": t} for d, t in self._terms.items()},
+                    "queries": self._queries,
+                })
+                self.dirty = False
+            # Write-then-rename so readers never see a half-written file
+            fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    f.write(payload)
+                os.replace(tmp, self.path)
+            except Exception:
+                with self._lock:
+                    self.dirty = True
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+                raise
+
+    def load(self) -> None:
+        """Merge the file into memory: unknown docs are added, newer query results win."""
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                payload = json.load(f)
+        except (OSError, ValueError):
+            # Unreadable index: start empty, it refills from live searches
+            return
+        version = payload.get("version")
+        if version not in (1, INDEX_VERSION):
+            return
+        with self._lock:
+            dirty = self.dirty
+            for doc_id, doc in payload.get("docs", {}).items():
+                # Keep whichever copy knows more, e.g. another process's detailed recipe
+                known = self._terms.get(int(doc_id))
+                if known is None or len(doc["terms"]) > len(known):
+                    self._insert(int(doc_id), doc["title"], doc["terms"])
+            # Version 1 queries have no fetch time; let them be searched again
+            if version == INDEX_VERSION:
+                for query, entry in payload.get("queries", {}).items():
+                    known = self._queries.get(query)
+                    if known is None or known["at"] < entry["at"]:
+                        self._queries[query] = entry
+            self.dirty = dirty
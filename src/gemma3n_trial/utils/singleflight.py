@@ -0,0 +1,83 @@
+import asyncio
+import threading
+import weakref
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Collapse concurrent calls with the same key into one execution.
+
+    The first caller for a key runs the function; callers arriving while it
+    is in flight wait and get the same result, or the same exception. Once
+    it finishes the key is forgotten, so later calls run again (put a cache
+    in front for that). Results are shared objects: treat them as read-only.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        # Futures belong to one event loop, so async flights are kept per loop
+        self._tasks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Hashable, asyncio.Task]]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self.shared = 0  # Calls answered by someone else's flight
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """Run `fn()` for `key` unless a thread already is; returns (or raises) its outcome."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.shared += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    async def do_async(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Async counterpart of `do()` for callers on the same event loop."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            tasks = self._tasks.setdefault(loop, {})
+        task = tasks.get(key)
+        if task is None:
+            # A task, not the leader's own coroutine: cancelling one caller must not cancel the others
+            task = tasks[key] = loop.create_task(fn())
+            task.add_done_callback(lambda t: self._forget(tasks, key, t))
+        else:
+            self.shared += 1
+        return await asyncio.shield(task)
+
+    @staticmethod
+    def _forget(tasks: Dict[Hashable, asyncio.Task], key: Hashable, task: asyncio.Task) -> None:
+        if tasks.get(key) is task:
+            del tasks[key]
+        if not task.cancelled():
+            task.exception()  # Mark retrieved even if every caller was cancelled
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls) + sum(len(tasks) for tasks in self._tasks.values())
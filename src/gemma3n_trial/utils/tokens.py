@@ -0,0 +1,28 @@
+import re
+from typing import Callable
+
+TokenCounter = Callable[[str], int]
+
+# Words and individual punctuation marks; tracks BPE token counts closely
+# enough for budgeting English prompts without shipping a tokenizer.
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+
+def count_tokens(text: str) -> int:
+    return len(_TOKEN_RE.findall(text or ""))
+
+
+def truncate_to_tokens(text: str, max_tokens: int, token_counter: TokenCounter = count_tokens) -> str:
+    """Cut `text` at a word boundary so it fits in `max_tokens`."""
+    if token_counter(text) <= max_tokens:
+        return text
+    words = text.split(" ")
+    lo, hi = 0, len(words)
+    # Largest word prefix that still fits (with room for the ellipsis)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if token_counter(" ".join(words[:mid]) + " …") <= max_tokens:
+            lo = mid
+        else:
+            hi = mid - 1
+    return " ".join(words[:lo]) + " …" if lo else ""
@@ -0,0 +1,76 @@
+import asyncio
+import time
+from typing import Any, List, Optional
+
+import httpx
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from gemma3n_trial.agents import LLM_Agent, SearchAgent, LocalSearchAgent, RecipeAgent
+from gemma3n_trial.pipeline import build_pipeline
+from gemma3n_trial.utils import RecipeSearchIndex
+
+LATENCY = 0.2
+
+
+# -------------------------
+# Local stubs for Groq and Spoonacular
+# -------------------------
+class SlowFakeChat(BaseChatModel):
+    latency: float = LATENCY
+
+    @property
+    def _llm_type(self) -> str:
+        return "slow-fake-chat"
+
+    def _result(self) -> ChatResult:
+        message = AIMessage(content='{"name": "Butter Chicken"}')
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs) -> ChatResult:
+        time.sleep(self.latency)
+        return self._result()
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs) -> ChatResult:
+        await asyncio.sleep(self.latency)
+        return self._result()
+
+
+async def spoonacular_stub(request: httpx.Request) -> httpx.Response:
+    await asyncio.sleep(LATENCY)
+    if request.url.path.endswith("/complexSearch"):
+        return httpx.Response(200, json={"results": [{"id": 1, "title": "Butter Chicken"}]})
+    return httpx.Response(200, json={"id": 1, "title": "Butter Chicken", "extendedIngredients": []})
+
+
+def build_app():
+    stub = httpx.AsyncClient(transport=httpx.MockTransport(spoonacular_stub))
+    return build_pipeline(
+        LLM_Agent(SlowFakeChat()),
+        LocalSearchAgent(RecipeSearchIndex(None), remote=SearchAgent("test", async_client=stub)),
+        RecipeAgent("test", async_client=stub),
+    )
+
+
+def test_concurrent_pipeline_runs_overlap():
+    app = build_app()
+
+    async def run(n: int) -> float:
+        start = time.perf_counter()
+        results = await asyncio.gather(*(
+            app.ainvoke({"user_query": "how do I make butter chicken?", "choice": 1})
+            for _ in range(n)
+        ))
+        assert all(r["detailed_recipe"]["title"] == "Butter Chicken" for r in results)
+        return time.perf_counter() - start
+
+    async def main():
+        single = await run(1)
+        many = await run(20)
+        return single, many
+
+    single, many = asyncio.run(main())
+    # Three upstream hops of LATENCY each; 20 sessions should overlap, not add up
+    assert single >= 3 * LATENCY
+    assert many < 2 * single
@@ -0,0 +1,133 @@
+import asyncio
+import json
+import subprocess
+import sys
+import httpx
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from gemma3n_trial.agents import LLM_Agent, DishNameMatcher, SearchAgent, RecipeAgent
+from gemma3n_trial import batch
+from gemma3n_trial.batch import choose_best_match, choose_first, completed_ids, run_batch
+from gemma3n_trial.schema import RecipeSearchResult
+from gemma3n_trial.pipeline import PipelineAgents
+from gemma3n_trial.utils import Resilience, RetryPolicy
+
+RESULTS = [{"id": 1, "title": "Chicken Curry"}, {"id": 2, "title": "Butter Chicken"}]
+
+
+def make_agents(in_flight: list, fail_query: str = "broken"):
+    async def handler(request: httpx.Request) -> httpx.Response:
+        in_flight[0] += 1
+        in_flight[1] = max(in_flight[1], in_flight[0])
+        await asyncio.sleep(0.02)
+        in_flight[0] -= 1
+        if request.url.path.endswith("/complexSearch"):
+            if request.url.params["query"].lower() == fail_query:
+                return httpx.Response(503)
+            if request.url.params["query"].lower() == "nothing":
+                return httpx.Response(200, json={"results": []})
+            return httpx.Response(200, json={"results": RESULTS})
+        recipe_id = int(request.url.path.split("/")[-2])
+        title = next(r["title"] for r in RESULTS if r["id"] == recipe_id)
+        return httpx.Response(200, json={"id": recipe_id, "title": title, "extendedIngredients": []})
+
+    stub = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    # Bare dish names skip the LLM via the matcher, so "broken" reaches complexSearch as-is
+    llm = FakeListChatModel(responses=['{"name": "Butter Chicken"}'])
+    resilience = Resilience(retry=RetryPolicy(base_delay=0))
+    return PipelineAgents(
+        llm_agent=LLM_Agent(llm, matcher=DishNameMatcher(threshold=0.5)),
+        search_agent=SearchAgent("test", async_client=stub, resilience=resilience),
+        recipe_agent=RecipeAgent("test", async_client=stub, resilience=resilience),
+    )
+
+
+def write_queries(path, queries):
+    path.write_text("".join(json.dumps(q) + "\n" for q in queries))
+
+
+def read_records(path):
+    records = []
+    for line in path.read_text().splitlines():
+        try:
+            records.append(json.loads(line))
+        except ValueError:
+            pass
+    return records
+
+
+def test_choice_policies_are_deterministic():
+    recipes = [RecipeSearchResult(**r) for r in RESULTS]
+    assert choose_first("Butter Chicken", recipes) == 1
+    assert choose_best_match("Butter Chicken", recipes) == 2
+    assert choose_best_match("Paella", recipes) == 1
+
+
+def test_batch_runs_with_bounded_concurrency(tmp_path):
+    queries = tmp_path / "queries.jsonl"
+    output = tmp_path / "out.jsonl"
+    write_queries(queries, [{"id": f"q{i}", "query": f"butter chicken {i}"} for i in range(12)] + ["butter chicken"])
+    in_flight = [0, 0]
+
+    stats = asyncio.run(run_batch(make_agents(in_flight), str(queries), str(output), concurrency=3))
+
+    records = read_records(output)
+    assert stats == {"skipped": 0, "ok": 13, "no_results": 0, "error": 0}
+    assert {r["id"] for r in records} == {f"q{i}" for i in range(12)} | {"13"}
+    assert all(r["choice"] == 2 and r["recipe"]["title"] == "Butter Chicken" for r in records)
+    assert in_flight[1] <= 3
+
+
+def test_batch_resumes_and_retries_failures(tmp_path):
+    queries = tmp_path / "queries.jsonl"
+    output = tmp_path / "out.jsonl"
+    write_queries(queries, [
+        {"request_id": "a", "body": "butter chicken"},
+        {"request_id": "b", "body": "broken"},
+        {"request_id": "c", "body": "curry"},
+    ])
+    # Previous run: "a" finished, "b" failed, then a crash left a torn line
+    output.write_text(
+        json.dumps({"id": "a", "status": "ok"}) + "\n"
+        + json.dumps({"id": "b", "status": "error"}) + "\n"
+        + '{"id": "c", "sta'
+    )
+    assert completed_ids(str(output)) == {"a"}
+
+    stats = asyncio.run(run_batch(
+        make_agents([0, 0]), str(queries), str(output),
+        policy=choose_first, query_field="body", id_field="request_id",
+    ))
+    assert stats == {"skipped": 1, "ok": 1, "no_results": 0, "error": 1}
+    new = {r["id"]: r for r in read_records(output)[2:]}
+    assert new["c"]["choice"] == 1
+    assert new["b"]["error"].startswith("HTTPStatusError")
+
+
+def test_batch_records_empty_searches_and_failed_fetches(tmp_path):
+    queries = tmp_path / "queries.jsonl"
+    output = tmp_path / "out.jsonl"
+    write_queries(queries, [{"id": "empty", "query": "nothing"}, {"id": "ok", "query": "curry"}])
+    agents = make_agents([0, 0])
+    agents.recipe_agent.async_client = httpx.AsyncClient(transport=httpx.MockTransport(lambda r: httpx.Response(503)))
+
+    stats = asyncio.run(run_batch(agents, str(queries), str(output)))
+    assert stats == {"skipped": 0, "ok": 0, "no_results": 1, "error": 1}
+    records = {r["id"]: r for r in read_records(output)}
+    assert records["empty"]["recipes"] == []
+    # The search is kept even though the fetch failed
+    assert records["ok"]["error"].startswith("HTTPStatusError")
+    assert records["ok"]["dish_name"] == "Curry" and len(records["ok"]["recipes"]) == 2
+
+
+def test_main_needs_only_the_pipeline_agents(tmp_path, monkeypatch, capsys):
+    # No HTTP service, session store or cooking agent behind a batch job
+    code = "import sys, gemma3n_trial.batch; assert 'gemma3n_trial.service' not in sys.modules"
+    subprocess.run([sys.executable, "-W", "ignore", "-c", code], check=True)
+
+    queries = tmp_path / "queries.jsonl"
+    output = tmp_path / "out.jsonl"
+    write_queries(queries, ["butter chicken"])
+    monkeypatch.setattr(batch, "default_agents", lambda: make_agents([0, 0]))
+    batch.main([str(queries), str(output), "--choice", "first"])
+    assert json.loads(capsys.readouterr().out)["ok"] == 1
+    assert read_records(output)[0]["choice"] == 1
@@ -0,0 +1,59 @@
+import json
+import sys
+import pytest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "benchmarks"))
+import bench_pipeline  # noqa: E402
+import compare  # noqa: E402
+from stubs import FakeSpoonacular  # noqa: E402
+import httpx  # noqa: E402
+
+
+def test_fake_spoonacular_serves_search_and_details():
+    with FakeSpoonacular(latency=0) as stub:
+        search = httpx.get(f"{stub.base_url}/recipes/complexSearch", params={"query": "dal"}).json()
+        recipe_id = search["results"][0]["id"]
+        detail = httpx.get(f"{stub.base_url}/recipes/{recipe_id}/information").json()
+        bulk = httpx.get(f"{stub.base_url}/recipes/informationBulk", params={"ids": f"{recipe_id},7"}).json()
+    assert detail["id"] == recipe_id and len(detail["extendedIngredients"]) == 12
+    assert [r["id"] for r in bulk] == [recipe_id, 7]
+    assert stub.requests == 3
+
+
+def test_benchmark_report_is_machine_readable(tmp_path):
+    report = bench_pipeline.run([1, 4], requests=4, llm_latency=0.01, http_latency=0.005)
+    json.dumps(report)
+
+    assert [r["concurrency"] for r in report["results"]] == [1, 4]
+    for level in report["results"]:
+        assert level["errors"] == 0
+        assert level["throughput_rps"] > 0
+        assert level["e2e_ms"]["p50"] <= level["e2e_ms"]["p99"]
+        assert set(level["nodes_ms"]) == set(bench_pipeline.NODES)
+    # Uncached: warm-up + 8 runs, each one search and one /information call
+    assert report["upstream_requests"] == 18
+
+    rows = compare.compare(report, report)
+    assert rows and all(row["change_pct"] == 0 for row in rows)
+    assert compare.regressions(rows, 5) == []
+
+
+def test_percentile_interpolates():
+    assert bench_pipeline.percentile([1, 2, 3, 4], 50) == 2.5
+    assert bench_pipeline.percentile([5], 99) == 5
+
+
+def test_prefix_cache_benchmark_reports_both_configurations():
+    pytest.importorskip("torch")
+    pytest.importorskip("transformers")
+    import bench_prefix_cache
+
+    report = bench_prefix_cache.run(sessions=2, turns=3, max_new_tokens=2, hidden_size=64, layers=1)
+    json.dumps(report)
+    off, on = report["results"]
+    assert (off["prefix_cache"], on["prefix_cache"]) == (False, True)
+    assert off["cache"] is None
+    # One recipe: the prefix is computed once and shared by both sessions
+    assert on["cache"]["entries"] == 1 and on["cache"]["hits"] == 5
+    assert on["follow_up_ttft_ms"]["p50"] > 0
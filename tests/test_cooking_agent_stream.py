@@ -0,0 +1,55 @@
+import asyncio
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from gemma3n_trial.agents import CookingGraphAgent, AgentState
+from gemma3n_trial.agents.cooking_agent import FALLBACK_RESPONSE
+from gemma3n_trial.schema import DetailedRecipe
+
+RECIPE = DetailedRecipe(
+    id=123,
+    title="Spaghetti Carbonara",
+    summary="Classic Italian pasta dish with creamy sauce.",
+    instructions="1. Cook pasta. 2. Mix eggs and cheese. 3. Combine with pancetta.",
+    readyInMinutes=25,
+    servings=2,
+    ingredients=["spaghetti", "eggs", "parmesan cheese", "pancetta", "black pepper"],
+)
+
+
+def history(agent: CookingGraphAgent):
+    return [m.content for m in agent.memory.load_memory_variables({})["chat_history"]]
+
+
+def test_stream_yields_tokens_then_commits_memory():
+    agent = CookingGraphAgent(llm=FakeListChatModel(responses=["Use guanciale."]))
+    state = AgentState(detailed_recipe=RECIPE, user_input="What meat? ")
+
+    tokens = []
+    for token in agent.stream(state):
+        tokens.append(token)
+        # Nothing is saved until the answer is complete
+        if len(tokens) == 1:
+            assert history(agent) == []
+
+    assert len(tokens) > 1
+    assert "".join(tokens) == "Use guanciale."
+    assert history(agent) == ["What meat?", "Use guanciale."]
+
+
+def test_astream_matches_stream():
+    agent = CookingGraphAgent(llm=FakeListChatModel(responses=["Two servings."]))
+    state = AgentState(detailed_recipe=RECIPE, user_input="How many servings?")
+
+    async def collect():
+        return [token async for token in agent.astream(state)]
+
+    assert "".join(asyncio.run(collect())) == "Two servings."
+    assert history(agent)[-1] == "Two servings."
+
+
+def test_stream_failure_before_first_token_falls_back():
+    llm = FakeListChatModel(responses=["boom"], error_on_chunk_number=0)
+    agent = CookingGraphAgent(llm=llm)
+    state = AgentState(detailed_recipe=RECIPE, user_input="Hi")
+
+    assert list(agent.stream(state)) == [FALLBACK_RESPONSE]
+    assert history(agent)[-1] == FALLBACK_RESPONSE
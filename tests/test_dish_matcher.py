@@ -0,0 +1,48 @@
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from gemma3n_trial.agents import DishNameMatcher, LLM_Agent
+from gemma3n_trial.schema import RecipeSearchResults
+
+SEEN_TITLES = RecipeSearchResults(results=[
+    {"id": 1, "title": "Easy Butter Chicken"},
+    {"id": 2, "title": "Chicken Tikka Masala"},
+    {"id": 3, "title": "Paneer Butter Masala"},
+    {"id": 4, "title": "General Tso's Chicken"},
+])
+
+
+def test_templates_and_vocabulary():
+    matcher = DishNameMatcher()
+    matcher.learn(SEEN_TITLES)
+
+    assert matcher.match("Butter Chicken").name == "Butter Chicken"
+    assert matcher.match("how to make chicken tikka masala?").name == "Chicken Tikka Masala"
+    assert matcher.match("Recipe for general tso's chicken").name == "General Tso's Chicken"
+    assert matcher.match("easy pad thai recipe").name == "Pad Thai"
+
+
+def test_low_confidence_goes_to_llm():
+    matcher = DishNameMatcher()
+    assert matcher.match("Butter Chicken") is None  # unknown bare phrase
+    assert matcher.match("What are ingredients used to make pasta masala?") is None
+    assert matcher.match("how do I make butter chicken without cream") is None
+    assert matcher.match("something healthy for dinner") is None
+
+
+def test_llm_agent_reports_fraction_served_without_llm():
+    llm = FakeListChatModel(responses=['{"name": "Pasta Masala"}'])
+    matcher = DishNameMatcher()
+    matcher.learn(SEEN_TITLES)
+    agent = LLM_Agent(llm, matcher=matcher)
+
+    queries = [
+        "Butter Chicken",
+        "how to make paneer butter masala",
+        "What are ingredients used to make pasta masala?",
+        "chicken tikka masala recipe",
+    ]
+    names = [agent.invoke({"user_query": q}).name for q in queries]
+
+    assert names[2] == "Pasta Masala"
+    assert agent.stats()["llm_calls"] == 1
+    assert agent.stats()["fraction_without_llm"] == 0.75
+    assert matcher.stats()["fraction_served"] == 0.75
@@ -0,0 +1,42 @@
+import httpx
+from gemma3n_trial.agents import SearchAgent, RecipeAgent
+from gemma3n_trial.schema import RecipeSearchResult
+from gemma3n_trial.utils import build_client, get_http_client, set_http_client, close_http_client
+
+
+def _stub_transport(seen: list):
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request.url.path)
+        if request.url.path.endswith("/complexSearch"):
+            return httpx.Response(200, json={"results": [{"id": 1, "title": "Butter Chicken"}]})
+        return httpx.Response(200, json={"id": 1, "title": "Butter Chicken", "extendedIngredients": []})
+    return httpx.MockTransport(handler)
+
+
+def test_build_client_applies_timeouts_and_limits():
+    client = build_client(connect_timeout=1.5, read_timeout=7.0, max_connections=3)
+    assert client.timeout.connect == 1.5
+    assert client.timeout.read == 7.0
+    client.close()
+
+
+def test_agents_share_process_wide_client():
+    seen = []
+    shared = build_client(transport=_stub_transport(seen))
+    set_http_client(shared)
+    try:
+        assert get_http_client() is shared
+        results = SearchAgent(api_key="k").invoke("butter chicken")
+        state = RecipeAgent(api_key="k").invoke({"selected_recipe": results.results[0]})
+        assert state["detailed_recipe"]["title"] == "Butter Chicken"
+        assert seen == ["/recipes/complexSearch", "/recipes/1/information"]
+    finally:
+        close_http_client()
+
+
+def test_injected_client_overrides_shared_one():
+    seen = []
+    client = httpx.Client(transport=_stub_transport(seen))
+    agent = RecipeAgent(api_key="k", client=client, base_url="http://stub")
+    agent.invoke({"selected_recipe": RecipeSearchResult(id=1, title="Butter Chicken")})
+    assert seen == ["/recipes/1/information"]
@@ -0,0 +1,57 @@
+import asyncio
+import time
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from gemma3n_trial.agents import LLM_Agent
+from gemma3n_trial.utils import LRUCache, ResponseCache
+
+
+class CountingChat(FakeListChatModel):
+    calls: int = 0
+
+    def _call(self, *args, **kwargs) -> str:
+        self.calls += 1
+        return super()._call(*args, **kwargs)
+
+
+def make_agent(cache: LRUCache):
+    llm = CountingChat(responses=['{"name": "Butter Chicken"}'])
+    return LLM_Agent(llm, cache=cache), llm
+
+
+def test_identical_queries_skip_the_chain():
+    cache = LRUCache(max_entries=8)
+    agent, llm = make_agent(cache)
+
+    first = agent.invoke({"user_query": "How to make butter chicken?"})
+    second = agent.invoke({"user_query": "  how to make  BUTTER chicken "})
+    third = asyncio.run(agent.ainvoke({"user_query": "How to make butter chicken"}))
+
+    assert first.name == second.name == third.name == "Butter Chicken"
+    assert llm.calls == 1
+    assert cache.stats()["hits"] == 2
+    assert cache.stats()["misses"] == 1
+
+
+def test_lru_bound_and_ttl():
+    cache = LRUCache(max_entries=2, ttl=0.05)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)  # evicts "b"
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    time.sleep(0.1)
+    assert cache.get("a") is None
+
+
+def test_persistent_store_survives_a_new_process_cache(tmp_path):
+    store = ResponseCache(str(tmp_path / "cache.sqlite3"))
+    agent, _ = make_agent(LRUCache(store=store, namespace="dish_name"))
+    agent.invoke({"user_query": "butter chicken"})
+
+    # Fresh in-memory layer, e.g. after a restart
+    cache = LRUCache(store=store, namespace="dish_name")
+    agent, llm = make_agent(cache)
+    assert agent.invoke({"user_query": "Butter chicken"}).name == "Butter Chicken"
+    assert llm.calls == 0
+    assert cache.stats()["store_hits"] == 1
@@ -0,0 +1,241 @@
+import asyncio
+from types import SimpleNamespace
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from gemma3n_trial.agents import CookingGraphAgent, AgentState
+from gemma3n_trial.agents.cooking_agent import FALLBACK_RESPONSE
+from gemma3n_trial.pipeline import default_chat_model
+from gemma3n_trial.schema import DetailedRecipe
+from gemma3n_trial.utils import LocalChatModel, LocalModel, PrefixKVCache, load_local_model
+
+WORDS = ["[UNK]", "[PAD]", "[EOS]", "user", "assistant", "system", ":", "butter", "chicken", "curry", "rice", "salt", "stir", "simmer"]
+
+
+def tiny_model():
+    """Randomly initialized 1-layer Llama with a word-level tokenizer: no downloads."""
+    torch = pytest.importorskip("torch")
+    transformers = pytest.importorskip("transformers")
+    from tokenizers import Tokenizer, models, pre_tokenizers
+
+    torch.manual_seed(0)
+    backend = Tokenizer(models.WordLevel({w: i for i, w in enumerate(WORDS)}, unk_token="[UNK]"))
+    backend.pre_tokenizer = pre_tokenizers.WhitespaceSplit()
+    tokenizer = transformers.PreTrainedTokenizerFast(
+        tokenizer_object=backend, unk_token="[UNK]", pad_token="[PAD]", eos_token="[EOS]"
+    )
+    config = transformers.LlamaConfig(
+        vocab_size=len(WORDS), hidden_size=16, intermediate_size=32, num_hidden_layers=1,
+        num_attention_heads=2, num_key_value_heads=2, max_position_embeddings=256,
+        pad_token_id=1, eos_token_id=2,
+    )
+    model = transformers.LlamaForCausalLM(config).eval()
+    # Random weights may emit EOS at once; always generate max_new_tokens
+    model.generation_config.eos_token_id = None
+    return model, tokenizer
+
+
+def test_invoke_and_stream_agree():
+    model, tokenizer = tiny_model()
+    llm = LocalChatModel(local_model=LocalModel(model, tokenizer), max_new_tokens=6)
+    messages = [SystemMessage("stir"), HumanMessage("butter chicken")]
+
+    reply = llm.invoke(messages)
+    assert reply.content
+    assert reply.usage_metadata["output_tokens"] == 6
+    assert "".join(chunk.content for chunk in llm.stream(messages)).strip() == reply.content
+    assert asyncio.run(llm.ainvoke(messages)).content == reply.content
+
+
+def test_stop_sequences_and_early_exit():
+    model, tokenizer = tiny_model()
+    llm = LocalChatModel(local_model=LocalModel(model, tokenizer), max_new_tokens=8)
+    full = llm.invoke("curry rice").content
+    first = full.split()[0]
+    assert llm.invoke("curry rice", stop=[first]).content == ""
+
+    # Abandoning a stream ends generation and frees the model
+    stream = llm.stream("curry rice")
+    next(stream)
+    stream.close()
+    assert not llm.local_model.lock.locked()
+
+
+def test_loads_once_and_quantizes(tmp_path):
+    torch = pytest.importorskip("torch")
+    model, tokenizer = tiny_model()
+    model.save_pretrained(tmp_path)
+    tokenizer.save_pretrained(tmp_path)
+
+    loaded = load_local_model(str(tmp_path), quantize=True, num_threads=1)
+    assert load_local_model(str(tmp_path), quantize=True, num_threads=1) is loaded
+    assert torch.get_num_threads() == 1
+    assert isinstance(loaded.model.model.layers[0].mlp.up_proj, torch.ao.nn.quantized.dynamic.Linear)
+
+    llm = LocalChatModel(model_id=str(tmp_path), quantize=True, num_threads=1, max_new_tokens=4)
+    assert llm.invoke("salt").content
+    assert llm.local_model is loaded
+
+
+def test_cooking_agent_runs_on_local_model():
+    model, tokenizer = tiny_model()
+    agent = CookingGraphAgent(llm=LocalChatModel(local_model=LocalModel(model, tokenizer), max_new_tokens=4))
+    recipe = DetailedRecipe(
+        id=1, title="Butter Chicken", summary=None, instructions="Simmer.", readyInMinutes=30, servings=2,
+        ingredients=["butter", "chicken"],
+    )
+    result = agent.invoke(AgentState(detailed_recipe=recipe, user_input="how long"))
+    assert result.response and result.response != FALLBACK_RESPONSE
+    assert "".join(agent.stream(AgentState(detailed_recipe=recipe, user_input="salt?"))) != FALLBACK_RESPONSE
+
+
+def test_backend_is_picked_from_env(monkeypatch):
+    # Selecting the local backend must not load (or even import) torch
+    monkeypatch.setenv("LLM_BACKEND", "local")
+    monkeypatch.setenv("LOCAL_MODEL_ID", "some/model")
+    monkeypatch.setenv("LOCAL_MODEL_INT8", "1")
+    monkeypatch.setenv("LOCAL_MODEL_THREADS", "4")
+    default_chat_model.cache_clear()
+    try:
+        llm = default_chat_model(temperature=0.5)
+        assert isinstance(llm, LocalChatModel) and llm.local_model is None
+        assert (llm.model_id, llm.quantize, llm.num_threads, llm.temperature) == ("some/model", True, 4, 0.5)
+        monkeypatch.setenv("LLM_BACKEND", "openai")
+        default_chat_model.cache_clear()
+        with pytest.raises(ValueError):
+            default_chat_model()
+    finally:
+        default_chat_model.cache_clear()
+
+
+def test_prefix_cache_skips_the_shared_prefill():
+    model, tokenizer = tiny_model()
+    local = LocalModel(model, tokenizer)
+    cache = PrefixKVCache()
+    plain = LocalChatModel(local_model=local, max_new_tokens=5)
+    cached = LocalChatModel(local_model=local, max_new_tokens=5, prefix_cache=cache)
+    system = SystemMessage("butter chicken curry rice salt " * 10)
+
+    prefilled = []
+    forward = model.forward
+
+    def counting_forward(*args, **kwargs):
+        input_ids = kwargs.get("input_ids", args[0] if args else None)
+        prefilled.append(input_ids.shape[-1])
+        return forward(*args, **kwargs)
+
+    model.forward = counting_forward
+    first = [system, HumanMessage("stir")]
+    second = [system, HumanMessage("stir"), AIMessage("simmer"), HumanMessage("salt")]
+    for messages in (first, second):
+        assert cached.invoke(messages).content == plain.invoke(messages).content
+    assert "".join(c.content for c in cached.stream(second)).strip() == plain.invoke(second).content
+
+    stats = cache.stats()
+    assert (stats["entries"], stats["misses"], stats["hits"]) == (1, 1, 2)
+    assert stats["bytes"] > 0
+    # Only the first cached call prefilled the 50-word system prompt in full
+    full_prefills = [n for n in prefilled if n > 50]
+    assert len(full_prefills) == 1 + 3  # one prefix computation, three uncached runs
+
+
+def test_short_or_missing_system_prompt_is_not_cached():
+    model, tokenizer = tiny_model()
+    cache = PrefixKVCache()
+    llm = LocalChatModel(local_model=LocalModel(model, tokenizer), max_new_tokens=3, prefix_cache=cache)
+    llm.invoke([SystemMessage("stir"), HumanMessage("salt")])
+    llm.invoke("butter " * 60)
+    assert len(cache) == 0 and cache.stats()["misses"] == 0
+
+
+def test_cooking_agent_keeps_the_recipe_in_a_stable_prefix():
+    model, tokenizer = tiny_model()
+    cache = PrefixKVCache()
+    agent = CookingGraphAgent(
+        llm=LocalChatModel(local_model=LocalModel(model, tokenizer), max_new_tokens=3, prefix_cache=cache)
+    )
+    recipe = DetailedRecipe(
+        id=1, title="Butter Chicken", summary="butter chicken " * 40, instructions="Simmer.",
+        readyInMinutes=30, servings=2, ingredients=["butter", "chicken"],
+    )
+    for question in ("how long", "salt?", "what rice"):
+        agent.invoke(AgentState(detailed_recipe=recipe, user_input=question))
+    assert cache.stats()["entries"] == 1 and cache.stats()["hits"] == 2
+
+
+def test_concurrent_prompts_share_one_generate_call():
+    model, tokenizer = tiny_model()
+    local = LocalModel(model, tokenizer)
+    single = LocalChatModel(local_model=local, max_new_tokens=4)
+    batched = LocalChatModel(local_model=local, max_new_tokens=4, max_batch_size=8, max_wait_ms=200)
+    prompts = ["butter chicken", "rice", "curry rice salt stir", "simmer"]
+    expected = [single.invoke(p).content for p in prompts]
+
+    generate_calls = []
+    generate = model.generate
+
+    def counting_generate(*args, **kwargs):
+        generate_calls.append(kwargs["input_ids"].shape[0])
+        return generate(*args, **kwargs)
+
+    model.generate = counting_generate
+    # chain.batch / Runnable.batch call invoke from a thread pool
+    replies = batched.batch(prompts, config={"max_concurrency": len(prompts)})
+    assert [r.content for r in replies] == expected
+    assert generate_calls == [len(prompts)]
+    assert batched.batcher().stats()["mean_batch_size"] == len(prompts)
+
+
+class FakeTokenizer:
+    """Whitespace tokenizer with ids 0 "salt", 1 "rice", 2 [EOS] and no pad token."""
+
+    chat_template = None
+    pad_token_id = None
+    eos_token_id = None
+
+    def __init__(self):
+        self.vocab = {"salt": 0, "rice": 1, "[EOS]": 2}
+
+    def __call__(self, text, return_tensors=None):
+        ids = [self.vocab.setdefault(word, len(self.vocab)) for word in text.split()]
+        return {"input_ids": [ids], "attention_mask": [[1] * len(ids)]}
+
+    def pad(self, encoded, padding=False, return_tensors=None):
+        return encoded
+
+    def decode(self, ids, skip_special_tokens=False):
+        words = {i: w for w, i in self.vocab.items()}
+        return " ".join(words[i] for i in ids if not (skip_special_tokens and i == 2))
+
+
+class FakeModel:
+    """Continues each prompt with a scripted answer, keyed by its last content word."""
+
+    def __init__(self, tokenizer, answers):
+        self.tokenizer = tokenizer
+        self.answers = answers
+        self.generation_config = SimpleNamespace(eos_token_id=2)
+        self.calls = []
+
+    def generate(self, input_ids, attention_mask, pad_token_id, **kwargs):
+        self.calls.append(len(input_ids))
+        words = {i: w for w, i in self.tokenizer.vocab.items()}
+        new = [[self.tokenizer.vocab[w] for w in self.answers[words[row[-2]]]] for row in input_ids]
+        width = max(len(n) for n in new)
+        return [row + n + [pad_token_id] * (width - len(n)) for row, n in zip(input_ids, new)]
+
+
+def test_batched_rows_end_at_eos_without_torch():
+    tokenizer = FakeTokenizer()
+    for word in ("stir", "well", "curry", "dal"):
+        tokenizer.vocab.setdefault(word, len(tokenizer.vocab))
+    # No pad token, so rows are padded with id 0, which is also a real word
+    model = FakeModel(tokenizer, {
+        "curry": ["stir", "well", "rice", "salt"],
+        "dal": ["salt", "[EOS]"],
+    })
+    llm = LocalChatModel(local_model=LocalModel(model, tokenizer), max_new_tokens=4, max_batch_size=4, max_wait_ms=200)
+
+    replies = llm.batch(["curry", "dal"], config={"max_concurrency": 2})
+    assert [r.content for r in replies] == ["stir well rice salt", "salt"]
+    assert [r.usage_metadata["output_tokens"] for r in replies] == [4, 2]
+    assert model.calls == [2]
@@ -0,0 +1,135 @@
+import asyncio
+import time
+import httpx
+from gemma3n_trial.agents import LocalSearchAgent, SearchAgent
+from gemma3n_trial.schema import DetailedRecipe, RecipeSearchResults
+from gemma3n_trial.utils import RecipeSearchIndex, Resilience, RetryPolicy
+
+CHICKEN_RESULTS = {"results": [
+    {"id": 1, "title": "Butter Chicken"},
+    {"id": 2, "title": "Chicken Tikka Masala"},
+    {"id": 3, "title": "Murgh Makhani"},
+]}
+
+
+def remote_agent(calls: list, down: bool = False) -> SearchAgent:
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.params["query"])
+        if down:
+            return httpx.Response(503)
+        return httpx.Response(200, json=CHICKEN_RESULTS)
+
+    transport = httpx.MockTransport(handler)
+    return SearchAgent(
+        "test",
+        client=httpx.Client(transport=transport),
+        async_client=httpx.AsyncClient(transport=transport),
+        resilience=Resilience(retry=RetryPolicy(base_delay=0)),
+    )
+
+
+def test_repeated_query_is_served_locally():
+    calls = []
+    agent = LocalSearchAgent(RecipeSearchIndex(None), remote=remote_agent(calls))
+
+    first = agent.invoke("butter chicken")
+    again = agent.invoke("  Butter Chicken! ")
+    assert calls == ["butter chicken"]
+    assert again == first
+    assert agent.stats()["local_fraction"] == 0.5
+
+
+def test_falls_back_to_remote_when_local_recall_is_low():
+    calls = []
+    agent = LocalSearchAgent(RecipeSearchIndex(None), remote=remote_agent(calls), min_results=2)
+    agent.invoke("butter chicken")
+
+    # Two indexed titles contain "chicken": enough to answer locally
+    local = agent.invoke("chicken")
+    assert [r.title for r in local.results] == ["Butter Chicken", "Chicken Tikka Masala"]
+    # Only one local match for "masala"
+    agent.invoke("masala")
+    assert calls == ["butter chicken", "masala"]
+
+
+def test_detailed_recipes_are_searchable_by_ingredient():
+    index = RecipeSearchIndex(None)
+    index.add_results(RecipeSearchResults(**CHICKEN_RESULTS))
+    index.add_recipe(DetailedRecipe(
+        id=3, title="Murgh Makhani", summary="A rich <b>butter</b> curry.", instructions=None,
+        readyInMinutes=40, servings=4, ingredients=["chicken thighs", "cream", "kasoori methi"],
+    ))
+    hits = [result.title for result, _ in index.search("cream chicken")]
+    assert hits == ["Murgh Makhani"]
+    # A later title-only search hit keeps the richer entry
+    index.add_results(RecipeSearchResults(**CHICKEN_RESULTS))
+    assert [r.title for r, _ in index.search("kasoori methi")] == ["Murgh Makhani"]
+
+
+def test_index_persists_and_reloads(tmp_path):
+    path = str(tmp_path / "index.json")
+    calls = []
+    agent = LocalSearchAgent(RecipeSearchIndex(path), remote=remote_agent(calls))
+    asyncio.run(agent.ainvoke("butter chicken"))
+    agent.index.flush()
+
+    reloaded = LocalSearchAgent(RecipeSearchIndex(path), remote=remote_agent(calls))
+    assert len(reloaded.index) == 3
+    assert reloaded.invoke("butter chicken").results[0].title == "Butter Chicken"
+    assert calls == ["butter chicken"]
+
+
+def test_saves_are_batched_and_merged_across_processes(tmp_path):
+    path = str(tmp_path / "index.json")
+    first = RecipeSearchIndex(path, save_interval=60)
+    first.add_results(RecipeSearchResults(**CHICKEN_RESULTS), query="butter chicken")
+    first.schedule_save()
+    first.schedule_save()
+    assert not (tmp_path / "index.json").exists()  # Nothing written until the interval or a flush
+
+    # A second worker on the same file saves in the meantime
+    second = RecipeSearchIndex(path, save_interval=0)
+    second.add_results(RecipeSearchResults(results=[{"id": 4, "title": "Dal Makhani"}]), query="dal")
+    second.schedule_save()
+    first.flush()
+
+    merged = RecipeSearchIndex(path)
+    assert len(merged) == 4
+    assert merged.known_query("dal") and merged.known_query("butter chicken")
+
+
+def test_remembered_queries_expire_with_the_search_cache():
+    now = [1000.0]
+    index = RecipeSearchIndex(None, query_ttl=60, clock=lambda: now[0])
+    index.add_results(RecipeSearchResults(**CHICKEN_RESULTS), query="butter chicken")
+    assert len(index.known_query("butter chicken")) == 3
+    now[0] += 61
+    assert index.known_query("butter chicken") is None
+    # The documents stay searchable
+    assert [r.title for r, _ in index.search("butter chicken")] == ["Butter Chicken"]
+
+
+def test_remote_failure_returns_partial_local_results():
+    index = RecipeSearchIndex(None)
+    index.add_results(RecipeSearchResults(**CHICKEN_RESULTS))
+    agent = LocalSearchAgent(index, remote=remote_agent([], down=True))
+
+    # One local match is below min_results, but beats an error
+    assert [r.title for r in agent.invoke("masala").results] == ["Chicken Tikka Masala"]
+    # Nothing local: the upstream error surfaces
+    try:
+        agent.invoke("paella")
+    except httpx.HTTPStatusError:
+        pass
+    else:
+        raise AssertionError("expected HTTPStatusError")
+
+
+def test_local_search_is_fast():
+    index = RecipeSearchIndex(None)
+    for i in range(5000):
+        index.add(i, f"Recipe {i} with chicken" if i % 2 else f"Recipe {i} with tofu", "rice garlic onion")
+    start = time.perf_counter()
+    for _ in range(20):
+        index.search("chicken garlic")
+    assert (time.perf_counter() - start) / 20 < 0.05
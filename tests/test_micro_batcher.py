@@ -0,0 +1,173 @@
+import asyncio
+import json
+import threading
+import time
+from typing import Any, List, Optional
+import pytest
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from gemma3n_trial.agents import LLM_Agent
+from gemma3n_trial.utils import MicroBatcher
+
+
+def test_threads_are_flushed_by_size_then_by_wait():
+    batches = []
+
+    def run(items):
+        batches.append(list(items))
+        return [i * 10 for i in items]
+
+    batcher = MicroBatcher(run, max_batch_size=4, max_wait_ms=50)
+    barrier = threading.Barrier(6)
+    results = [None] * 6
+
+    def call(i):
+        barrier.wait()
+        results[i] = batcher.submit(i)
+
+    start = time.monotonic()
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert results == [0, 10, 20, 30, 40, 50]
+    assert sorted(len(b) for b in batches) == [2, 4]
+    assert time.monotonic() - start >= 0.05  # The last two waited for max_wait_ms
+    assert batcher.stats()["items"] == 6 and batcher.stats()["batches"] == 2
+
+
+def test_lone_call_waits_at_most_max_wait():
+    batcher = MicroBatcher(lambda items: items, max_batch_size=64, max_wait_ms=20)
+    start = time.monotonic()
+    assert batcher.submit("x") == "x"
+    assert time.monotonic() - start < 1
+
+
+def test_errors_go_to_their_own_caller():
+    def run(items):
+        return [ValueError(i) if i == "bad" else i.upper() for i in items]
+
+    batcher = MicroBatcher(run, max_batch_size=2, max_wait_ms=1000)
+    outcome = {}
+
+    def call(item):
+        try:
+            outcome[item] = batcher.submit(item)
+        except ValueError as e:
+            outcome[item] = e
+
+    threads = [threading.Thread(target=call, args=(item,)) for item in ("ok", "bad")]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert outcome["ok"] == "OK"
+    assert isinstance(outcome["bad"], ValueError)
+
+    # A failing batch call fails everyone in it; the batcher keeps working
+    failing = MicroBatcher(lambda items: 1 / 0, max_batch_size=1)
+    with pytest.raises(ZeroDivisionError):
+        failing.submit("x")
+    with pytest.raises(ZeroDivisionError):
+        failing.submit("y")
+
+
+def test_tasks_are_batched_per_event_loop():
+    sizes = []
+
+    async def arun(items):
+        sizes.append(len(items))
+        await asyncio.sleep(0.01)
+        return [f"{i}!" for i in items]
+
+    batcher = MicroBatcher(arun_batch=arun, max_batch_size=8, max_wait_ms=10)
+
+    async def main():
+        return await asyncio.gather(*(batcher.asubmit(i) for i in range(20)))
+
+    assert asyncio.run(main()) == [f"{i}!" for i in range(20)]
+    assert sizes == [8, 8, 4]
+    # A fresh loop gets a fresh queue
+    assert asyncio.run(main()) == [f"{i}!" for i in range(20)]
+
+
+def test_cancelled_task_leaves_the_rest_of_its_batch_alone():
+    async def arun(items):
+        await asyncio.sleep(0.02)
+        return items
+
+    batcher = MicroBatcher(arun_batch=arun, max_batch_size=8, max_wait_ms=5)
+
+    async def main():
+        first = asyncio.ensure_future(batcher.asubmit("a"))
+        second = asyncio.ensure_future(batcher.asubmit("b"))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        return await second, first.cancelled()
+
+    assert asyncio.run(main()) == ("b", True)
+
+
+class EchoChat(BaseChatModel):
+    """Answers {"name": <query>} after a short delay; "poison" queries fail."""
+
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "echo"
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs) -> ChatResult:
+        self.calls += 1
+        query = messages[-1].content.rsplit("Query: ", 1)[1].strip()
+        if query == "poison":
+            raise RuntimeError("model failed")
+        time.sleep(0.01)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=json.dumps({"name": query.title()})))])
+
+
+def test_llm_agent_batches_concurrent_extractions():
+    llm = EchoChat()
+    agent = LLM_Agent(llm, max_batch_size=16, max_wait_ms=20)
+    queries = [f"dish {i}" for i in range(40)]
+    results = {}
+    barrier = threading.Barrier(len(queries))
+
+    def extract(query):
+        barrier.wait()
+        results[query] = agent.invoke({"user_query": query}).name
+
+    threads = [threading.Thread(target=extract, args=(q,)) for q in queries]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert results == {q: q.title() for q in queries}
+    assert llm.calls == 40
+    batching = agent.stats()["batching"]
+    assert batching["items"] == 40 and batching["batches"] <= 8
+    assert batching["mean_batch_size"] >= 5
+
+
+def test_llm_agent_async_batch_isolates_failures():
+    agent = LLM_Agent(EchoChat(), max_batch_size=8, max_wait_ms=20)
+
+    async def main():
+        queries = ["paella", "poison", "dal"]
+        return await asyncio.gather(*(agent.ainvoke({"user_query": q}) for q in queries), return_exceptions=True)
+
+    paella, poison, dal = asyncio.run(main())
+    assert (paella.name, dal.name) == ("Paella", "Dal")
+    assert isinstance(poison, RuntimeError)
+    assert agent.stats()["batching"]["batches"] == 1
+
+
+def test_batching_is_off_by_default():
+    agent = LLM_Agent(EchoChat())
+    assert agent.batcher is None
+    assert agent.invoke({"user_query": "dal"}).name == "Dal"
+    assert "batching" not in agent.stats()
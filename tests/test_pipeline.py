@@ -0,0 +1,144 @@
+import asyncio
+import builtins
+import httpx
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.types import Command
+from gemma3n_trial.agents import LLM_Agent, SearchAgent, LocalSearchAgent, RecipeAgent
+from gemma3n_trial.batch import choose_best_match
+from gemma3n_trial.pipeline import (
+    FETCH_ONLY, SEARCH_ONLY, BoundedMemorySaver, Chooser, InterruptChoice, PolicyChoice, StdinChoice, build_pipeline,
+)
+from gemma3n_trial.pipeline.graph import MAX_COMPILED_GRAPHS, _compile
+from gemma3n_trial.utils import RecipeSearchIndex
+
+RESULTS = [{"id": 1, "title": "Chicken Curry"}, {"id": 2, "title": "Butter Chicken"}]
+
+
+def spoonacular(calls: list):
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.path)
+        if request.url.path.endswith("/complexSearch"):
+            return httpx.Response(200, json={"results": RESULTS})
+        recipe_id = int(request.url.path.split("/")[-2])
+        title = next(r["title"] for r in RESULTS if r["id"] == recipe_id)
+        return httpx.Response(200, json={"id": recipe_id, "title": title, "extendedIngredients": []})
+    return handler
+
+
+def make_agents(calls: list):
+    transport = httpx.MockTransport(spoonacular(calls))
+
+    async def async_handler(request):
+        return spoonacular(calls)(request)
+
+    clients = {
+        "client": httpx.Client(transport=transport),
+        "async_client": httpx.AsyncClient(transport=httpx.MockTransport(async_handler)),
+    }
+    llm_agent = LLM_Agent(FakeListChatModel(responses=['{"name": "Butter Chicken"}']))
+    search_agent = LocalSearchAgent(RecipeSearchIndex(None), remote=SearchAgent("test", **clients))
+    return llm_agent, search_agent, RecipeAgent("test", **clients)
+
+
+def test_graphs_are_memoized_per_configuration():
+    agents = make_agents([])
+    full = build_pipeline(*agents, chooser=StdinChoice())
+    assert build_pipeline(*agents, chooser=StdinChoice()) is full
+    assert build_pipeline(*agents, chooser=StdinChoice(), mode="sync") is not full
+    assert build_pipeline(*agents, nodes=SEARCH_ONLY) is not full
+    # Other agents, other graph
+    assert build_pipeline(*make_agents([]), chooser=StdinChoice()) is not full
+    # Graphs of throwaway agents don't accumulate
+    for _ in range(MAX_COMPILED_GRAPHS + 5):
+        build_pipeline(*make_agents([]))
+    assert _compile.cache_info().currsize <= MAX_COMPILED_GRAPHS
+
+
+def test_rejects_bad_configurations():
+    agents = make_agents([])
+    for kwargs in ({"nodes": ("extract_dish_name", "select_recipe")}, {"nodes": ()}, {"mode": "threads"}):
+        try:
+            build_pipeline(*agents, **kwargs)
+        except ValueError:
+            continue
+        raise AssertionError(f"accepted {kwargs}")
+    try:
+        build_pipeline(search_agent=agents[1])
+    except ValueError as e:
+        assert "llm_agent" in str(e)
+    else:
+        raise AssertionError("extract_dish_name without an llm_agent")
+
+
+def test_chooser_must_implement_choose():
+    class Incomplete(Chooser):
+        pass
+
+    try:
+        Incomplete()
+    except TypeError:
+        pass
+    else:
+        raise AssertionError("instantiated a Chooser without choose()")
+
+
+def test_sync_and_async_runs_share_one_graph(monkeypatch):
+    calls = []
+    app = build_pipeline(*make_agents(calls), chooser=StdinChoice())
+    monkeypatch.setattr(builtins, "input", lambda prompt="": "2")
+
+    assert app.invoke({"user_query": "butter chicken"})["detailed_recipe"]["title"] == "Butter Chicken"
+    result = asyncio.run(app.ainvoke({"user_query": "butter chicken"}))
+    assert result["selected_recipe"].id == 2
+    # The second search is served by the local index the first one filled
+    assert calls == ["/recipes/complexSearch", "/recipes/2/information", "/recipes/2/information"]
+
+
+def test_node_subsets_and_choosers():
+    llm_agent, search_agent, recipe_agent = make_agents([])
+    search = build_pipeline(llm_agent, search_agent, nodes=SEARCH_ONLY, mode="async")
+    found = asyncio.run(search.ainvoke({"user_query": "butter chicken"}))
+    assert [r.title for r in found["recipes"]] == ["Chicken Curry", "Butter Chicken"]
+
+    fetch = build_pipeline(recipe_agent=recipe_agent, nodes=FETCH_ONLY, mode="sync", chooser=PolicyChoice(choose_best_match))
+    fetched = fetch.invoke({"dish_name": "Butter Chicken", "recipes": found["recipes"]})
+    assert fetched["detailed_recipe"]["id"] == 2
+
+
+def test_interrupt_choice_pauses_and_resumes():
+    app = build_pipeline(*make_agents([]), mode="sync", chooser=InterruptChoice(), checkpointer=MemorySaver())
+    config = {"configurable": {"thread_id": "t1"}}
+    paused = app.invoke({"user_query": "butter chicken"}, config)
+    assert "detailed_recipe" not in paused or paused["detailed_recipe"] is None
+    assert app.get_state(config).next == ("select_recipe",)
+
+    result = app.invoke(Command(resume=1), config)
+    assert result["detailed_recipe"]["title"] == "Chicken Curry"
+
+
+def test_bounded_saver_forgets_old_threads_and_finished_forks():
+    now = [0.0]
+    saver = BoundedMemorySaver(max_threads=2, ttl=60, clock=lambda: now[0])
+    app = build_pipeline(*make_agents([]), mode="sync", chooser=InterruptChoice(), checkpointer=saver)
+    configs = [{"configurable": {"thread_id": f"t{i}"}} for i in range(3)]
+    for config in configs:
+        app.invoke({"user_query": "butter chicken"}, config)
+    assert set(saver.storage) == {"t1", "t2"}
+
+    # Re-picking from the pause point leaves only the pause point behind
+    pause = app.get_state(configs[2]).config
+    sizes = (len(saver.storage["t2"][""]), len(saver.blobs))
+    for choice in (1, 2, 1):
+        result = app.invoke(Command(resume=choice), app.update_state(pause, None))
+        saver.prune(pause)
+    assert result["detailed_recipe"]["title"] == "Chicken Curry"
+    assert (len(saver.storage["t2"][""]), len(saver.blobs)) == sizes
+    assert app.get_state(configs[2]).next == ("select_recipe",)
+
+    now[0] += 61
+    app.invoke({"user_query": "butter chicken"}, configs[0])
+    assert set(saver.storage) == {"t0"}
+    # An expired pause point is gone for good, and looking it up evicts nobody
+    assert app.get_state(pause).next == ()
+    assert set(saver.storage) == {"t0"}
@@ -0,0 +1,53 @@
+import threading
+from gemma3n_trial.utils import PrefixKVCache
+
+
+def test_lru_by_bytes():
+    cache = PrefixKVCache(max_bytes=100)
+    assert cache.put("a", "kv-a", nbytes=40)
+    assert cache.put("b", "kv-b", nbytes=40)
+    assert cache.get("a") == "kv-a"  # "b" is now least recently used
+    assert cache.put("c", "kv-c", nbytes=40)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "kv-a" and cache.get("c") == "kv-c"
+    assert cache.stats()["bytes"] == 80
+    assert cache.stats()["evictions"] == 1
+
+
+def test_oversized_entries_are_not_stored():
+    cache = PrefixKVCache(max_bytes=100)
+    cache.put("a", "kv-a", nbytes=60)
+    assert not cache.put("huge", "kv", nbytes=101)
+    assert cache.get("a") == "kv-a" and len(cache) == 1
+
+
+def test_replacing_and_entry_limit():
+    cache = PrefixKVCache(max_bytes=1000, max_entries=2)
+    cache.put("a", 1, nbytes=10)
+    cache.put("a", 2, nbytes=30)
+    assert cache.get("a") == 2 and cache.stats()["bytes"] == 30
+    cache.put("b", 3, nbytes=10)
+    cache.put("c", 4, nbytes=10)
+    assert cache.get("a") is None and len(cache) == 2
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+    cache.clear()
+    assert cache.stats()["bytes"] == 0 and len(cache) == 0
+
+
+def test_accounting_survives_concurrent_writers():
+    cache = PrefixKVCache(max_bytes=500)
+
+    def write(worker: int) -> None:
+        for i in range(200):
+            cache.put((worker, i % 20), i, nbytes=7)
+            cache.get((worker, (i + 3) % 20))
+
+    threads = [threading.Thread(target=write, args=(w,)) for w in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert cache.stats()["bytes"] == 7 * len(cache) <= 500
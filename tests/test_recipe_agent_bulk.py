@@ -0,0 +1,77 @@
+import asyncio
+import httpx
+from gemma3n_trial.agents import RecipeAgent
+from gemma3n_trial.schema import RecipeSearchResult
+from gemma3n_trial.utils import Resilience, RetryPolicy
+
+BROKEN_ID = 13  # the stub answers 500 for any chunk containing it
+MISSING_ID = 7  # the stub silently drops it
+
+
+def no_retry() -> Resilience:
+    # One request per chunk, so the calls below are exact; retries have their own tests
+    return Resilience(retry=RetryPolicy(max_attempts=1))
+
+
+def _payload(ids):
+    return [
+        {"id": i, "title": f"Recipe {i}", "extendedIngredients": [{"original": "1 cup rice"}]}
+        for i in ids if i != MISSING_ID
+    ]
+
+
+def _recipes(ids):
+    return [RecipeSearchResult(id=i, title=f"Recipe {i}") for i in ids]
+
+
+def make_sync_agent(calls, chunk_size):
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert request.url.path == "/recipes/informationBulk"
+        ids = [int(i) for i in request.url.params["ids"].split(",")]
+        calls.append(ids)
+        if BROKEN_ID in ids:
+            return httpx.Response(500)
+        return httpx.Response(200, json=_payload(ids))
+    client = httpx.Client(transport=httpx.MockTransport(handler))
+    return RecipeAgent("k", client=client, base_url="http://stub", bulk_chunk_size=chunk_size, resilience=no_retry())
+
+
+def test_ten_results_cost_one_round_trip():
+    calls = []
+    agent = make_sync_agent(calls, chunk_size=50)
+    result = agent.invoke_bulk(_recipes(range(101, 111)))
+    assert len(calls) == 1
+    assert [r.id for r in result.recipes] == list(range(101, 111))
+    assert result.recipes[0].ingredients == ["1 cup rice"]
+    assert result.failed == {}
+
+
+def test_chunks_and_maps_partial_failures_to_ids():
+    calls = []
+    agent = make_sync_agent(calls, chunk_size=3)
+    ids = [1, 2, 3, 4, 5, MISSING_ID, BROKEN_ID, 8, 9, 2]
+    result = agent.invoke_bulk(_recipes(ids))
+
+    assert calls == [[1, 2, 3], [4, 5, MISSING_ID], [BROKEN_ID, 8, 9]]
+    assert [r.id for r in result.recipes] == [1, 2, 3, 4, 5]
+    assert set(result.failed) == {MISSING_ID, BROKEN_ID, 8, 9}
+    assert "not returned" in result.failed[MISSING_ID]
+
+
+def test_async_bulk_matches_sync():
+    async def handler(request: httpx.Request) -> httpx.Response:
+        ids = [int(i) for i in request.url.params["ids"].split(",")]
+        if BROKEN_ID in ids:
+            return httpx.Response(500)
+        return httpx.Response(200, json=_payload(ids))
+
+    async def main():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            agent = RecipeAgent(
+                "k", async_client=client, base_url="http://stub", bulk_chunk_size=2, resilience=no_retry()
+            )
+            return await agent.ainvoke_bulk([{"id": i, "title": "x"} for i in [BROKEN_ID, 1, 2, 3]])
+
+    result = asyncio.run(main())
+    assert [r.id for r in result.recipes] == [2, 3]
+    assert set(result.failed) == {BROKEN_ID, 1}
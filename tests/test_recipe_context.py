@@ -0,0 +1,83 @@
+from gemma3n_trial.agents.cooking_agent import format_recipe
+from gemma3n_trial.schema import DetailedRecipe
+from gemma3n_trial.utils import RecipeContextBuilder, count_tokens, strip_html
+
+# Shaped like real Spoonacular /information payloads
+BUTTER_CHICKEN = DetailedRecipe(
+    id=636488,
+    title="Butter Chicken",
+    summary=(
+        "Butter Chicken might be just the <b>main course</b> you are searching for. "
+        "This recipe makes <b>4 servings</b> with <b>612 calories</b>, <b>38g of protein</b>, "
+        "and <b>44g of fat</b> each. For <b>$2.17 per serving</b>, this recipe <b>covers 27%</b> "
+        "of your daily requirements of vitamins and minerals. If you have garam masala, "
+        "butter, tomato puree, and a few other ingredients on hand, you can make it. "
+        "It is brought to you by Foodista. Overall, this recipe earns a <b>solid spoonacular "
+        "score of 71%</b>. Similar recipes include <a href=\"https://spoonacular.com/recipes/"
+        "butter-chicken-1\">Butter Chicken</a>, <a href=\"https://spoonacular.com/recipes/"
+        "butter-chicken-2\">Butter Chicken</a>, and <a href=\"https://spoonacular.com/recipes/"
+        "butter-chicken-3\">Butter Chicken &amp; Naan</a>."
+    ),
+    instructions=(
+        "<ol><li>Marinate the chicken in yogurt, lemon juice, salt and half the spices for 1 hour.</li>"
+        "<li>Grill or pan-sear the chicken until charred; set aside.</li>"
+        "<li>Melt butter, fry the onion, ginger and garlic until soft.</li>"
+        "<li>Add tomato puree and the remaining spices; simmer 15 minutes.</li>"
+        "<li>Stir in cream and the chicken; simmer 10 minutes and finish with kasoori methi.</li></ol>"
+    ),
+    readyInMinutes=45,
+    servings=4,
+    ingredients=[
+        "1 kg boneless chicken thighs", "1 cup plain yogurt", "1 tbsp lemon juice",
+        "2 tsp garam masala", "1 tsp turmeric", "1 tsp chili powder", "3 tbsp butter",
+        "1 onion, finely chopped", "1 tbsp ginger-garlic paste", "1 cup tomato puree",
+        "1/2 cup heavy cream", "1 tsp kasoori methi", "salt to taste",
+    ],
+)
+
+CARBONARA = DetailedRecipe(
+    id=123,
+    title="Spaghetti Carbonara",
+    summary="<p>Classic Italian pasta dish with a <i>creamy</i> sauce &mdash; no cream needed.</p>",
+    instructions="1. Cook pasta. 2. Mix eggs and cheese. 3. Combine with pancetta.",
+    readyInMinutes=25,
+    servings=2,
+    ingredients=["spaghetti", "eggs", "parmesan cheese", "pancetta", "black pepper"],
+)
+
+
+def test_strip_html_keeps_steps_on_lines():
+    text = strip_html(BUTTER_CHICKEN.instructions)
+    assert "<" not in text
+    assert text.count("\n") == 4
+    assert strip_html("a &amp; b") == "a & b"
+
+
+def test_compact_context_is_shorter_than_format_recipe():
+    builder = RecipeContextBuilder()
+    for recipe in (BUTTER_CHICKEN, CARBONARA):
+        compact = builder.build(recipe)
+        assert "<" not in compact
+        assert count_tokens(compact) < count_tokens(format_recipe(recipe))
+
+
+def test_budget_drops_summary_then_truncates():
+    builder = RecipeContextBuilder(max_tokens=120)
+    context = builder.build(BUTTER_CHICKEN)
+    assert count_tokens(context) <= 120
+    assert "Summary" not in context
+    assert context.startswith("Title: Butter Chicken\nServings: 4")
+
+
+def test_fields_can_be_dropped():
+    builder = RecipeContextBuilder(fields=("title", "ingredients"))
+    assert builder.build(CARBONARA) == (
+        "Title: Spaghetti Carbonara\nIngredients: spaghetti; eggs; parmesan cheese; pancetta; black pepper"
+    )
+
+
+def test_context_is_cached_per_recipe_id():
+    builder = RecipeContextBuilder()
+    first = builder.build(BUTTER_CHICKEN)
+    assert builder.build(BUTTER_CHICKEN) is first
+    assert builder.cache.stats()["hits"] == 1
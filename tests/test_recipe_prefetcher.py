@@ -0,0 +1,137 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import httpx
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from gemma3n_trial.agents import LLM_Agent, SearchAgent, RecipeAgent, RecipePrefetcher, CookingGraphAgent
+from gemma3n_trial.schema import RecipeSearchResult
+from gemma3n_trial.service import CookingService, create_app
+from gemma3n_trial.utils import QuotaRateLimiter, Resilience
+
+RESULTS = [{"id": i, "title": f"Curry {i}"} for i in range(1, 6)]
+
+
+def detail(recipe_id: int) -> dict:
+    return {"id": recipe_id, "title": f"Curry {recipe_id}", "extendedIngredients": [{"original": "1 onion"}]}
+
+
+def spoonacular(calls: list, gate: threading.Event = None):
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.path)
+        if gate is not None:
+            gate.wait(5)
+        if request.url.path.endswith("/complexSearch"):
+            return httpx.Response(200, json={"results": RESULTS})
+        if request.url.path.endswith("/informationBulk"):
+            return httpx.Response(200, json=[detail(int(i)) for i in request.url.params["ids"].split(",")])
+        return httpx.Response(200, json=detail(int(request.url.path.split("/")[-2])))
+    return handler
+
+
+def recipe_agent(calls: list, gate: threading.Event = None, **kwargs) -> RecipeAgent:
+    transport = httpx.MockTransport(spoonacular(calls, gate))
+    return RecipeAgent("test", client=httpx.Client(transport=transport), **kwargs)
+
+
+def search_results():
+    return [RecipeSearchResult(**r) for r in RESULTS]
+
+
+def test_top_n_are_fetched_in_one_call_and_served_from_the_store():
+    calls = []
+    prefetcher = RecipePrefetcher(recipe_agent(calls), top_n=3)
+    assert prefetcher.start("s1", search_results())
+
+    assert prefetcher.get("s1", 2).title == "Curry 2"
+    assert calls == ["/recipes/informationBulk"]
+    # Not prefetched, or another session: the caller fetches as before
+    assert prefetcher.get("s1", 5) is None
+    assert prefetcher.get("s2", 2) is None
+    assert prefetcher.stats()["hits"] == 1
+    assert prefetcher.points_spent == 2.0
+
+
+def test_budget_and_quota_limit_prefetching():
+    calls = []
+    prefetcher = RecipePrefetcher(recipe_agent(calls), top_n=3, budget_points=3.0)
+    assert prefetcher.start("a", search_results())  # 3 recipes: 2 points
+    prefetcher.get("a", 1)
+    assert prefetcher.start("b", search_results())  # Only 1 point left: trimmed to 1 recipe
+    prefetcher.get("b", 1)
+    assert not prefetcher.start("c", search_results())
+    assert prefetcher.points_spent == 3.0
+    assert prefetcher.stats()["skipped"] == 2
+
+    # Never prefetch on the last points of the daily quota
+    limiter = QuotaRateLimiter()
+    limiter.update({"X-API-Quota-Left": "20"}, 200)
+    low = RecipePrefetcher(recipe_agent([], resilience=Resilience(limiter=limiter)), min_quota_left=50)
+    assert not low.start("a", search_results())
+
+    assert not RecipePrefetcher(recipe_agent([]), top_n=0).start("a", search_results())
+
+
+def test_new_search_cancels_the_previous_prefetch():
+    calls = []
+    gate = threading.Event()
+    prefetcher = RecipePrefetcher(recipe_agent(calls, gate), top_n=2)
+    prefetcher.start("s1", search_results())
+    prefetcher.start("s1", search_results()[3:])  # Supersedes the first, still blocked upstream
+    gate.set()
+
+    assert prefetcher.get("s1", 1) is None
+    assert prefetcher.get("s1", 4).title == "Curry 4"
+
+
+def test_queued_prefetch_is_cancelled_not_awaited_or_charged():
+    calls = []
+    executor = ThreadPoolExecutor(max_workers=1)
+    busy = threading.Event()
+    executor.submit(busy.wait, 5)  # Other sessions' prefetches hold the only worker
+    prefetcher = RecipePrefetcher(recipe_agent(calls), top_n=3, executor=executor)
+    try:
+        assert prefetcher.start("s1", search_results())
+        assert prefetcher.points_spent == 2.0
+        start = time.monotonic()
+        assert prefetcher.get("s1", 2) is None  # The caller fetches directly instead
+        assert time.monotonic() - start < 1
+        assert prefetcher.points_spent == 0.0
+
+        prefetcher.start("s2", search_results())
+        assert asyncio.run(prefetcher.aget("s2", 1)) is None
+        prefetcher.start("s3", search_results())
+        prefetcher.cancel("s3")
+        assert prefetcher.points_spent == 0.0
+    finally:
+        busy.set()
+        executor.shutdown(wait=True)
+    assert calls == []
+
+
+def test_service_select_uses_the_prefetched_recipe():
+    calls = []
+    handler = spoonacular(calls)
+
+    async def async_handler(request: httpx.Request) -> httpx.Response:
+        return handler(request)
+
+    stub = httpx.AsyncClient(transport=httpx.MockTransport(async_handler))
+    recipes = RecipeAgent("test", client=httpx.Client(transport=httpx.MockTransport(handler)), async_client=stub)
+    service = CookingService(
+        llm_agent=LLM_Agent(FakeListChatModel(responses=['{"name": "Curry"}'])),
+        search_agent=SearchAgent("test", async_client=stub),
+        recipe_agent=recipes,
+        cooking_agent=CookingGraphAgent(llm=FakeListChatModel(responses=["unused"])),
+        prefetcher=RecipePrefetcher(recipes, top_n=3),
+    )
+
+    async def main():
+        transport = httpx.ASGITransport(app=create_app(service))
+        async with httpx.AsyncClient(transport=transport, base_url="http://service") as http:
+            found = (await http.post("/search", json={"query": "curry"})).json()
+            selected = await http.post("/select", json={"session_id": found["session_id"], "choice": 2})
+            return selected.json()
+
+    assert asyncio.run(main())["recipe"]["title"] == "Curry 2"
+    assert calls == ["/recipes/complexSearch", "/recipes/informationBulk"]
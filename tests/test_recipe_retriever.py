@@ -0,0 +1,44 @@
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from gemma3n_trial.agents import CookingGraphAgent, AgentState
+from gemma3n_trial.utils import BM25Index, RecipeContextBuilder, RecipeRetriever, chunk_recipe, count_tokens
+from test_recipe_context import BUTTER_CHICKEN, CARBONARA
+
+
+def test_chunks_are_ingredient_groups_and_steps():
+    chunks = chunk_recipe(BUTTER_CHICKEN)
+    assert sum(c.startswith("Ingredients:") for c in chunks) == 4
+    assert [c for c in chunks if c.startswith("Step")][-1].startswith("Step 5: Stir in cream")
+    # Inline "1. ... 2. ..." numbering is split into steps too
+    assert chunk_recipe(CARBONARA)[-1] == "Step 3: Combine with pancetta."
+
+
+def test_bm25_ranks_matching_chunk_first():
+    index = BM25Index(["Boil the pasta in salted water.", "Whisk eggs with cheese.", "Fry the pancetta."])
+    assert index.scores("how many eggs").argmax() == 1
+    assert index.top_k("pancetta or eggs", 5) == [1, 2]
+    assert index.top_k("saffron", 5) == []
+
+
+def test_long_recipe_sends_only_relevant_chunks():
+    retriever = RecipeRetriever(top_k=3)
+    context = retriever.build(BUTTER_CHICKEN, "What can I use instead of the cream?")
+
+    assert context.startswith("Title: Butter Chicken\nServings: 4")
+    assert "Step 5: Stir in cream" in context
+    assert "Step 2: Grill" not in context
+    assert count_tokens(context) < count_tokens(RecipeContextBuilder().build(BUTTER_CHICKEN)) / 3
+
+
+def test_short_recipes_and_unmatched_questions_get_full_context():
+    retriever = RecipeRetriever()
+    full = RecipeContextBuilder().build(CARBONARA)
+    assert retriever.build(CARBONARA, "How much pancetta?") == full
+    assert retriever.build(BUTTER_CHICKEN, "Summarize it") == RecipeContextBuilder().build(BUTTER_CHICKEN)
+
+
+def test_agent_prompt_uses_retrieved_context():
+    agent = CookingGraphAgent(llm=FakeListChatModel(responses=["Use coconut cream."]))
+    state = AgentState(detailed_recipe=BUTTER_CHICKEN, user_input="Substitute for the cream?")
+    prompt_input = agent._prepare(state, agent.sessions.get("s"))
+    assert "Relevant parts of the recipe:" in prompt_input["recipe"]
+    assert "Summary:" not in prompt_input["recipe"]
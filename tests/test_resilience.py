@@ -0,0 +1,194 @@
+import asyncio
+import httpx
+from gemma3n_trial.agents import SearchAgent
+from gemma3n_trial.utils import (
+    CircuitBreaker, CircuitOpenError, QuotaExceededError, QuotaRateLimiter, Resilience, RetryPolicy,
+)
+
+RESULTS = {"results": [{"id": 1, "title": "Butter Chicken"}]}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def flaky_agent(statuses: list, calls: list, resilience: Resilience) -> SearchAgent:
+    # Answers with each status in turn, then 200 forever
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.params["query"])
+        if statuses:
+            return httpx.Response(statuses.pop(0), headers={"Retry-After": "0"})
+        return httpx.Response(200, json=RESULTS)
+
+    transport = httpx.MockTransport(handler)
+    return SearchAgent(
+        "test",
+        client=httpx.Client(transport=transport),
+        async_client=httpx.AsyncClient(transport=transport),
+        resilience=resilience,
+    )
+
+
+def test_transient_errors_are_retried():
+    calls = []
+    agent = flaky_agent([503, 429], calls, Resilience(retry=RetryPolicy(base_delay=0)))
+    assert agent.invoke("butter chicken").results[0].title == "Butter Chicken"
+    assert len(calls) == 3
+
+    calls.clear()
+    agent = flaky_agent([502], calls, Resilience(retry=RetryPolicy(base_delay=0)))
+    assert asyncio.run(agent.ainvoke("butter chicken")).results[0].id == 1
+    assert len(calls) == 2
+
+
+def test_gives_up_after_max_attempts_and_skips_non_retryable():
+    calls = []
+    agent = flaky_agent([503] * 5, calls, Resilience(retry=RetryPolicy(max_attempts=3, base_delay=0)))
+    try:
+        agent.invoke("paella")
+    except httpx.HTTPStatusError as e:
+        assert e.response.status_code == 503
+    else:
+        raise AssertionError("expected HTTPStatusError")
+    assert len(calls) == 3
+
+    calls.clear()
+    agent = flaky_agent([404], calls, Resilience(retry=RetryPolicy(base_delay=0)))
+    try:
+        agent.invoke("paella")
+    except httpx.HTTPStatusError:
+        pass
+    assert len(calls) == 1
+
+
+def test_backoff_is_jittered_and_capped():
+    policy = RetryPolicy(max_attempts=10, base_delay=1.0, max_delay=4.0)
+    delays = [policy.delay(attempt) for attempt in range(1, 10) for _ in range(20)]
+    assert all(0 <= d <= 4.0 for d in delays)
+    assert len(set(delays)) > 1
+    assert policy.delay(10) is None
+    # A Retry-After longer than we'd wait means give up now
+    assert policy.delay(1, retry_after=2.0) == 2.0
+    assert policy.delay(1, retry_after=60.0) is None
+
+
+def test_breaker_opens_fails_fast_and_recovers():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30, clock=clock)
+    calls = []
+    agent = flaky_agent([503] * 3, calls, Resilience(retry=RetryPolicy(base_delay=0), breaker=breaker))
+
+    try:
+        agent.invoke("paella")
+    except httpx.HTTPStatusError:
+        pass
+    assert breaker.state == "open"
+
+    # No request reaches upstream while open
+    try:
+        agent.invoke("paella")
+    except CircuitOpenError as e:
+        assert e.retry_in == 30
+    else:
+        raise AssertionError("expected CircuitOpenError")
+    assert len(calls) == 3
+
+    # After the cool-down a single probe goes through and closes it
+    clock.now += 31
+    assert agent.invoke("paella").results
+    assert breaker.state == "closed"
+    assert len(calls) == 4
+
+
+def test_half_open_lets_one_probe_through():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=5, clock=clock)
+    breaker.record_failure()
+    clock.now += 5
+    breaker.before_call()
+    try:
+        breaker.before_call()
+    except CircuitOpenError:
+        pass
+    else:
+        raise AssertionError("second caller should fail fast during the probe")
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+
+def test_rate_limiter_paces_by_rate_and_quota_headers():
+    clock = FakeClock()
+    limiter = QuotaRateLimiter(max_per_second=10, pace_below=50, clock=clock, until_reset=lambda: 100.0)
+    assert [round(limiter.reserve(), 6) for _ in range(3)] == [0.0, 0.1, 0.2]
+
+    # 10 requests left with 100s to go: spread them out, capped at max_interval
+    clock.now += 10
+    limiter.update({"X-API-Quota-Used": "140", "X-API-Quota-Left": "10", "X-API-Quota-Request": "1"}, 200)
+    assert limiter.quota_used == 140
+    assert [round(limiter.reserve(), 6) for _ in range(3)] == [0.0, 2.0, 4.0]
+
+
+def test_spent_quota_fails_fast_until_reset():
+    clock = FakeClock()
+    limiter = QuotaRateLimiter(clock=clock, until_reset=lambda: 60.0)
+    calls = []
+    agent = flaky_agent([402], calls, Resilience(retry=RetryPolicy(base_delay=0), limiter=limiter))
+    try:
+        agent.invoke("paella")
+    except httpx.HTTPStatusError as e:
+        assert e.response.status_code == 402
+    try:
+        agent.invoke("paella")
+    except QuotaExceededError as e:
+        assert e.retry_in == 60
+    else:
+        raise AssertionError("expected QuotaExceededError")
+    assert len(calls) == 1
+
+    clock.now += 61
+    assert agent.invoke("paella").results
+
+
+def test_probe_is_released_when_the_quota_or_a_cancel_ends_it():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=5, clock=clock)
+    limiter = QuotaRateLimiter(clock=clock, until_reset=lambda: 60.0)
+    calls = []
+    agent = flaky_agent([], calls, Resilience(breaker=breaker, limiter=limiter))
+    breaker.record_failure()
+    clock.now += 5  # Next call is the half-open probe...
+    limiter.update({}, 402)  # ...but the quota is spent
+    try:
+        agent.invoke("paella")
+    except QuotaExceededError:
+        pass
+    else:
+        raise AssertionError("expected QuotaExceededError")
+
+    # Once the quota resets the probe goes through instead of CircuitOpenError forever
+    clock.now += 61
+    assert agent.invoke("paella").results
+    assert breaker.state == "closed" and calls == ["paella"]
+
+    # Cancelled while paced: the probe is freed too
+    breaker.record_failure()
+    clock.now += 5
+    slow = Resilience(breaker=breaker, limiter=QuotaRateLimiter(max_per_second=0.01, clock=clock))
+    slow.limiter.reserve()  # The next slot is 100s away
+
+    async def cancel_during_pacing():
+        task = asyncio.ensure_future(slow.acall(lambda: None))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    asyncio.run(cancel_during_pacing())
+    assert breaker.state == "half_open"
+    breaker.before_call()  # Another caller can take the probe
@@ -0,0 +1,122 @@
+import multiprocessing
+import sqlite3
+import time
+import httpx
+from gemma3n_trial.agents import SearchAgent, RecipeAgent
+from gemma3n_trial.schema import RecipeSearchResult
+from gemma3n_trial.utils import ResponseCache
+
+
+def counting_client(calls: list) -> httpx.Client:
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.path)
+        if request.url.path.endswith("/complexSearch"):
+            return httpx.Response(200, json={"results": [{"id": 1, "title": "Butter Chicken"}]})
+        if request.url.path.endswith("/informationBulk"):
+            ids = [int(i) for i in request.url.params["ids"].split(",")]
+            return httpx.Response(200, json=[{"id": i, "title": f"Recipe {i}"} for i in ids])
+        return httpx.Response(200, json={"id": 1, "title": "Butter Chicken"})
+    return httpx.Client(transport=httpx.MockTransport(handler))
+
+
+def test_normalized_query_hits_cache(tmp_path):
+    calls = []
+    cache = ResponseCache(str(tmp_path / "cache.sqlite3"))
+    agent = SearchAgent("k", client=counting_client(calls), cache=cache)
+
+    agent.invoke("Butter Chicken")
+    result = agent.invoke("  butter   chicken! ")
+    assert result.results[0].title == "Butter Chicken"
+    assert calls == ["/recipes/complexSearch"]
+
+
+def test_api_key_is_not_part_of_the_key():
+    assert ResponseCache.make_key("complexSearch", {"query": "x", "apiKey": "a"}) == \
+        ResponseCache.make_key("complexSearch", {"query": "x", "apiKey": "b"})
+
+
+def test_entries_expire_per_endpoint(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite3"), ttls={"complexSearch": 0.05})
+    cache.set("complexSearch", {"query": "dal"}, {"results": []})
+    cache.set("information", {"id": 1}, {"id": 1})
+    time.sleep(0.1)
+    assert cache.get("complexSearch", {"query": "dal"}) is None
+    assert cache.get("information", {"id": 1}) == {"id": 1}
+
+
+def test_lru_eviction_keeps_recently_used(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite3"), max_entries=3)
+    for i in range(3):
+        cache.set("information", {"id": i}, {"id": i})
+        time.sleep(0.01)
+    cache.get("information", {"id": 0})  # 1 is now least recently used
+    cache.set("information", {"id": 3}, {"id": 3})
+    assert len(cache) == 3
+    assert cache.get("information", {"id": 1}) is None
+    assert cache.get("information", {"id": 0}) == {"id": 0}
+
+
+def test_hit_survives_a_locked_database(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = ResponseCache(path, busy_timeout=0.05, access_batch=1)
+    cache.set("information", {"id": 1}, {"id": 1})
+
+    # Another process holds the write lock: recording the access fails, the read doesn't
+    writer = sqlite3.connect(path, isolation_level=None)
+    writer.execute("BEGIN IMMEDIATE")
+    try:
+        assert cache.get("information", {"id": 1}) == {"id": 1}
+    finally:
+        writer.execute("ROLLBACK")
+
+
+def test_access_times_and_size_checks_are_batched(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = ResponseCache(path, max_entries=3, evict_every=5)
+    for i in range(4):
+        cache.set("information", {"id": i}, {"id": i})
+    assert len(cache) == 4  # No size check yet
+
+    def last_access(i):
+        key = ResponseCache.make_key("information", {"id": i})
+        return sqlite3.connect(path).execute("SELECT last_access FROM responses WHERE key = ?", (key,)).fetchone()[0]
+
+    before = last_access(0)
+    cache.get("information", {"id": 0})
+    assert last_access(0) == before  # Hits don't write
+    cache.set("information", {"id": 4}, {"id": 4})
+    assert last_access(0) > before
+    assert len(cache) == 3
+    assert cache.get("information", {"id": 0}) == {"id": 0}
+
+
+def test_recipe_fetch_and_bulk_share_entries(tmp_path):
+    calls = []
+    cache = ResponseCache(str(tmp_path / "cache.sqlite3"))
+    agent = RecipeAgent("k", client=counting_client(calls), cache=cache)
+
+    agent.invoke({"selected_recipe": RecipeSearchResult(id=1, title="Butter Chicken")})
+    result = agent.invoke_bulk([{"id": 1, "title": "a"}, {"id": 2, "title": "b"}])
+    agent.invoke({"selected_recipe": {"id": 2, "title": "b"}})
+
+    assert [r.id for r in result.recipes] == [1, 2]
+    assert calls == ["/recipes/1/information", "/recipes/informationBulk"]
+
+
+def _writer(path: str, worker: int):
+    cache = ResponseCache(path, max_entries=50)
+    for i in range(40):
+        cache.set("information", {"id": worker * 1000 + i}, {"worker": worker})
+        cache.get("information", {"id": i})
+
+
+def test_concurrent_processes_share_one_file(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    ctx = multiprocessing.get_context("spawn")
+    workers = [ctx.Process(target=_writer, args=(path, w)) for w in range(4)]
+    for p in workers:
+        p.start()
+    for p in workers:
+        p.join(timeout=60)
+    assert all(p.exitcode == 0 for p in workers)
+    assert len(ResponseCache(path, max_entries=50)) == 50
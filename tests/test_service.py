@@ -0,0 +1,197 @@
+import asyncio
+import json
+import sys
+import time
+import types
+from typing import Any, List, Optional
+
+import httpx
+from langchain_core.language_models import BaseChatModel
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from gemma3n_trial.agents import LLM_Agent, SearchAgent, LocalSearchAgent, RecipeAgent, CookingGraphAgent
+from gemma3n_trial.service import CookingService, create_app
+from gemma3n_trial.utils import RecipeSearchIndex
+
+LATENCY = 0.1
+
+
+class SlowDishNameChat(BaseChatModel):
+    @property
+    def _llm_type(self) -> str:
+        return "slow-dish-name"
+
+    def _result(self) -> ChatResult:
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content='{"name": "Butter Chicken"}'))])
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs) -> ChatResult:
+        time.sleep(LATENCY)
+        return self._result()
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs) -> ChatResult:
+        await asyncio.sleep(LATENCY)
+        return self._result()
+
+
+async def spoonacular_stub(request: httpx.Request) -> httpx.Response:
+    await asyncio.sleep(LATENCY)
+    if request.url.path.endswith("/complexSearch"):
+        return httpx.Response(200, json={"results": [
+            {"id": 1, "title": "Butter Chicken"}, {"id": 2, "title": "Murgh Makhani"},
+        ]})
+    recipe_id = int(request.url.path.split("/")[-2])
+    return httpx.Response(200, json={
+        "id": recipe_id, "title": "Butter Chicken" if recipe_id == 1 else "Murgh Makhani",
+        "instructions": "Simmer.", "servings": 4, "extendedIngredients": [{"original": "1 cup cream"}],
+    })
+
+
+def make_app():
+    stub = httpx.AsyncClient(transport=httpx.MockTransport(spoonacular_stub))
+    service = CookingService(
+        llm_agent=LLM_Agent(SlowDishNameChat()),
+        # Index off, so every search goes through the stub
+        search_agent=SearchAgent("test", async_client=stub),
+        recipe_agent=RecipeAgent("test", async_client=stub),
+        cooking_agent=CookingGraphAgent(llm=FakeListChatModel(responses=["Add it at the end."])),
+    )
+    return service, create_app(service)
+
+
+def client(app) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://service")
+
+
+def test_search_select_ask_flow():
+    service, app = make_app()
+
+    async def main():
+        async with client(app) as http:
+            found = (await http.post("/search", json={"query": "how do I make butter chicken?"})).json()
+            session_id = found["session_id"]
+            assert [r["title"] for r in found["recipes"]] == ["Butter Chicken", "Murgh Makhani"]
+
+            selected = await http.post("/select", json={"session_id": session_id, "choice": 2})
+            assert selected.json()["recipe"]["title"] == "Murgh Makhani"
+
+            answer = await http.post("/ask", json={"session_id": session_id, "question": "When does the cream go in?"})
+            assert answer.json()["answer"] == "Add it at the end."
+
+            streamed = await http.post("/ask", json={"session_id": session_id, "question": "Again?", "stream": True})
+            assert streamed.headers["content-type"].startswith("text/plain")
+            assert streamed.text == "Add it at the end."
+            return session_id
+
+    session_id = asyncio.run(main())
+    # Chat memory is kept per session id on the shared cooking agent
+    memory = service.cooking_agent.sessions.get(session_id).memory
+    assert len(memory.load_memory_variables({})["chat_history"]) == 4
+
+
+def test_error_mid_stream_ends_the_body():
+    service, app = make_app()
+
+    async def failing_stream(state, session_id):
+        yield "Add it"
+        raise RuntimeError("model crashed")
+
+    async def main():
+        async with client(app) as http:
+            found = (await http.post("/search", json={"query": "how do I make butter chicken?"})).json()
+            await http.post("/select", json={"session_id": found["session_id"], "choice": 1})
+        service.cooking_agent.astream = failing_stream
+
+        body = json.dumps({"session_id": found["session_id"], "question": "When?", "stream": True}).encode()
+        sent = []
+
+        async def receive():
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        async def send(message):
+            sent.append(message)
+
+        await app({"type": "http", "path": "/ask", "method": "POST", "headers": []}, receive, send)
+        return sent
+
+    sent = asyncio.run(main())
+    assert [m["type"] for m in sent].count("http.response.start") == 1
+    assert sent[0]["status"] == 200
+    assert sent[1]["body"] == b"Add it"
+    assert sent[-1] == {"type": "http.response.body", "body": b""}
+
+
+def test_errors_map_to_status_codes():
+    _, app = make_app()
+
+    async def main():
+        async with client(app) as http:
+            assert (await http.get("/healthz")).json() == {"status": "ok"}
+            assert (await http.get("/search")).status_code == 405
+            assert (await http.post("/nope", json={})).status_code == 404
+            assert (await http.post("/search", content=b"not json")).status_code == 400
+            assert (await http.post("/select", json={"session_id": "missing", "choice": 1})).status_code == 404
+
+            session_id = (await http.post("/search", json={"query": "butter chicken"})).json()["session_id"]
+            assert (await http.post("/ask", json={"session_id": session_id, "question": "?"})).status_code == 409
+            bad_choice = await http.post("/select", json={"session_id": session_id, "choice": 9})
+            assert bad_choice.status_code == 400 and "1-2" in bad_choice.json()["error"]
+
+    asyncio.run(main())
+
+
+def test_concurrent_sessions_overlap():
+    _, app = make_app()
+
+    async def session(http: httpx.AsyncClient) -> None:
+        found = (await http.post("/search", json={"query": "how do I make butter chicken?"})).json()
+        selected = await http.post("/select", json={"session_id": found["session_id"], "choice": 1})
+        assert selected.status_code == 200
+
+    async def run(n: int) -> float:
+        async with client(app) as http:
+            start = time.perf_counter()
+            await asyncio.gather(*(session(http) for _ in range(n)))
+            return time.perf_counter() - start
+
+    async def main():
+        return await run(1), await run(20)
+
+    single, many = asyncio.run(main())
+    # LLM, complexSearch, /information: three hops that 20 sessions should overlap
+    assert single >= 3 * LATENCY
+    assert many < 2 * single
+
+
+def test_search_indexes_for_local_service():
+    stub = httpx.AsyncClient(transport=httpx.MockTransport(spoonacular_stub))
+    search_agent = LocalSearchAgent(RecipeSearchIndex(None), remote=SearchAgent("test", async_client=stub))
+    service = CookingService(
+        llm_agent=LLM_Agent(SlowDishNameChat()),
+        search_agent=search_agent,
+        recipe_agent=RecipeAgent("test", async_client=stub),
+        cooking_agent=CookingGraphAgent(llm=FakeListChatModel(responses=["ok"])),
+    )
+
+    async def main():
+        async with client(create_app(service)) as http:
+            session_id = (await http.post("/search", json={"query": "butter chicken"})).json()["session_id"]
+            await http.post("/select", json={"session_id": session_id, "choice": 1})
+            await http.post("/search", json={"query": "butter chicken", "session_id": session_id})
+
+    asyncio.run(main())
+    assert search_agent.remote_calls == 1 and search_agent.local_hits == 1
+    assert [r.title for r, _ in search_agent.index.search("cream")] == ["Butter Chicken"]
+
+
+def test_main_reads_dotenv_before_its_defaults(monkeypatch):
+    from gemma3n_trial.service import __main__ as service_main
+
+    monkeypatch.delenv("SERVICE_PORT", raising=False)
+    monkeypatch.setattr(service_main, "load_dotenv", lambda: monkeypatch.setenv("SERVICE_PORT", "9123"))
+    runs = []
+    monkeypatch.setitem(sys.modules, "uvicorn", types.SimpleNamespace(run=lambda app, **kwargs: runs.append(kwargs)))
+    monkeypatch.setattr(sys, "argv", ["gemma3n_trial.service"])
+    service_main.main()
+    assert runs[0]["port"] == 9123
@@ -0,0 +1,101 @@
+import asyncio
+import threading
+import time
+from langchain_core.language_models.fake_chat_models import ParrotFakeChatModel
+from gemma3n_trial.agents import CookingGraphAgent, AgentState, SessionMemoryStore
+from gemma3n_trial.schema import DetailedRecipe
+
+RECIPE = DetailedRecipe(
+    id=1, title="Dal", summary=None, instructions="Boil lentils.",
+    readyInMinutes=30, servings=2, ingredients=["lentils"],
+)
+
+
+def history(agent: CookingGraphAgent, session_id: str):
+    memory = agent.sessions.get(session_id).memory
+    return [m.content for m in memory.load_memory_variables({})["chat_history"]]
+
+
+def test_sessions_do_not_share_history():
+    agent = CookingGraphAgent(llm=ParrotFakeChatModel())
+    agent.invoke(AgentState(detailed_recipe=RECIPE, user_input="alice question"), session_id="alice")
+    agent.invoke(AgentState(detailed_recipe=RECIPE, user_input="bob question"), session_id="bob")
+
+    assert history(agent, "alice")[0] == "alice question"
+    assert history(agent, "bob")[0] == "bob question"
+    assert len(history(agent, "alice")) == 2
+
+
+def test_concurrent_conversations_without_cross_talk():
+    agent = CookingGraphAgent(llm=ParrotFakeChatModel())
+
+    def converse(user: str):
+        for turn in range(3):
+            state = AgentState(detailed_recipe=RECIPE, user_input=f"{user} turn {turn}")
+            agent.invoke(state, session_id=user)
+
+    users = [f"user{i}" for i in range(16)]
+    threads = [threading.Thread(target=converse, args=(u,)) for u in users]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    for user in users:
+        questions = history(agent, user)[::2]
+        # Window of k=2 turns, all from this user only
+        assert questions == [f"{user} turn 1", f"{user} turn 2"]
+
+
+def test_store_is_bounded_and_evicts_idle_sessions():
+    store = SessionMemoryStore(dict, max_sessions=3, idle_ttl=0.05)
+    for i in range(5):
+        store.get(f"s{i}")
+    assert len(store) == 3
+    assert "s0" not in store and "s4" in store
+
+    time.sleep(0.1)
+    store.get("fresh")
+    assert len(store) == 1
+
+
+def test_checked_out_sessions_are_not_evicted():
+    store = SessionMemoryStore(dict, max_sessions=1, idle_ttl=None)
+    busy = store.checkout("busy")
+    store.get("other")
+    assert "busy" in store
+    store.checkin(busy)
+    store.get("third")
+    assert "busy" not in store
+
+
+def test_sync_and_async_turns_share_one_lock():
+    store = SessionMemoryStore(dict)
+    session = store.get("mixed")
+    order = []
+    released = threading.Event()
+
+    def sync_turn():
+        with session.lock:
+            order.append("sync")
+            released.wait(1)
+            order.append("sync done")
+
+    async def async_turn():
+        async with session.lock:
+            order.append("async")
+
+    thread = threading.Thread(target=sync_turn)
+    thread.start()
+    while not session.lock.locked():
+        time.sleep(0.001)
+    threading.Timer(0.05, released.set).start()
+    asyncio.run(async_turn())
+    thread.join()
+    assert order == ["sync", "sync done", "async"]
+
+
+def test_default_session_keeps_memory_attribute():
+    agent = CookingGraphAgent(llm=ParrotFakeChatModel())
+    agent.invoke(AgentState(detailed_recipe=RECIPE, user_input="hello"))
+    assert agent.memory.load_memory_variables({})["chat_history"][0].content == "hello"
@@ -0,0 +1,106 @@
+import asyncio
+import threading
+import time
+import httpx
+from gemma3n_trial.agents import RecipeAgent, SearchAgent
+from gemma3n_trial.utils import Resilience, RetryPolicy, SingleFlight
+
+RESULTS = {"results": [{"id": 1, "title": "Butter Chicken"}]}
+
+
+def counting_handler(hits: list, status: int = 200):
+    def handler(request: httpx.Request) -> httpx.Response:
+        hits.append(request.url.path)
+        time.sleep(0.2)  # Long enough for every caller to pile up behind the first
+        if status != 200:
+            return httpx.Response(status)
+        if request.url.path.endswith("/information"):
+            return httpx.Response(200, json={"id": 7, "title": "Paella", "extendedIngredients": []})
+        return httpx.Response(200, json=RESULTS)
+    return handler
+
+
+def test_hundred_concurrent_threads_make_one_upstream_call():
+    hits = []
+    agent = SearchAgent("test", client=httpx.Client(transport=httpx.MockTransport(counting_handler(hits))))
+    barrier = threading.Barrier(100)
+    results = [None] * 100
+
+    def search(i):
+        barrier.wait()
+        results[i] = agent.invoke("butter chicken")
+
+    threads = [threading.Thread(target=search, args=(i,)) for i in range(100)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert hits == ["/recipes/complexSearch"]
+    assert all(r.results[0].title == "Butter Chicken" for r in results)
+    assert agent.inflight.shared == 99
+
+
+def test_hundred_concurrent_tasks_make_one_upstream_call():
+    hits = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        hits.append(request.url.path)
+        await asyncio.sleep(0.05)
+        return httpx.Response(200, json={"id": 7, "title": "Paella", "extendedIngredients": []})
+
+    async def main():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            agent = RecipeAgent("test", async_client=client)
+            state = {"selected_recipe": {"id": 7, "title": "Paella"}}
+            return await asyncio.gather(*(agent.ainvoke(state) for _ in range(100)))
+
+    states = asyncio.run(main())
+    assert hits == ["/recipes/7/information"]
+    assert {s["detailed_recipe"]["title"] for s in states} == {"Paella"}
+
+
+def test_errors_are_shared_and_not_remembered():
+    hits = []
+    transport = httpx.MockTransport(counting_handler(hits, status=404))
+    agent = SearchAgent("test", client=httpx.Client(transport=transport), resilience=Resilience(retry=RetryPolicy(max_attempts=1)))
+    errors = []
+
+    def search():
+        try:
+            agent.invoke("paella")
+        except httpx.HTTPStatusError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=search) for _ in range(10)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(hits) == 1
+    assert len(errors) == 10
+
+    # The failed flight is over: the next call goes upstream again
+    search()
+    assert len(hits) == 2
+
+
+def test_cancelled_caller_does_not_cancel_the_shared_call():
+    flight = SingleFlight()
+    runs = []
+
+    async def fetch():
+        runs.append(1)
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def main():
+        first = asyncio.ensure_future(flight.do_async("k", fetch))
+        second = asyncio.ensure_future(flight.do_async("k", fetch))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(main()) == "done"
+    assert runs == [1]
+    assert flight.in_flight() == 0
@@ -0,0 +1,92 @@
+import threading
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from gemma3n_trial.agents import CookingGraphAgent, AgentState, SummaryBufferMemory
+from gemma3n_trial.schema import DetailedRecipe
+from gemma3n_trial.utils import count_tokens
+
+RECIPE = DetailedRecipe(
+    id=1, title="Dal", summary=None, instructions="Boil lentils. Temper with cumin and ghee.",
+    readyInMinutes=30, servings=2, ingredients=["lentils", "cumin", "ghee"],
+)
+ANSWER = "Use oil instead of ghee and add the cumin once it shimmers, then pour it over the lentils. " * 2
+
+
+class FakeCook(BaseChatModel):
+    """Answers questions with ANSWER and summary requests with a short summary."""
+    release: threading.Event = None
+    fail_summary: bool = False
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-cook"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        if "summarize" in messages[0].content:
+            if self.release is not None:
+                self.release.wait(5)
+            if self.fail_summary:
+                raise RuntimeError("summarizer down")
+            text = "User is vegan-curious; ghee can be swapped for oil."
+        else:
+            text = ANSWER
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+
+def prompt_tokens(agent: CookingGraphAgent, question: str) -> int:
+    state = AgentState(detailed_recipe=RECIPE, user_input=question)
+    prompt_input = agent._prepare(state, agent.sessions.get("s"))
+    return sum(count_tokens(m.content) for m in agent.prompt.format_messages(**prompt_input))
+
+
+def test_prompt_size_is_bounded_over_long_conversation():
+    agent = CookingGraphAgent(llm=FakeCook(), memory_mode="summary", memory_max_tokens=200)
+    sizes = []
+    for turn in range(20):
+        question = f"Question {turn}: what if I change step {turn}?"
+        sizes.append(prompt_tokens(agent, question))
+        agent.invoke(AgentState(detailed_recipe=RECIPE, user_input=question), session_id="s")
+        agent.sessions.get("s").memory.wait()
+
+    # Grows while the buffer fills, then stays flat
+    assert sizes[-1] == sizes[10] == max(sizes)
+    history = agent.sessions.get("s").memory.messages
+    assert isinstance(history[0], SystemMessage) and "ghee can be swapped" in history[0].content
+    assert history[-2].content == "Question 19: what if I change step 19?"
+
+
+def test_summary_refresh_is_off_the_response_path():
+    release = threading.Event()
+    memory = SummaryBufferMemory(FakeCook(release=release), max_tokens=50)
+    for turn in range(4):
+        # Would block for seconds if the summary were computed inline
+        memory.save_context({"input": f"q{turn}"}, {"output": ANSWER})
+
+    # Pruned turns are still visible verbatim until the summary lands
+    pending = [m.content for m in memory.messages if isinstance(m, HumanMessage)]
+    assert pending == ["q0", "q1", "q2", "q3"]
+    assert memory.summary == ""
+
+    release.set()
+    memory.wait(5)
+    assert memory.summary.startswith("User is vegan-curious")
+    assert [m.content for m in memory.messages if isinstance(m, HumanMessage)] == ["q3"]
+
+
+def test_failed_summary_drops_old_turns():
+    memory = SummaryBufferMemory(FakeCook(fail_summary=True), max_tokens=50)
+    for turn in range(3):
+        memory.save_context({"input": f"q{turn}"}, {"output": ANSWER})
+        memory.wait(5)
+    assert memory.summary == ""
+    assert [m.content for m in memory.messages] == ["q2", ANSWER]
+
+
+def test_unknown_memory_mode_is_rejected():
+    try:
+        CookingGraphAgent(llm=FakeCook(), memory_mode="infinite")
+    except ValueError as e:
+        assert "memory_mode" in str(e)
+    else:
+        raise AssertionError("expected ValueError")